@@ -12,6 +12,7 @@ from spacq.gui.config.devices import DeviceConfigFrame
 from spacq.gui.config.pulse import PulseProgramFrame
 from spacq.gui.config.variables import VariablesPanel
 from spacq.gui.display.plot.live.list import ListMeasurementFrame
+from spacq.gui.display.plot.live.map import MapMeasurementFrame
 from spacq.gui.display.plot.live.scalar import ScalarMeasurementFrame
 from spacq.gui.global_store import GlobalStore
 from spacq.gui.tool.box import MessageDialog
@@ -85,6 +86,9 @@ class AcquisitionApp(wx.App):
 		item = submenu.Append(wx.ID_ANY, 'Add &list...')
 		self.Bind(wx.EVT_MENU, self.OnMenuConfigurationMeasurementsAddList, item)
 
+		item = submenu.Append(wx.ID_ANY, 'Add &map...')
+		self.Bind(wx.EVT_MENU, self.OnMenuConfigurationMeasurementsAddMap, item)
+
 		### Pulse program.
 		item = menu.Append(wx.ID_ANY, '&Pulse program...')
 		self.Bind(wx.EVT_MENU, self.OnMenuConfigurationPulseProgram, item)
@@ -126,6 +130,10 @@ class AcquisitionApp(wx.App):
 		measurement_frame = ListMeasurementFrame(self.acq_frame, self.global_store)
 		measurement_frame.Show()
 
+	def OnMenuConfigurationMeasurementsAddMap(self, evt=None):
+		measurement_frame = MapMeasurementFrame(self.acq_frame, self.global_store)
+		measurement_frame.Show()
+
 	def OnMenuConfigurationPulseProgram(self, evt=None):
 		def close_callback():
 			self.pulse_program_frame = None
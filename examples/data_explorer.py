@@ -10,7 +10,7 @@ from spacq import VERSION
 from spacq.gui.display.plot.static.delegator import formats, available_formats
 from spacq.gui.display.table.filter import FilterListDialog
 from spacq.gui.display.table.generic import TabularDisplayFrame
-from spacq.gui.tool.box import load_csv, MessageDialog
+from spacq.gui.tool.box import load_columns, MessageDialog
 
 
 class DataExplorerApp(wx.App):
@@ -125,7 +125,7 @@ class DataExplorerApp(wx.App):
 
 	def OnMenuFileOpen(self, evt=None):
 		try:
-			result = load_csv(self.csv_frame)
+			result = load_columns(self.csv_frame)
 		except IOError as e:
 			MessageDialog(self.csv_frame, str(e), 'Could not load data').Show()
 			return
@@ -135,8 +135,8 @@ class DataExplorerApp(wx.App):
 		else:
 			self.OnMenuFileClose()
 
-		has_header, values, filename = result
-		self.csv_frame.display_panel.from_csv_data(has_header, values)
+		columns, filename = result
+		self.csv_frame.display_panel.from_columns(columns)
 		self.csv_frame.Title = '{0} - {1}'.format(filename, self.default_title)
 
 		self.update_plot_menus(len(self.csv_frame.display_panel) > 0)
@@ -108,6 +108,18 @@ class SuperDevice(object):
 
 			subdev._connected()
 
+	def invalidate_caches(self):
+		"""
+		Forget the cached values of all resources, including those of subdevices.
+		"""
+
+		for resource in self.resources.values():
+			resource.invalidate_cache()
+
+		# Recursively.
+		for subdev in self.subdevices.values():
+			subdev.invalidate_caches()
+
 
 class AbstractDevice(SuperDevice):
 	"""
@@ -277,6 +289,16 @@ class AbstractDevice(SuperDevice):
 
 			return []
 
+	@staticmethod
+	def is_query(message):
+		"""
+		Whether every command in the message is a query, which cannot change the state of the device.
+		"""
+
+		commands = [cmd.split(None, 1) for cmd in message.split(';')]
+
+		return all(cmd and cmd[0].endswith('?') for cmd in commands)
+
 	@Synchronized()
 	def write(self, message):
 		"""
@@ -285,6 +307,10 @@ class AbstractDevice(SuperDevice):
 		Supports multi-command.
 		"""
 
+		if not self.is_query(message):
+			# Any setting may have changed, so cached values can no longer be trusted.
+			self.invalidate_caches()
+
 		if self.multi_command is not None:
 			log.debug('Writing to multi-command buffer for device "{0}": {1!r}'.format(self.name, message))
 
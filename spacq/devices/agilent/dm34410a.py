@@ -1,11 +1,13 @@
 import logging
 log = logging.getLogger(__name__)
 
-from spacq.interface.resources import Resource
+import numpy
+
+from spacq.interface.resources import cache_policies, Resource
 from spacq.tool.box import Synchronized
 
 from ..abstract_device import AbstractDevice
-from ..tools import quantity_wrapped
+from ..tools import quantity_wrapped, BlockData
 
 """
 Agilent 34410A Digital Multimeter
@@ -18,28 +20,39 @@ class DM34410A(AbstractDevice):
 	"""
 	Interface for Agilent 34410A DM.
 
+	Every read triggers the multimeter trigger_count times, taking sample_count readings per trigger into its reading
+	memory, and fetches all of them in one transfer, as text or as binary (data_format 'ascii' or 'real').
+
 	Note: Currently supports only DC voltage readings.
 	"""
 
 	allowed_nplc = set([0.006, 0.02, 0.06, 0.2, 1.0, 2.0, 10.0, 100.0])
 	allowed_auto_zero = set(['off', 'on', 'once'])
+	allowed_data_formats = set(['ascii', 'real'])
+
+	# Size of the reading memory.
+	max_readings = 50000
 
 	def _setup(self):
 		AbstractDevice._setup(self)
 
 		# Resources.
-		read_only = ['reading']
+		read_only = ['reading', 'readings']
 		for name in read_only:
 			self.resources[name] = Resource(self, name)
 
-		read_write = ['integration_time', 'auto_zero']
+		read_write = ['integration_time', 'auto_zero', 'sample_count', 'trigger_count', 'data_format']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
+			self.resources[name].cache_policy = cache_policies.until_set
 
 		self.resources['reading'].units = 'V'
 		self.resources['integration_time'].converter = float
 		self.resources['integration_time'].allowed_values = self.allowed_nplc
 		self.resources['auto_zero'].allowed_values = self.allowed_auto_zero
+		self.resources['sample_count'].converter = int
+		self.resources['trigger_count'].converter = int
+		self.resources['data_format'].allowed_values = self.allowed_data_formats
 
 	@Synchronized()
 	def _connected(self):
@@ -92,25 +105,108 @@ class DM34410A(AbstractDevice):
 
 		self.write('sense:voltage:dc:zero:auto {0}'.format(value))
 
+	def verify_count(self, value):
+		if value < 1 or value > self.max_readings:
+			raise ValueError('Invalid count: {0}'.format(value))
+
 	@property
-	@quantity_wrapped('V')
+	def sample_count(self):
+		"""
+		The number of readings taken per trigger.
+		"""
+
+		return int(float(self.ask('sample:count?')))
+
+	@sample_count.setter
+	def sample_count(self, value):
+		self.verify_count(value)
+
+		self.write('sample:count {0}'.format(value))
+
+	@property
+	def trigger_count(self):
+		"""
+		The number of triggers per read.
+		"""
+
+		return int(float(self.ask('trigger:count?')))
+
+	@trigger_count.setter
+	def trigger_count(self, value):
+		self.verify_count(value)
+
+		self.write('trigger:count {0}'.format(value))
+
+	@property
+	def data_format(self):
+		"""
+		The format in which readings are transferred: 'ascii' or 'real' (64-bit binary).
+		"""
+
+		result = self.ask('format:data?').split(',')[0].lower()
+
+		# The device answers with the short forms (eg. "ASC,9").
+		if result.startswith('asc'):
+			return 'ascii'
+		elif result.startswith('real'):
+			return 'real'
+		else:
+			raise ValueError('Unknown format: {0}'.format(result))
+
+	@data_format.setter
+	def data_format(self, value):
+		if value not in self.allowed_data_formats:
+			raise ValueError('Invalid format: {0}'.format(value))
+
+		if value == 'real':
+			value = 'real,64'
+
+		self.write('format:data {0}'.format(value))
+
 	@Synchronized()
-	def reading(self):
+	def take_readings(self):
 		"""
-		The value measured by the device, as a quantity in V.
+		Trigger the configured readings and fetch them all, as an array of values in V.
 		"""
 
-		self.status.append('Taking reading')
+		self.status.append('Taking readings')
 
 		try:
-			log.debug('Getting reading.')
-			result = float(self.ask('read?'))
-			log.debug('Got reading: {0}'.format(result))
+			log.debug('Getting readings.')
+
+			# The format is only asked for once it has changed.
+			if self.resources['data_format'].value == 'real':
+				# Big-endian 64-bit floats.
+				data = BlockData.from_block_data(self.ask_raw('read?'))
+				result = numpy.frombuffer(data, dtype='>f8').astype(float)
+			else:
+				result = numpy.array(self.ask('read?').split(','), dtype=float)
+
+			log.debug('Got {0} readings.'.format(len(result)))
 
 			return result
 		finally:
 			self.status.pop()
 
+	@property
+	@quantity_wrapped('V')
+	def reading(self):
+		"""
+		The mean of the values measured by the device for a single read, as a quantity in V.
+		"""
+
+		return self.take_readings().mean()
+
+	@property
+	def readings(self):
+		"""
+		All the values measured by the device for a single read, in V.
+
+		Values are returned in the format [(0, value1), (1, value2), ...].
+		"""
+
+		return list(enumerate(self.take_readings().tolist()))
+
 
 name = '34410A'
 implementation = DM34410A
@@ -1,6 +1,8 @@
 import random
+from struct import pack
 
 from ...mock.mock_abstract_device import MockAbstractDevice
+from ...tools import BlockData
 from ..dm34410a import DM34410A
 
 """
@@ -24,6 +26,9 @@ class MockDM34410A(MockAbstractDevice, DM34410A):
 		self.mock_state['mode'] = 'dc'
 		self.mock_state['nplc'] = '1'
 		self.mock_state['auto_zero'] = 1
+		self.mock_state['sample_count'] = '+1'
+		self.mock_state['trigger_count'] = '+1'
+		self.mock_state['data_format'] = 'ASC,9'
 
 	def write(self, message, result=None, done=False):
 		if not done:
@@ -51,8 +56,26 @@ class MockDM34410A(MockAbstractDevice, DM34410A):
 								value = 0
 							self.mock_state['auto_zero'] = value
 						done = True
+			elif cmd[0] in ['sample', 'trigger'] and cmd[1] == 'count':
+				if query:
+					result = self.mock_state[cmd[0] + '_count']
+				else:
+					self.mock_state[cmd[0] + '_count'] = '+{0}'.format(int(args))
+				done = True
+			elif cmd[0] == 'format' and cmd[1] == 'data':
+				if query:
+					result = self.mock_state['data_format']
+				else:
+					self.mock_state['data_format'] = 'REAL,64' if args.startswith('real') else 'ASC,9'
+				done = True
 			elif cmd[0] == 'read' and query:
-				result = '-1.{0:04d}0000E-02'.format(random.randint(0, 9999))
+				num_readings = int(self.mock_state['sample_count']) * int(self.mock_state['trigger_count'])
+				values = [-0.01 - 1e-6 * random.randint(0, 9999) for _ in xrange(num_readings)]
+
+				if self.mock_state['data_format'].startswith('REAL'):
+					result = BlockData.to_block_data(pack('>{0}d'.format(num_readings), *values))
+				else:
+					result = ','.join('{0:+.8E}'.format(x) for x in values)
 				done = True
 
 		MockAbstractDevice.write(self, message, result, done)
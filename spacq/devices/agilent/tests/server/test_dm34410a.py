@@ -60,6 +60,54 @@ class DM34410ATest(DeviceServerTestCase):
 
 		dm.reading.assert_dimensions('V')
 
+	def testCounts(self):
+		"""
+		Test the sample and trigger counts.
+		"""
+
+		dm = self.obtain_device()
+
+		dm.sample_count = 5
+		eq_(dm.sample_count, 5)
+
+		dm.trigger_count = 2
+		eq_(dm.trigger_count, 2)
+
+		for value in [0, dm.max_readings + 1]:
+			try:
+				dm.sample_count = value
+			except ValueError:
+				pass
+			else:
+				assert False, 'Expected ValueError.'
+
+	def testReadings(self):
+		"""
+		Obtain all the readings of a read at once, as text and as binary.
+		"""
+
+		dm = self.obtain_device()
+
+		dm.sample_count = 5
+		dm.trigger_count = 2
+
+		for data_format in ['ascii', 'real']:
+			dm.resources['data_format'].value = data_format
+			eq_(dm.data_format, data_format)
+
+			readings = dm.resources['readings'].value
+			eq_([x[0] for x in readings], range(10))
+			assert all(isinstance(x[1], float) for x in readings)
+
+			dm.resources['reading'].value.assert_dimensions('V')
+
+		try:
+			dm.data_format = 'something else'
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
 
 if __name__ == '__main__':
 	main()
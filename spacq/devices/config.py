@@ -111,6 +111,8 @@ class DeviceConfig(object):
 		# Do not pickle references to mutable objects.
 		del result['_device']
 		del result['resources']
+		# Only available with a connected device, and may require a GUI to load.
+		result['gui_setup'] = None
 
 		return result
 
@@ -97,6 +97,9 @@ class MockAbstractDevice(AbstractDevice):
 
 		log.debug('Writing to device: {0!r}'.format(message))
 
+		if not self.is_query(message):
+			self.invalidate_caches()
+
 		if not done:
 			if message == '*idn?':
 				result = self.name
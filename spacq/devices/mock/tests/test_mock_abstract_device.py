@@ -1,6 +1,8 @@
 from nose.tools import assert_raises, eq_
 from unittest import main, TestCase
 
+from spacq.interface.resources import cache_policies, Resource
+
 from .. import mock_abstract_device
 
 
@@ -52,6 +54,42 @@ class MockAbstractDeviceTest(TestCase):
 
 		eq_(result, expected)
 
+	def testCacheInvalidation(self):
+		"""
+		Only commands which are not queries invalidate cached resource values.
+		"""
+
+		dev = mock_abstract_device.MockAbstractDevice()
+
+		values = [1]
+		res = Resource(getter=lambda: values[-1])
+		res.cache_policy = cache_policies.until_set
+		dev.resources['res'] = res
+
+		eq_(res.value, 1)
+		values.append(2)
+
+		dev.ask('system:version?')
+		eq_(res.value, 1)
+
+		dev.write('*rst')
+		eq_(res.value, 2)
+
+	def testIsQuery(self):
+		"""
+		Recognize queries.
+		"""
+
+		dev = mock_abstract_device.MockAbstractDevice
+
+		assert dev.is_query('*idn?')
+		assert dev.is_query('wlist:name? 5')
+		assert dev.is_query('data:start?;data:stop?')
+		assert not dev.is_query('*rst')
+		assert not dev.is_query('data:start 1')
+		assert not dev.is_query('data:start?;data:stop 5')
+		assert not dev.is_query('')
+
 
 if __name__ == '__main__':
 	main()
@@ -4,7 +4,7 @@ log = logging.getLogger(__name__)
 from collections import namedtuple
 from time import sleep
 
-from spacq.interface.resources import Resource
+from spacq.interface.resources import cache_policies, Resource
 from spacq.tool.box import Synchronized
 
 from ..abstract_device import AbstractDevice
@@ -21,6 +21,10 @@ Status = namedtuple('Status', 'system_status, limits, activity, remote_status, h
 class IPS120_10(AbstractDevice):
 	"""
 	Interface for the Oxford Instruments IPS120-10.
+
+	Setting the field waits until the field has been reached. Setting the ramp target instead only starts the supply
+	ramping towards it at the sweep rate, so that measurements (including of the output field) can be taken while it
+	ramps.
 	"""
 
 	allowed_settings = ['default value', 'something else']
@@ -35,13 +39,21 @@ class IPS120_10(AbstractDevice):
 		self._perma_hot = True
 
 		# Resources.
-		read_write = ['perma_hot', 'sweep_rate', 'field']
+		read_only = ['output_field']
+		for name in read_only:
+			self.resources[name] = Resource(self, name)
+
+		read_write = ['perma_hot', 'sweep_rate', 'field', 'ramp_target']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
 
+		self.resources['sweep_rate'].cache_policy = cache_policies.until_set
+
 		self.resources['perma_hot'].converter = str_to_bool
 		self.resources['sweep_rate'].units = 'T.s-1'
+		self.resources['output_field'].units = 'T'
 		self.resources['field'].units = 'T'
+		self.resources['ramp_target'].units = 'T'
 
 	@Synchronized()
 	def _connected(self):
@@ -59,6 +71,19 @@ class IPS120_10(AbstractDevice):
 		# Ensure some initial sanity.
 		assert self.device_status.activity == 0, 'Not on hold.'
 
+	@staticmethod
+	def is_query(message):
+		"""
+		Whether the message only reads from the device.
+
+		Commands are not marked with "?"; only the parameter reads, status, and version commands leave the device as it
+		was.
+		"""
+
+		message = message.strip()
+
+		return bool(message) and message[0] in ['R', 'X', 'V']
+
 	def write(self, message):
 		"""
 		Append the "\r" that the device requires.
@@ -180,6 +205,27 @@ class IPS120_10(AbstractDevice):
 	def set_point(self, value):
 		self.write('$J{0}'.format(value))
 
+	@property
+	def ramping(self):
+		"""
+		Whether the output is still changing.
+		"""
+
+		return self.device_status.mode_sweep != 0
+
+	def verify_status(self, status):
+		assert status.system_status == 0, 'System status: {0}'.format(status.system_status)
+		assert status.limits == 0, 'Limits: {0}'.format(status.limits)
+
+	def warm_up(self):
+		"""
+		Ensure that the heater is on, returning to the persistent field first if it is not.
+		"""
+
+		if not self.heater_on:
+			self.set_field(self.persistent_field)
+			self.heater_on = True
+
 	@property
 	def field(self):
 		"""
@@ -221,15 +267,14 @@ class IPS120_10(AbstractDevice):
 	@Synchronized()
 	def field(self, value):
 		status = self.device_status
-		assert status.system_status == 0, 'System status: {0}'.format(status.system_status)
-		assert status.limits == 0, 'Limits: {0}'.format(status.limits)
+		self.verify_status(status)
 		assert status.mode_sweep == 0, 'Mode sweep: {0}'.format(status.mode_sweep)
-		assert self.activity == 'hold', 'Activity: {0}'.format(self.activity)
+		# A finished ramp is left at its target.
+		activity = self.activities[status.activity]
+		assert activity in ['hold', 'to_set'], 'Activity: {0}'.format(activity)
 
 		# Return to the last field.
-		if not self.heater_on:
-			self.set_field(self.persistent_field)
-			self.heater_on = True
+		self.warm_up()
 
 		# Change to the new field.
 		self.set_field(value)
@@ -237,6 +282,30 @@ class IPS120_10(AbstractDevice):
 		if not self.perma_hot:
 			self.heater_on = False
 
+	@property
+	def ramp_target(self):
+		"""
+		The field towards which the output is ramping, as a quantity in T.
+		"""
+
+		return self.set_point
+
+	@ramp_target.setter
+	@Synchronized()
+	def ramp_target(self, value):
+		"""
+		Start ramping towards the value at the sweep rate, without waiting for it to be reached.
+
+		The target may be changed while ramping. The heater is left on.
+		"""
+
+		self.verify_status(self.device_status)
+
+		self.warm_up()
+
+		self.set_point = value
+		self.activity = 'to_set'
+
 	@property
 	def idn(self):
 		"""
@@ -1,3 +1,5 @@
+from time import time
+
 from ...mock.mock_abstract_device import MockAbstractDevice
 from ..ips120_10 import IPS120_10
 
@@ -9,6 +11,8 @@ Mock Sample IPS120_10
 class MockIPS120_10(MockAbstractDevice, IPS120_10):
 	"""
 	Mock interface for the Sample IPS120_10.
+
+	The output field moves towards the set point at the sweep rate in real time.
 	"""
 
 	def __init__(self, *args, **kwargs):
@@ -21,7 +25,8 @@ class MockIPS120_10(MockAbstractDevice, IPS120_10):
 	def _reset(self):
 		self.mock_state['heater_on'] = False
 		self.mock_state['activity'] = 4
-		self.mock_state['mode'] = 0
+		# (start time, start field) of the current ramp.
+		self.mock_state['ramp'] = None
 
 		self.mock_state['output_field'] = 0.0
 		self.mock_state['set_point'] = 0.0
@@ -40,18 +45,41 @@ class MockIPS120_10(MockAbstractDevice, IPS120_10):
 
 		return (cmd, args, query)
 
+	def update_ramp(self, restart=False):
+		"""
+		Move the output field along the current ramp, and possibly start a new one from there.
+		"""
+
+		if self.mock_state['ramp'] is not None:
+			start_time, start_field = self.mock_state['ramp']
+			distance = self.mock_state['set_point'] - start_field
+			# The sweep rate is in T/min.
+			travelled = self.mock_state['sweep_rate'] / 60 * (time() - start_time)
+
+			if travelled >= abs(distance):
+				self.mock_state['output_field'] = self.mock_state['set_point']
+				self.mock_state['ramp'] = None
+			else:
+				self.mock_state['output_field'] = start_field + (travelled if distance > 0 else -travelled)
+
+		if restart:
+			if self.mock_state['activity'] == 1 and self.mock_state['output_field'] != self.mock_state['set_point']:
+				self.mock_state['ramp'] = (time(), self.mock_state['output_field'])
+			else:
+				self.mock_state['ramp'] = None
+
 	def write(self, message, result=None, done=False):
 		if not done:
 			cmd, args, query = self._split_message(message)
 
+			self.update_ramp()
+
 			if cmd in ['C', 'M', 'Q']:
 				done = True
 			elif cmd == 'A' and not query:
 				self.mock_state['activity'] = int(args)
-				if self.mock_state['activity'] == 0:
-					done = True
-				elif self.mock_state['activity'] == 1:
-					self.mock_state['output_field'] = self.mock_state['set_point']
+				if self.mock_state['activity'] in [0, 1]:
+					self.update_ramp(restart=True)
 					done = True
 			elif cmd == 'H' and not query:
 				self.mock_state['heater_on'] = (args == '1')
@@ -60,6 +88,7 @@ class MockIPS120_10(MockAbstractDevice, IPS120_10):
 				done = True
 			elif cmd == 'J' and not query:
 				self.mock_state['set_point'] = float(args)
+				self.update_ramp(restart=True)
 				done = True
 			elif cmd == 'R':
 				if query:
@@ -75,12 +104,13 @@ class MockIPS120_10(MockAbstractDevice, IPS120_10):
 				done = True
 			elif cmd == 'T' and not query:
 				self.mock_state['sweep_rate'] = float(args)
+				self.update_ramp(restart=True)
 				done = True
 			elif cmd == 'X':
 				if query:
 					# 9 is used for the don't-cares
 					result = 'X00A{0}C9H{1}M9{2}'.format(self.mock_state['activity'],
-							str(int(self.mock_state['heater_on'])), self.mock_state['mode'])
+							str(int(self.mock_state['heater_on'])), int(self.mock_state['ramp'] is not None))
 				done = True
 
 
@@ -1,5 +1,5 @@
 from nose.tools import eq_
-from time import time
+from time import sleep, time
 from unittest import main
 
 from spacq.interface.units import Quantity
@@ -81,6 +81,78 @@ class IPS120_10Test(DeviceServerTestCase):
 		expected_time = 60 * abs(field3 - field2).value / 0.5
 		assert elapsed_time >= expected_time, 'Took {0} s, expected at least {1} s.'.format(elapsed_time, expected_time)
 
+	def testCache(self):
+		"""
+		The sweep rate is only asked for again after a write.
+		"""
+
+		ips = self.obtain_device()
+
+		asked = []
+		ask = ips.ask
+		def counting_ask(message):
+			asked.append(message)
+			return ask(message)
+		ips.ask = counting_ask
+
+		try:
+			rate = Quantity(0.2 / 60, 'T.s-1')
+			ips.resources['sweep_rate'].value = rate
+
+			for _ in xrange(3):
+				eq_(ips.resources['sweep_rate'].value, rate)
+			eq_(asked.count('R9'), 1)
+
+			# Reading the status does not invalidate the cached value.
+			ips.device_status
+			eq_(ips.resources['sweep_rate'].value, rate)
+			eq_(asked.count('R9'), 1)
+
+			# Any other command does.
+			ips.activity = 'hold'
+			eq_(ips.resources['sweep_rate'].value, rate)
+			eq_(asked.count('R9'), 2)
+		finally:
+			del ips.ask
+
+	def testRamp(self):
+		"""
+		Measure the field while it ramps.
+		"""
+
+		ips = self.obtain_device()
+		ips.perma_hot = True
+
+		ips.field = Quantity(0.0, 'T')
+		assert ips.heater_on
+
+		ips.sweep_rate = Quantity(0.6 / 60, 'T.s-1')
+
+		target = Quantity(0.01, 'T')
+
+		start_time = time()
+		ips.ramp_target = target
+		assert time() - start_time < 0.5, 'Took {0} s to start ramping.'.format(time() - start_time)
+
+		eq_(ips.ramp_target, target)
+
+		fields = []
+		while ips.ramping:
+			fields.append(ips.resources['output_field'].value.value)
+			sleep(0.1)
+		elapsed_time = time() - start_time
+
+		assert len(fields) > 2
+		eq_(fields, sorted(fields))
+		assert 0 <= fields[0] < fields[-1] < target.value
+		assert elapsed_time >= 1.0, 'Took {0} s, expected at least 1 s.'.format(elapsed_time)
+
+		eq_(ips.output_field, target)
+
+		# Stepping continues from where the ramp ended.
+		ips.field = Quantity(0.0, 'T')
+		eq_(ips.field, Quantity(0.0, 'T'))
+
 
 if __name__ == '__main__':
 	main()
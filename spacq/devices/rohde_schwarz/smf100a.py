@@ -1,7 +1,7 @@
 import logging
 log = logging.getLogger(__name__)
 
-from spacq.interface.resources import Resource
+from spacq.interface.resources import cache_policies, Resource
 from spacq.tool.box import Synchronized
 
 from ..abstract_device import AbstractDevice
@@ -30,6 +30,7 @@ class SMF100A(AbstractDevice):
 		read_write = ['enabled', 'power', 'frequency']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
+			self.resources[name].cache_policy = cache_policies.until_set
 
 		self.resources['enabled'].converter = str_to_bool
 		self.resources['power'].units = 'V'
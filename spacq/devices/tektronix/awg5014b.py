@@ -3,7 +3,7 @@ log = logging.getLogger(__name__)
 
 import struct
 
-from spacq.interface.resources import Resource
+from spacq.interface.resources import cache_policies, Resource
 from spacq.interface.units import Quantity
 from spacq.tool.box import Synchronized
 
@@ -29,6 +29,7 @@ class Marker(AbstractSubdevice):
 		read_write = ['delay', 'high', 'low']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
+			self.resources[name].cache_policy = cache_policies.until_set
 
 		self.resources['delay'].units = 's'
 		self.resources['high'].units = 'V'
@@ -105,6 +106,7 @@ class Channel(AbstractSubdevice):
 		read_write = ['waveform_name', 'enabled', 'amplitude']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
+			self.resources[name].cache_policy = cache_policies.until_set
 
 		self.resources['enabled'].converter = str_to_bool
 		self.resources['amplitude'].units = 'V'
@@ -214,6 +216,8 @@ class AWG5014B(AbstractDevice):
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
 
+		self.resources['sampling_rate'].cache_policy = cache_policies.until_set
+		self.resources['run_mode'].cache_policy = cache_policies.until_set
 		self.resources['sampling_rate'].units = 'Hz'
 		self.resources['run_mode'].allowed_values = self.allowed_run_modes
 		self.resources['enabled'].converter = str_to_bool
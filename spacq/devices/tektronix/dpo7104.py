@@ -5,7 +5,7 @@ from math import ceil
 from numpy import linspace
 import struct
 
-from spacq.interface.resources import Resource
+from spacq.interface.resources import cache_policies, Resource
 from spacq.tool.box import Synchronized
 
 from ..abstract_device import AbstractDevice, AbstractSubdevice
@@ -31,13 +31,16 @@ class Channel(AbstractSubdevice):
 		for name in read_only:
 			self.resources[name] = Resource(self, name)
 
-		read_write = ['enabled']
+		read_write = ['enabled', 'scale', 'offset']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
+			self.resources[name].cache_policy = cache_policies.until_set
 
 		self.resources['waveform'].slow = True
 		self.resources['waveform'].display_units = 'V'
 		self.resources['enabled'].converter = str_to_bool
+		self.resources['scale'].units = 'V'
+		self.resources['offset'].units = 'V'
 
 	def __init__(self, device, channel, *args, **kwargs):
 		self.channel = channel
@@ -188,6 +191,7 @@ class DPO7104(AbstractDevice):
 		read_write = ['sample_rate', 'time_scale']
 		for name in read_write:
 			self.resources[name] = Resource(self, name, name)
+			self.resources[name].cache_policy = cache_policies.until_set
 
 		self.resources['sample_rate'].units = 'Hz'
 		self.resources['time_scale'].units = 's'
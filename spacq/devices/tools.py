@@ -39,10 +39,13 @@ def quantity_unwrapped(units, multiplier=1.0):
 	A decorator for setters to extract the plain device value from the quantity.
 	"""
 
+	# Determine the dimensions only once.
+	dimensions = Quantity(1, units).dimensions
+
 	def wrap(f):
 		@wraps(f)
 		def wrapped(self, value):
-			value.assert_dimensions(units)
+			value.assert_dimensions(dimensions)
 
 			return f(self, value.value * multiplier)
 
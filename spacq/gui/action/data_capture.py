@@ -1,6 +1,5 @@
 import csv
 from datetime import timedelta
-from functools import partial
 import os
 from pubsub import pub
 from threading import Lock, Thread
@@ -9,11 +8,13 @@ import wx
 from wx.lib.filebrowsebutton import DirBrowseButton
 
 from spacq.interface.pulse.parser import PulseError
-from spacq.iteration.sweep import PulseConfiguration, SweepController
+from spacq.iteration.adaptive import AdaptivePlan
+from spacq.iteration.runner import export_header, export_row
+from spacq.iteration.sweep import Checkpoint, PulseConfiguration, SweepController
 from spacq.iteration.variables import sort_variables, InputVariable, OutputVariable
-from spacq.tool.box import flatten, sift
+from spacq.tool.box import flatten, sift, Coalescer
 
-from ..tool.box import Dialog, MessageDialog, YesNoQuestionDialog
+from ..tool.box import determine_wildcard, Dialog, MessageDialog, YesNoQuestionDialog
 
 
 class DataCaptureDialog(Dialog, SweepController):
@@ -40,13 +41,13 @@ class DataCaptureDialog(Dialog, SweepController):
 	}
 
 	def __init__(self, parent, resources, variables, num_items, measurement_resources,
-			measurement_variables, pulse_config, continuous=False,
+			measurement_variables, pulse_config, continuous=False, plan=None,
 			*args, **kwargs):
 		kwargs['style'] = kwargs.get('style', wx.DEFAULT_DIALOG_STYLE) | wx.RESIZE_BORDER
 
 		Dialog.__init__(self, parent, title='Sweeping...', *args, **kwargs)
 		SweepController.__init__(self, resources, variables, num_items, measurement_resources,
-				measurement_variables, pulse_config, continuous=continuous)
+				measurement_variables, pulse_config, continuous=continuous, plan=plan)
 
 		self.parent = parent
 
@@ -61,16 +62,29 @@ class DataCaptureDialog(Dialog, SweepController):
 
 		self.cancelling = False
 
+		# Values to show and data to publish, handled together on every timer event.
+		self.updates = Coalescer()
+
 		def write_callback(pos, i, value):
-			self.value_outputs[pos][i].Value = str(value)[:self.max_value_len]
-		self.write_callback = partial(wx.CallAfter, write_callback)
+			self.updates.set((pos, i), value)
+		self.write_callback = write_callback
 
 		def read_callback(i, value):
-			self.value_inputs[i].Value = str(value)[:self.max_value_len]
-		self.read_callback = partial(wx.CallAfter, read_callback)
+			self.updates.set(i, value)
+		self.read_callback = read_callback
+
+		# Recorded as they happen, since the dialogs are only shown later.
+		self.errors = []
 
-		self.general_exception_handler = partial(wx.CallAfter, self._general_exception_handler)
-		self.resource_exception_handler = partial(wx.CallAfter, self._resource_exception_handler)
+		def general_exception_handler(f, e):
+			self.errors.append(str(e))
+			wx.CallAfter(self._general_exception_handler, f, e)
+		self.general_exception_handler = general_exception_handler
+
+		def resource_exception_handler(resource_name, e, write=True):
+			self.errors.append(str(e))
+			wx.CallAfter(self._resource_exception_handler, resource_name, e, write)
+		self.resource_exception_handler = resource_exception_handler
 
 		# Dialog.
 		dialog_box = wx.BoxSizer(wx.VERTICAL)
@@ -211,6 +225,35 @@ class DataCaptureDialog(Dialog, SweepController):
 		wx.CallAfter(self.timer.Stop)
 		wx.CallAfter(self.Destroy)
 
+	def add_data(self, name, value, indices=None):
+		"""
+		Queue a measured value to be published with the next batch, along with the indices of the sweep at which it was
+		measured.
+		"""
+
+		self.updates.append(name, (time(), value, indices))
+
+	def flush_updates(self):
+		"""
+		Show the latest values, and publish the data measured since the last flush.
+		"""
+
+		fields, series = self.updates.flush()
+
+		for k, value in fields.items():
+			if isinstance(k, tuple):
+				pos, i = k
+				self.value_outputs[pos][i].Value = str(value)[:self.max_value_len]
+			else:
+				self.value_inputs[k].Value = str(value)[:self.max_value_len]
+
+		for name, points in series.items():
+			times, values, indices = zip(*points)
+			pub.sendMessage('data_capture.data', name=name, values=list(values), times=list(times))
+
+			if indices[0] is not None:
+				pub.sendMessage('data_capture.points', name=name, indices=list(indices), values=list(values))
+
 	def OnCancel(self, evt=None):
 		if not self.cancel_button.Enabled:
 			return
@@ -219,6 +262,8 @@ class DataCaptureDialog(Dialog, SweepController):
 		self.cancelling = True
 
 	def OnTimer(self, evt=None):
+		self.flush_updates()
+
 		self.status_message_output.Value = self.status_messages[self.current_f]
 		if self.continuous:
 			self.last_continuous = self.last_continuous_input.Value
@@ -295,10 +340,29 @@ class DataCapturePanel(wx.Panel):
 		self.Bind(wx.EVT_BUTTON, self.OnBeginCapture, self.start_button)
 		capture_box.Add(self.start_button, flag=wx.CENTER)
 
+		### Resume.
+		self.resume_button = wx.Button(self, label='Resume...')
+		self.Bind(wx.EVT_BUTTON, self.OnResumeCapture, self.resume_button)
+		capture_box.Add(self.resume_button, flag=wx.CENTER)
+
 		### Continuous.
 		self.continuous_checkbox = wx.CheckBox(self, label='Continuous')
 		capture_box.Add(self.continuous_checkbox, flag=wx.CENTER)
 
+		## Adaptive.
+		adaptive_static_box = wx.StaticBox(self, label='Adaptive')
+		adaptive_box = wx.StaticBoxSizer(adaptive_static_box, wx.VERTICAL)
+		panel_box.Add(adaptive_box, flag=wx.CENTER|wx.ALL, border=5)
+
+		### Enabled.
+		self.adaptive_checkbox = wx.CheckBox(self, label='Refine')
+		adaptive_box.Add(self.adaptive_checkbox, flag=wx.CENTER)
+
+		### Points.
+		adaptive_box.Add(wx.StaticText(self, label='Points:'), flag=wx.CENTER)
+		self.adaptive_points_input = wx.SpinCtrl(self, min=1, initial=1000, max=1e9)
+		adaptive_box.Add(self.adaptive_points_input, flag=wx.CENTER)
+
 		## Export.
 		export_static_box = wx.StaticBox(self, label='Export')
 		export_box = wx.StaticBoxSizer(export_static_box, wx.HORIZONTAL)
@@ -329,16 +393,30 @@ class DataCapturePanel(wx.Panel):
 
 		self.SetSizer(panel_box)
 
-	def OnBeginCapture(self, evt=None):
+	def capture(self, checkpoint_path=None):
+		"""
+		Start a sweep, or resume one from a checkpoint next to an existing export file.
+		"""
+
 		# Prevent accidental double-clicking.
 		self.start_button.Disable()
+		self.resume_button.Disable()
 		def enable_button():
 			sleep(1)
 			wx.CallAfter(self.start_button.Enable)
+			wx.CallAfter(self.resume_button.Enable)
 		thr = Thread(target=enable_button)
 		thr.daemon = True
 		thr.start()
 
+		checkpoint = None
+		if checkpoint_path is not None:
+			try:
+				checkpoint = Checkpoint.load(checkpoint_path)
+			except (IOError, ValueError) as e:
+				MessageDialog(self, str(e), 'Invalid checkpoint').Show()
+				return
+
 		all_variables = [var for var in self.global_store.variables.values() if var.enabled]
 		output_variables = sift(all_variables, OutputVariable)
 		input_variables = [var for var in sift(all_variables, InputVariable) if var.resource_name != '']
@@ -353,6 +431,20 @@ class DataCapturePanel(wx.Panel):
 
 		continuous = self.continuous_checkbox.Value
 
+		plan = None
+		if self.adaptive_checkbox.Value:
+			if checkpoint is not None:
+				MessageDialog(self, 'Adaptive sweeps cannot be resumed.', 'Invalid checkpoint').Show()
+				return
+
+			if not input_variables:
+				MessageDialog(self, 'Adaptive sweeps require a measurement.', 'No measurements').Show()
+				return
+
+			plan = AdaptivePlan([min(len(var) for var in group) for group in output_variables],
+					self.adaptive_points_input.Value)
+			num_items = plan.max_points
+
 		missing_resources = set()
 		unreadable_resources = set()
 		unwritable_resources = set()
@@ -471,7 +563,19 @@ class DataCapturePanel(wx.Panel):
 			return
 
 		exporting = False
-		if self.export_enabled.Value:
+		if checkpoint is not None:
+			file_path = checkpoint_path[:-len(Checkpoint.extension)]
+			if not os.path.isfile(file_path):
+				MessageDialog(self, file_path, 'Missing export file').Show()
+				return
+
+			# Continue after the existing data.
+			export_file = open(file_path, 'a')
+			export_csv = csv.writer(export_file)
+			exporting = True
+
+			self.last_file_name.Value = file_path
+		elif self.export_enabled.Value:
 			dir = self.directory_browse_button.GetValue()
 			# YYYY-MM-DD_HH-MM-SS.csv
 			name = '{0:04}-{1:02}-{2:02}_{3:02}-{4:02}-{5:02}.csv'.format(*localtime())
@@ -498,18 +602,30 @@ class DataCapturePanel(wx.Panel):
 			self.last_file_name.Value = file_path
 
 			# Write the header.
-			export_csv.writerow(['Time (s)'] +
-					['{0.name} ({0.units})'.format(var) if var.units is not None else var.name
-							for var in flatten(output_variables)] +
-					['{0.name} ({1})'.format(var, units) if units is not None else var.name
-						for var, units in zip(input_variables, measurement_units)])
-
-		self.capture_dialogs += 1
+			export_csv.writerow(export_header(output_variables, input_variables, measurement_units,
+					plan is not None))
 
 		dlg = DataCaptureDialog(self, resources, output_variables, num_items, measurement_resources,
-				input_variables, pulse_config, continuous=continuous)
+				input_variables, pulse_config, continuous=continuous, plan=plan)
 		dlg.SetMinSize((500, -1))
 
+		if checkpoint is not None:
+			try:
+				dlg.resume(checkpoint)
+			except ValueError as e:
+				dlg.Destroy()
+				export_file.close()
+
+				MessageDialog(self, str(e), 'Invalid checkpoint').Show()
+				return
+
+		if exporting:
+			checkpoint_path = export_file.name + Checkpoint.extension
+
+		self.capture_dialogs += 1
+
+		wx.CallAfter(pub.sendMessage, 'data_capture.sweep', variables=output_variables)
+
 		for name in measurement_resource_names:
 			wx.CallAfter(pub.sendMessage, 'data_capture.start', name=name)
 
@@ -517,6 +633,8 @@ class DataCapturePanel(wx.Panel):
 		max_buf_size = 10
 		buf = []
 		buf_lock = Lock()
+		# The position after the last buffered row.
+		last_checkpoint = [None]
 
 		def flush():
 			export_csv.writerows(buf)
@@ -525,17 +643,24 @@ class DataCapturePanel(wx.Panel):
 			while buf:
 				buf.pop()
 
+			# Only once the data is safely written.
+			if last_checkpoint[0] is not None:
+				os.fsync(export_file.fileno())
+				last_checkpoint[0].save(checkpoint_path)
+				last_checkpoint[0] = None
+
 		def data_callback(cur_time, values, measurement_values):
+			indices = tuple(dlg.current_indices)
 			for name, value in zip(measurement_resource_names, measurement_values):
-				wx.CallAfter(pub.sendMessage, 'data_capture.data', name=name, value=value)
-
-			# Extract values out of quantities, since the units have already been taken care of in the header.
-			values = [x.original_value if hasattr(x, 'original_value') else x for x in values]
-			measurement_values = [x.original_value if hasattr(x, 'original_value') else x for x in measurement_values]
+				dlg.add_data(name, value, indices)
 
 			if exporting:
 				with buf_lock:
-					buf.append([cur_time] + values + measurement_values)
+					if plan is not None:
+						buf.append(export_row(cur_time, values, measurement_values, dlg.current_level))
+					else:
+						buf.append(export_row(cur_time, values, measurement_values))
+						last_checkpoint[0] = dlg.checkpoint()
 
 					if len(buf) >= max_buf_size:
 						flush()
@@ -548,6 +673,14 @@ class DataCapturePanel(wx.Panel):
 					flush()
 					export_file.close()
 
+				# A complete sweep has nothing to resume, but a failed one might.
+				finished = dlg.completed and not dlg.errors and not dlg.aborting
+				if finished and os.path.exists(checkpoint_path):
+					os.remove(checkpoint_path)
+
+			# Publish the last batch before stopping.
+			wx.CallAfter(dlg.flush_updates)
+
 			for name in measurement_resource_names:
 				wx.CallAfter(pub.sendMessage, 'data_capture.stop', name=name)
 
@@ -555,3 +688,13 @@ class DataCapturePanel(wx.Panel):
 		dlg.close_callback = close_callback
 		dlg.Show()
 		dlg.start()
+
+	def OnBeginCapture(self, evt=None):
+		self.capture()
+
+	def OnResumeCapture(self, evt=None):
+		wildcard = determine_wildcard(Checkpoint.extension[1:], 'Sweep checkpoint')
+		dlg = wx.FileDialog(parent=self, message='Resume...', wildcard=wildcard, style=wx.FD_OPEN)
+
+		if dlg.ShowModal() == wx.ID_OK:
+			self.capture(dlg.GetPath())
@@ -2,6 +2,7 @@ from functools import partial
 from threading import Thread
 import wx
 
+from spacq.interface.resources import Ramp
 from spacq.iteration.variables import OutputVariable
 from spacq.tool.box import sift
 
@@ -85,7 +86,7 @@ class SmoothResetPanel(wx.Panel):
 
 		def sweep_all_vars():
 			try:
-				thrs = []
+				ramp = Ramp()
 				for var in vars:
 					resource = self.global_store.resources[var.resource_name]
 
@@ -94,15 +95,10 @@ class SmoothResetPanel(wx.Panel):
 					else:
 						value_from, value_to = var.with_type(var.const), 0
 
-					thr = Thread(target=resource.sweep, args=(value_from, value_to, self.reset_steps_input.Value),
-							kwargs={'exception_callback': partial(wx.CallAfter, exception_callback)})
-					thr.daemon = True
-					thrs.append(thr)
+					ramp.add(resource, value_from, value_to, self.reset_steps_input.Value,
+							partial(wx.CallAfter, exception_callback))
 
-				for thr in thrs:
-					thr.start()
-				for thr in thrs:
-					thr.join()
+				ramp.run()
 			finally:
 				if self:
 					wx.CallAfter(self.to_button.Enable)
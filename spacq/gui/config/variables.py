@@ -2,7 +2,8 @@ import ObjectListView
 import wx
 
 from spacq.interface.units import Quantity
-from spacq.iteration.variables import OutputVariable, LinSpaceConfig, ArbitraryConfig
+from spacq.iteration.variables import (OutputVariable, LinSpaceConfig, LogSpaceConfig, ArbitraryConfig,
+		PiecewiseConfig, SnakeConfig)
 
 from ..tool.box import Dialog, MessageDialog, load_pickled, save_pickled
 
@@ -26,6 +27,8 @@ class VariableColumnDefn(ObjectListView.ColumnDefn):
 
 
 class LinSpaceConfigPanel(wx.Panel):
+	config_type = LinSpaceConfig
+
 	def __init__(self, parent, *args, **kwargs):
 		wx.Panel.__init__(self, parent, *args, **kwargs)
 
@@ -69,13 +72,25 @@ class LinSpaceConfigPanel(wx.Panel):
 		except ValueError:
 			raise ValueError('Invalid final value.')
 
-		return LinSpaceConfig(initial, final, self.steps_input.Value)
+		return self.config_type(initial, final, self.steps_input.Value)
 
 	def SetValue(self, config):
 		self.initial_input.Value, self.final_input.Value, self.steps_input.Value = (str(config.initial),
 				str(config.final), config.steps)
 
 
+class LogSpaceConfigPanel(LinSpaceConfigPanel):
+	config_type = LogSpaceConfig
+
+	def GetValue(self):
+		result = LinSpaceConfigPanel.GetValue(self)
+
+		# Ensure the bounds can be spaced.
+		result[0]
+
+		return result
+
+
 class ArbitraryConfigPanel(wx.Panel):
 	def __init__(self, parent, *args, **kwargs):
 		wx.Panel.__init__(self, parent, *args, **kwargs)
@@ -111,6 +126,50 @@ class ArbitraryConfigPanel(wx.Panel):
 		self.values_input.Value = ', '.join('{0:n}'.format(x) for x in config.values)
 
 
+class PiecewiseConfigPanel(wx.Panel):
+	def __init__(self, parent, *args, **kwargs):
+		wx.Panel.__init__(self, parent, *args, **kwargs)
+
+		# Panel.
+		panel_box = wx.BoxSizer(wx.VERTICAL)
+
+		## Config.
+		config_sizer = wx.FlexGridSizer(rows=2, cols=2)
+		config_sizer.AddGrowableCol(1, 1)
+		panel_box.Add(config_sizer, proportion=1, flag=wx.EXPAND)
+
+		### Points.
+		config_sizer.Add(wx.StaticText(self, label='Points:'),
+				flag=wx.ALIGN_CENTER_VERTICAL|wx.ALIGN_RIGHT|wx.ALL, border=5)
+		self.points_input = wx.TextCtrl(self)
+		config_sizer.Add(self.points_input, flag=wx.EXPAND|wx.ALL, border=5)
+
+		### Steps.
+		config_sizer.Add(wx.StaticText(self, label='Steps per segment:'),
+				flag=wx.ALIGN_CENTER_VERTICAL|wx.ALIGN_RIGHT|wx.ALL, border=5)
+		self.steps_input = wx.SpinCtrl(self, min=2, initial=2, max=1e9)
+		config_sizer.Add(self.steps_input, flag=wx.EXPAND|wx.ALL, border=5)
+
+		self.SetSizerAndFit(panel_box)
+
+	def GetValue(self):
+		raw_points = self.points_input.Value.split(',')
+
+		# Ensure the values are sane.
+		try:
+			points = [float(x) for x in raw_points]
+		except ValueError as e:
+			raise ValueError('Invalid point: {0}'.format(str(e)))
+
+		return PiecewiseConfig.through(points, self.steps_input.Value)
+
+	def SetValue(self, config):
+		points = [config.segments[0].initial] + [segment.final for segment in config.segments]
+
+		self.points_input.Value = ', '.join('{0:n}'.format(x) for x in points)
+		self.steps_input.Value = config.segments[0].steps
+
+
 class VariableEditor(Dialog):
 	def __init__(self, parent, ok_callback, *args, **kwargs):
 		kwargs['style'] = kwargs.get('style', wx.DEFAULT_DIALOG_STYLE) | wx.RESIZE_BORDER
@@ -133,11 +192,33 @@ class VariableEditor(Dialog):
 		self.config_panel_types.append(LinSpaceConfig)
 		self.config_notebook.AddPage(linspace_config_panel, 'Linear')
 
+		### Logarithmic.
+		logspace_config_panel = LogSpaceConfigPanel(self.config_notebook)
+		self.config_panel_types.append(LogSpaceConfig)
+		self.config_notebook.AddPage(logspace_config_panel, 'Logarithmic')
+
 		### Arbitrary.
 		arbitrary_config_panel = ArbitraryConfigPanel(self.config_notebook)
 		self.config_panel_types.append(ArbitraryConfig)
 		self.config_notebook.AddPage(arbitrary_config_panel, 'Arbitrary')
 
+		### Piecewise.
+		piecewise_config_panel = PiecewiseConfigPanel(self.config_notebook)
+		self.config_panel_types.append(PiecewiseConfig)
+		self.config_notebook.AddPage(piecewise_config_panel, 'Piecewise')
+
+		## Passes.
+		passes_box = wx.BoxSizer(wx.HORIZONTAL)
+		dialog_box.Add(passes_box, flag=wx.CENTER|wx.ALL, border=5)
+
+		passes_box.Add(wx.StaticText(self, label='Passes (back and forth):'), flag=wx.CENTER)
+
+		self.passes_input = wx.SpinCtrl(self, min=1, initial=1)
+		passes_box.Add(self.passes_input, flag=wx.CENTER|wx.ALL, border=5)
+
+		self.snake_checkbox = wx.CheckBox(self, label='Snake order')
+		passes_box.Add(self.snake_checkbox, flag=wx.CENTER|wx.ALL, border=5)
+
 		## Smooth set.
 		smooth_static_box = wx.StaticBox(self, label='Smooth set')
 		smooth_box = wx.StaticBoxSizer(smooth_static_box, wx.HORIZONTAL)
@@ -206,11 +287,21 @@ class VariableEditor(Dialog):
 			# Ensure that the units are valid.
 			Quantity(1, units)
 
-		return (self.config_notebook.CurrentPage.GetValue(), self.smooth_steps_input.Value,
+		config = self.config_notebook.CurrentPage.GetValue()
+		if self.passes_input.Value > 1:
+			config = SnakeConfig(config, self.passes_input.Value)
+
+		return (config, self.smooth_steps_input.Value,
 				self.smooth_from_checkbox.Value, self.smooth_to_checkbox.Value,
-				self.smooth_transition_checkbox.Value, type, units)
+				self.smooth_transition_checkbox.Value, self.snake_checkbox.Value, type, units)
+
+	def SetValue(self, config, smooth_steps, smooth_from, smooth_to, smooth_transition, snake, type, units):
+		if isinstance(config, SnakeConfig):
+			self.passes_input.Value = config.passes
+			config = config.config
+		else:
+			self.passes_input.Value = 1
 
-	def SetValue(self, config, smooth_steps, smooth_from, smooth_to, smooth_transition, type, units):
 		config_type = self.config_panel_types.index(config.__class__)
 		self.config_notebook.ChangeSelection(config_type)
 		self.config_notebook.CurrentPage.SetValue(config)
@@ -218,6 +309,7 @@ class VariableEditor(Dialog):
 		(self.smooth_steps_input.Value, self.smooth_from_checkbox.Value,
 				self.smooth_to_checkbox.Value,
 				self.smooth_transition_checkbox.Value) = smooth_steps, smooth_from, smooth_to, smooth_transition
+		self.snake_checkbox.Value = snake
 
 		if type == 'float':
 			self.type_float.Value = True
@@ -323,13 +415,13 @@ class VariablesPanel(wx.Panel):
 					return False
 
 				(var.config, var.smooth_steps, var.smooth_from, var.smooth_to,
-						var.smooth_transition, var.type, var.units) = values
+						var.smooth_transition, var.snake, var.type, var.units) = values
 
 				return True
 
 			dlg = VariableEditor(self, ok_callback, title=var.name)
 			dlg.SetValue(var.config, var.smooth_steps, var.smooth_from, var.smooth_to, var.smooth_transition,
-					var.type, var.units)
+					var.snake, var.type, var.units)
 			dlg.Show()
 
 			# No need to use the default editor.
@@ -1,6 +1,7 @@
 from chaco.api import ArrayPlotData, ColorBar, HPlotContainer, jet, LinearMapper
 from chaco.tools.api import RangeSelection, RangeSelectionOverlay
 from enable.api import Window
+from numpy import linspace
 
 from .common.chaco_plot import ChacoPlot
 
@@ -20,6 +21,9 @@ class ColormappedPlot(ChacoPlot):
 		self.data = ArrayPlotData()
 		self.data.set_data('color', [[0]])
 
+		self.pyramid = None
+		self.updating_tile = False
+
 		ChacoPlot.__init__(self, self.data, *args, **kwargs)
 
 		self.img_plot('color', colormap=jet, xbounds=x_bounds, ybounds=y_bounds)
@@ -75,6 +79,65 @@ class ColormappedPlot(ChacoPlot):
 	def color_data(self, values):
 		self.data.set_data('color', values)
 
+	def show_grid(self, values, x_bounds, y_bounds):
+		"""
+		Show a copy of an array of values, regions of which can later be replaced with update_region.
+		"""
+
+		self.color_data = values.copy()
+		self.plot_obj.index.set_data(linspace(x_bounds[0], x_bounds[1], values.shape[1] + 1),
+				linspace(y_bounds[0], y_bounds[1], values.shape[0] + 1))
+
+	def update_region(self, rows, cols, values):
+		"""
+		Replace only the cells in the given slices, without handing the plot a new array.
+		"""
+
+		self.color_data[rows, cols] = values
+		self.plot_obj.value.data_changed = True
+
+	def set_pyramid(self, pyramid):
+		"""
+		Show the mesh of a MeshPyramid, at the resolution which suits the visible region.
+		"""
+
+		self.pyramid = pyramid
+
+		# The colors must not change with the visible cells.
+		self.low_setting, self.high_setting = pyramid.z_bounds
+
+		self.on_trait_change(self.update_tile, 'range2d.updated')
+		self.on_trait_change(self.update_tile, 'bounds')
+
+		self.update_tile()
+
+	def update_tile(self):
+		"""
+		Show only the cells which can be seen at the current range and size.
+		"""
+
+		if self.pyramid is None or self.updating_tile:
+			return
+
+		self.updating_tile = True
+		try:
+			ranges = []
+			for x_range in [self.range2d.x_range, self.range2d.y_range]:
+				# An automatic range follows the data, so all of it must be considered.
+				if x_range.low_setting == 'auto' or x_range.high_setting == 'auto':
+					ranges.append(None)
+				else:
+					ranges.append((x_range.low, x_range.high))
+
+			values, x_bounds, y_bounds = self.pyramid.get(ranges[0], ranges[1],
+					(max(int(self.height), 100), max(int(self.width), 100)))
+
+			self.color_data = values
+			self.plot_obj.index.set_data(linspace(x_bounds[0], x_bounds[1], values.shape[1] + 1),
+					linspace(y_bounds[0], y_bounds[1], values.shape[0] + 1))
+		finally:
+			self.updating_tile = False
+
 	@property
 	def low_setting(self):
 		"""
@@ -201,32 +201,41 @@ class ListLiveViewPanel(wx.Panel):
 		Update the plot with a new list of values.
 		"""
 
-		if not self.plot_settings.enabled:
-			return
-
-		# Extract the times and the data values.
-		times, values = zip(*values)
-		time_range = min(times), max(times)
+		self.add_lines([values])
 
-		# Sanity check, since the new values must match existing ones.
-		if self._lines is not None:
-			if len(self._lines[-1]) != len(values):
-				log.warning('Data length mismatch: was {0}, became {1}'.format(len(self._lines[-1]), len(values)))
-				self.init_values()
-			elif self.time_range != time_range:
-				log.warning('Time range mismatch: was {0}, became {1}'.format(self.time_range, time_range))
-				self.init_values()
+	def add_lines(self, lines):
+		"""
+		Update the plot with several new lists of values at once.
+		"""
 
-		# Update values.
-		if self._lines is None:
-			self._lines = numpy.array([values])
-			self.time_range = time_range
-		else:
-			self._lines = numpy.append(self._lines, [values], 0)
+		if not self.plot_settings.enabled:
+			return
 
-		cut_idx = len(self._lines) - self.plot_settings.num_lines
-		if cut_idx > 0:
-			self._lines = self._lines[cut_idx:]
+		# Any older lines would be cut anyway.
+		for values in lines[-self.plot_settings.num_lines:]:
+			# Extract the times and the data values.
+			times, values = zip(*values)
+			time_range = min(times), max(times)
+
+			# Sanity check, since the new values must match existing ones.
+			if self._lines is not None:
+				if len(self._lines[-1]) != len(values):
+					log.warning('Data length mismatch: was {0}, became {1}'.format(len(self._lines[-1]), len(values)))
+					self.init_values()
+				elif self.time_range != time_range:
+					log.warning('Time range mismatch: was {0}, became {1}'.format(self.time_range, time_range))
+					self.init_values()
+
+			# Update values.
+			if self._lines is None:
+				self._lines = numpy.array([values])
+				self.time_range = time_range
+			else:
+				self._lines = numpy.append(self._lines, [values], 0)
+
+			cut_idx = len(self._lines) - self.plot_settings.num_lines
+			if cut_idx > 0:
+				self._lines = self._lines[cut_idx:]
 
 		# Plot.
 		self.update_plot()
@@ -262,10 +271,10 @@ class ListLiveViewPanel(wx.Panel):
 			if self.enabled:
 				self.capturing_data = True
 
-	def msg_data_capture_data(self, name, value):
+	def msg_data_capture_data(self, name, values, times):
 		if name == self.measurement_resource_name:
 			if self.capturing_data:
-				self.add_values(value)
+				self.add_lines(values)
 
 	def msg_data_capture_stop(self, name):
 		if name == self.measurement_resource_name:
@@ -0,0 +1,180 @@
+import logging
+log = logging.getLogger(__name__)
+
+from pubsub import pub
+import wx
+
+from spacq.iteration.grid import SweepGrid
+
+from ....config.measurement import MeasurementConfigPanel
+from ....tool.box import MessageDialog
+
+try:
+	from ..colormapped import ColormappedPlot
+except ImportError as e:
+	plot_available = False
+	log.debug('Could not import ColormappedPlot: {0}'.format(str(e)))
+else:
+	plot_available = True
+
+"""
+A live view of a scalar resource, mapped over the two innermost orders of a sweep as it runs.
+"""
+
+
+class MapLiveViewPanel(wx.Panel):
+	"""
+	A panel to display the values of a scalar resource measured during a sweep on a colormapped grid.
+
+	The grid is allocated when the sweep starts; measured points are written into it as they arrive, and only the cells
+	which have changed are redrawn, at most every update_delay ms.
+	"""
+
+	# Time between redraws, in ms.
+	update_delay = 500
+
+	def __init__(self, parent, global_store, *args, **kwargs):
+		wx.Panel.__init__(self, parent, *args, **kwargs)
+
+		self.global_store = global_store
+		self._measurement_resource_name = None
+
+		self.enabled = False
+		self.capturing_data = False
+
+		# The grid of the next sweep, and of the current one.
+		self.sweep_grid = None
+		self.grid = None
+
+		# Panel.
+		panel_box = wx.BoxSizer(wx.VERTICAL)
+
+		## Plot.
+		if plot_available:
+			self.plot = ColormappedPlot(self, (0, 1), (0, 1))
+			panel_box.Add(self.plot.control, proportion=1, flag=wx.EXPAND)
+		else:
+			panel_box.Add((500, -1), proportion=1, flag=wx.EXPAND)
+
+		self.SetSizer(panel_box)
+
+		self.timer = wx.Timer(self)
+		self.Bind(wx.EVT_TIMER, self.OnTimer, self.timer)
+
+		# Subscriptions.
+		pub.subscribe(self.msg_data_capture_sweep, 'data_capture.sweep')
+		pub.subscribe(self.msg_data_capture_start, 'data_capture.start')
+		pub.subscribe(self.msg_data_capture_points, 'data_capture.points')
+		pub.subscribe(self.msg_data_capture_stop, 'data_capture.stop')
+
+	@property
+	def measurement_resource_name(self):
+		if self._measurement_resource_name is None:
+			return ''
+		else:
+			return self._measurement_resource_name
+
+	@measurement_resource_name.setter
+	def measurement_resource_name(self, value):
+		self._measurement_resource_name = value or None
+
+	def update_plot(self):
+		"""
+		Redraw the cells which have changed.
+		"""
+
+		if self.grid is None:
+			return
+
+		region = self.grid.take_dirty()
+		if region is None:
+			return
+
+		rows, cols = region
+		self.plot.update_region(rows, cols, self.grid.values[rows, cols])
+
+	def close(self):
+		"""
+		Perform cleanup.
+		"""
+
+		self.timer.Stop()
+
+		# Unsubscriptions.
+		pub.unsubscribe(self.msg_data_capture_sweep, 'data_capture.sweep')
+		pub.unsubscribe(self.msg_data_capture_start, 'data_capture.start')
+		pub.unsubscribe(self.msg_data_capture_points, 'data_capture.points')
+		pub.unsubscribe(self.msg_data_capture_stop, 'data_capture.stop')
+
+	def OnTimer(self, evt=None):
+		self.update_plot()
+
+	def msg_data_capture_sweep(self, variables):
+		try:
+			self.sweep_grid = SweepGrid.from_variables(variables)
+		except ValueError as e:
+			self.sweep_grid = None
+			log.debug('No grid for sweep: {0}'.format(str(e)))
+
+	def msg_data_capture_start(self, name):
+		if name == self.measurement_resource_name:
+			if self.enabled and plot_available and self.sweep_grid is not None:
+				self.capturing_data = True
+
+				self.grid = self.sweep_grid
+				self.plot.x_label, self.plot.y_label = self.grid.x_label, self.grid.y_label
+				self.plot.show_grid(self.grid.values, self.grid.x_bounds, self.grid.y_bounds)
+				# Already shown in full.
+				self.grid.take_dirty()
+
+				self.timer.Start(self.update_delay)
+
+	def msg_data_capture_points(self, name, indices, values):
+		if name == self.measurement_resource_name:
+			if self.capturing_data:
+				try:
+					self.grid.add(indices, values)
+				except ValueError as e:
+					log.warning('Could not map values of "{0}": {1}'.format(name, str(e)))
+
+	def msg_data_capture_stop(self, name):
+		if name == self.measurement_resource_name:
+			if self.capturing_data:
+				self.capturing_data = False
+
+				self.timer.Stop()
+				self.update_plot()
+
+
+class MapMeasurementFrame(wx.Frame):
+	def __init__(self, parent, global_store, *args, **kwargs):
+		wx.Frame.__init__(self, parent, *args, **kwargs)
+
+		# Frame.
+		frame_box = wx.BoxSizer(wx.VERTICAL)
+
+		## Measurement setup.
+		self.measurement_config_panel = MeasurementConfigPanel(self, global_store)
+		frame_box.Add(self.measurement_config_panel, flag=wx.EXPAND)
+
+		## Live view.
+		self.live_view_panel = MapLiveViewPanel(self, global_store)
+		self.live_view_panel.SetMinSize((-1, 400))
+		frame_box.Add(self.live_view_panel, proportion=1, flag=wx.EXPAND)
+
+		self.SetSizerAndFit(frame_box)
+
+		self.Bind(wx.EVT_CLOSE, self.OnClose)
+
+	def OnClose(self, evt):
+		if self.live_view_panel.capturing_data:
+			msg = 'Cannot close, as a sweep is currently in progress.'
+			MessageDialog(self, msg, 'Sweep in progress').Show()
+
+			evt.Veto()
+			return
+
+		self.live_view_panel.close()
+		self.measurement_config_panel.close()
+
+		evt.Skip()
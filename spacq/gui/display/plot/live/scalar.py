@@ -38,6 +38,7 @@ class PlotSettings(object):
 		self.enabled = plot_available
 		self.num_points = 500
 		self.delay = Quantity(0.2, 's')
+		self.batch_size = 1
 		self.update_x = True
 		self.time_value = 0
 		self.time_mode = 0
@@ -68,7 +69,7 @@ class PlotSettingsDialog(Dialog):
 		# Capture.
 		capture_static_box = wx.StaticBox(self, label='Capture')
 		capture_box = wx.StaticBoxSizer(capture_static_box, wx.VERTICAL)
-		capture_sizer = wx.FlexGridSizer(rows=2, cols=2, hgap=5)
+		capture_sizer = wx.FlexGridSizer(rows=3, cols=2, hgap=5)
 		capture_box.Add(capture_sizer, flag=wx.CENTER)
 		dialog_box.Add(capture_box, flag=wx.EXPAND|wx.ALL, border=5)
 
@@ -82,9 +83,15 @@ class PlotSettingsDialog(Dialog):
 		capture_sizer.Add(wx.StaticText(self, label='Delay (s):'),
 				flag=wx.ALIGN_CENTER_VERTICAL|wx.ALIGN_RIGHT)
 		# TODO: Input should be a time amount directly (eg. '200 ms').
-		self.delay_input = floatspin.FloatSpin(self, min_val=0.2, max_val=1e4, increment=0.1, digits=2)
+		self.delay_input = floatspin.FloatSpin(self, min_val=0.01, max_val=1e4, increment=0.1, digits=2)
 		capture_sizer.Add(self.delay_input, flag=wx.CENTER)
 
+		## Batch size.
+		capture_sizer.Add(wx.StaticText(self, label='Batch:'),
+				flag=wx.ALIGN_CENTER_VERTICAL|wx.ALIGN_RIGHT)
+		self.batch_input = wx.SpinCtrl(self, min=1, max=1e4, initial=1)
+		capture_sizer.Add(self.batch_input, flag=wx.CENTER)
+
 		# Axes.
 		axes_static_box = wx.StaticBox(self, label='Axes')
 		axes_box = wx.StaticBoxSizer(axes_static_box, wx.HORIZONTAL)
@@ -166,6 +173,7 @@ class PlotSettingsDialog(Dialog):
 		plot_settings.enabled = self.enabled_checkbox.Value
 		plot_settings.num_points = self.points_input.Value
 		plot_settings.delay = Quantity(self.delay_input.GetValue(), 's')
+		plot_settings.batch_size = self.batch_input.Value
 		plot_settings.update_x = self.update_x_axis.Value
 		plot_settings.time_value = self.time_value.Selection
 		plot_settings.time_mode = self.time_mode.Selection
@@ -180,6 +188,7 @@ class PlotSettingsDialog(Dialog):
 		self.enabled_checkbox.Value = plot_settings.enabled
 		self.points_input.Value = plot_settings.num_points
 		self.delay_input.SetValue(plot_settings.delay.value)
+		self.batch_input.Value = plot_settings.batch_size
 		self.update_x_axis.Value = plot_settings.update_x
 		self.time_value.Selection = plot_settings.time_value
 		self.time_mode.Selection = plot_settings.time_mode
@@ -192,8 +201,12 @@ class PlotSettingsDialog(Dialog):
 class ScalarLiveViewPanel(wx.Panel):
 	"""
 	A panel to display a live view plot of a scalar resource.
+
+	Values are acquired in batches, so that the plot is updated at most once every min_update_time s.
 	"""
 
+	min_update_time = 0.2
+
 	def __init__(self, parent, global_store, *args, **kwargs):
 		wx.Panel.__init__(self, parent, *args, **kwargs)
 
@@ -270,9 +283,9 @@ class ScalarLiveViewPanel(wx.Panel):
 		self.SetSizer(display_box)
 
 		# Acquisition thread.
-		callback = functools.partial(wx.CallAfter, self.add_value)
+		callback = functools.partial(wx.CallAfter, self.add_values)
 		self.acq_thread = AcquisitionThread(self.plot_settings.delay, callback,
-				running_lock=self.running_lock)
+				running_lock=self.running_lock, batch_size=self.batch_size)
 		self.acq_thread.daemon = True
 		self.acq_thread.start()
 
@@ -335,6 +348,16 @@ class ScalarLiveViewPanel(wx.Panel):
 			self._measurement_resource_name = None
 			self.resource = None
 
+	@property
+	def batch_size(self):
+		"""
+		The number of values to acquire per update of the plot.
+		"""
+
+		min_batch_size = int(math.ceil(self.min_update_time / self.plot_settings.delay.value))
+
+		return max(self.plot_settings.batch_size, min_batch_size)
+
 	def init_values(self):
 		"""
 		Clear captured values.
@@ -362,53 +385,57 @@ class ScalarLiveViewPanel(wx.Panel):
 
 				if self.plot_settings.time_mode == 0: # Relative.
 					# Calculate the number of seconds passed since each point.
-					max_time = self._times[-1]
-					display_time = [x - max_time for x in display_time]
+					display_time = display_time - self._times[-1]
 				elif self.plot_settings.time_mode == 1: # Absolute.
-					display_time = [x - self.start_time for x in display_time]
+					display_time = display_time - self.start_time
 			elif self.plot_settings.time_value == 1: # Points.
 				display_time = self._points
 
 				if self.plot_settings.time_mode == 0: # Relative.
 					# Calculate the number of seconds passed since each point.
-					max_point = self._points[-1]
-					display_time = [x - max_point for x in display_time]
+					display_time = display_time - self._points[-1]
 
-			display_values = [x * 10 ** (self.plot_settings.y_scale + self.unit_conversion) for
-					x in self._values]
+			display_values = self._values * 10 ** (self.plot_settings.y_scale + self.unit_conversion)
 
 		if self.plot_settings.update_x:
 			self.plot.x_autoscale()
 		if self.plot_settings.update_y:
 			self.plot.y_autoscale()
 
-		self.plot.x_data, self.plot.y_data = display_time, display_values
+		self.plot.set_xy(display_time, display_values)
 
 	def add_value(self, value):
 		"""
 		Update the plot with a new value.
 		"""
 
-		if not self.plot_settings.enabled:
+		self.add_values([value])
+
+	def add_values(self, values, times=None):
+		"""
+		Update the plot with several new values at once, measured at the given times (by default, now).
+		"""
+
+		if not self.plot_settings.enabled or not values:
 			return
 
-		# Extract the value of a Quantity.
-		try:
-			value = value.value
-		except AttributeError:
-			pass
+		# Extract the values of Quantities.
+		values = [getattr(value, 'value', value) for value in values]
+
+		if times is None:
+			times = [time.time()] * len(values)
 
 		# Update values.
 		try:
-			self._points = numpy.append(self._points, self._points[-1] + 1)
+			first_point = self._points[-1] + 1
 		except IndexError:
-			self._points = numpy.append(self._points, 0)
-		cur_time = time.time()
-		self._times = numpy.append(self._times, cur_time)
-		self._values = numpy.append(self._values, value)
+			first_point = 0
+		self._points = numpy.append(self._points, numpy.arange(first_point, first_point + len(values)))
+		self._times = numpy.append(self._times, times)
+		self._values = numpy.append(self._values, values)
 
 		if self.start_time is None:
-			self.start_time = cur_time
+			self.start_time = times[0]
 
 		cut_idx = len(self._points) - int(self.plot_settings.num_points)
 		if cut_idx > 0:
@@ -417,7 +444,7 @@ class ScalarLiveViewPanel(wx.Panel):
 			self._values = self._values[cut_idx:]
 
 		# Set number display.
-		self.current_value = value * 10 ** (self.plot_settings.y_scale + self.unit_conversion)
+		self.current_value = values[-1] * 10 ** (self.plot_settings.y_scale + self.unit_conversion)
 		self.numeric_display.Value = '{0:.6g}'.format(self.current_value)
 
 		# Plot.
@@ -497,6 +524,7 @@ class ScalarLiveViewPanel(wx.Panel):
 				self.unit_conversion = 0
 
 			self.acq_thread.delay = self.plot_settings.delay
+			self.acq_thread.batch_size = self.batch_size
 
 			if self.plot_settings.time_value == 0:
 				self.plot.x_label = 'Time (s)'
@@ -533,10 +561,10 @@ class ScalarLiveViewPanel(wx.Panel):
 				self.resource_backup = self.resource
 				self.resource = None
 
-	def msg_data_capture_data(self, name, value):
+	def msg_data_capture_data(self, name, values, times):
 		if name == self.measurement_resource_name:
 			if self.capturing_data:
-				self.add_value(value)
+				self.add_values(values, times)
 
 	def msg_data_capture_stop(self, name):
 		if name == self.measurement_resource_name:
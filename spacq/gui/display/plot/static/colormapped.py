@@ -1,14 +1,14 @@
 import wx
 
-from spacq.tool.box import triples_to_mesh
+from spacq.tool.box import MeshPyramid
 
 from ....tool.box import MessageDialog
 from ..colormapped import ColormappedPlot
-from .common.plot_setup import PlotSetupDialog
+from .common.plot_setup import MeshPlotSetupDialog
 
 
 class ColormappedPlotPanel(wx.Panel):
-	def __init__(self, parent, color_data, x_bounds, y_bounds, x_label, y_label,
+	def __init__(self, parent, color_data, x_bounds, y_bounds, x_label, y_label, pyramid=None,
 			*args, **kwargs):
 		wx.Panel.__init__(self, parent, *args, **kwargs)
 
@@ -24,11 +24,14 @@ class ColormappedPlotPanel(wx.Panel):
 		self.plot.x_label, self.plot.y_label = x_label, y_label
 		self.plot.color_data = color_data
 
+		if pyramid is not None:
+			self.plot.set_pyramid(pyramid)
+
 
 class ColormappedPlotFrame(wx.Frame):
 	bounds_format = '{0:.4e}'
 
-	def __init__(self, parent, color_data, x_bounds, y_bounds, x_label, y_label,
+	def __init__(self, parent, color_data, x_bounds, y_bounds, x_label, y_label, pyramid=None,
 			*args, **kwargs):
 		wx.Frame.__init__(self, parent, *args, **kwargs)
 
@@ -37,7 +40,7 @@ class ColormappedPlotFrame(wx.Frame):
 
 		## Plot panel.
 		self.panel = ColormappedPlotPanel(self, color_data, x_bounds, y_bounds,
-				x_label, y_label)
+				x_label, y_label, pyramid)
 		self.panel.SetMinSize((400, 300))
 		frame_box.Add(self.panel, proportion=1, flag=wx.EXPAND)
 
@@ -92,9 +95,12 @@ class ColormappedPlotFrame(wx.Frame):
 		self.maximum_value_input.Value = self.bounds_format.format(self.panel.plot.high_setting)
 
 
-class ColormappedPlotSetupDialog(PlotSetupDialog):
+class ColormappedPlotSetupDialog(MeshPlotSetupDialog):
+	# Cells (rows, columns) shown before the plot knows its size.
+	initial_shape = (300, 400)
+
 	def __init__(self, parent, headings, data, *args, **kwargs):
-		PlotSetupDialog.__init__(self, parent, headings, ['x', 'y', 'color'],
+		MeshPlotSetupDialog.__init__(self, parent, headings, ['x', 'y', 'color'],
 				*args, **kwargs)
 
 		self.parent = parent
@@ -102,14 +108,11 @@ class ColormappedPlotSetupDialog(PlotSetupDialog):
 		self.data = data
 
 	def make_plot(self):
-		try:
-			x_data, y_data, z_data = [self.data[:,axis].astype(float) for axis in self.axes]
-		except ValueError as e:
-			MessageDialog(self, str(e), 'Invalid value').Show()
-			return
+		x_data, y_data, z_data = [self.data.columns[axis] for axis in self.axes]
 
 		try:
-			color_data, x_bounds, y_bounds, _ = triples_to_mesh(x_data, y_data, z_data)
+			pyramid = MeshPyramid.from_triples(x_data, y_data, z_data, self.data.cache_path,
+					self.method)
 		except Exception as e:
 			MessageDialog(self, str(e), 'Conversion failure').Show()
 			return
@@ -117,8 +120,9 @@ class ColormappedPlotSetupDialog(PlotSetupDialog):
 		x_label, y_label, z_label = [self.headings[x] for x in self.axes]
 		title = '{0} vs ({1}, {2})'.format(z_label, x_label, y_label)
 
+		color_data, x_bounds, y_bounds = pyramid.get(shape=self.initial_shape)
 		frame = ColormappedPlotFrame(self.parent, color_data, x_bounds, y_bounds,
-				x_label, y_label, title=title)
+				x_label, y_label, pyramid, title=title)
 		frame.Show()
 
 		return True
@@ -1,5 +1,7 @@
 import wx
 
+from spacq.tool.box import mesh_methods
+
 from .....tool.box import Dialog
 
 """
@@ -65,6 +67,9 @@ class PlotSetupDialog(Dialog):
 		axis_panel = AxisSelectionPanel(self, axis_names, headings, self.OnAxisSelection)
 		dialog_box.Add(axis_panel)
 
+		## Extra settings.
+		self.add_settings(dialog_box)
+
 		## End buttons.
 		button_box = wx.BoxSizer(wx.HORIZONTAL)
 		dialog_box.Add(button_box, flag=wx.CENTER)
@@ -79,6 +84,13 @@ class PlotSetupDialog(Dialog):
 
 		self.SetSizerAndFit(dialog_box)
 
+	def add_settings(self, dialog_box):
+		"""
+		Add any settings besides the axes to the dialog.
+		"""
+
+		pass
+
 	def OnAxisSelection(self, values):
 		self.axes = values
 
@@ -89,3 +101,25 @@ class PlotSetupDialog(Dialog):
 			self.Destroy()
 
 			return True
+
+
+class MeshPlotSetupDialog(PlotSetupDialog):
+	"""
+	Configuration dialog for plots of a mesh built from triples.
+	"""
+
+	# Initially selected.
+	default_method = 'direct'
+
+	def add_settings(self, dialog_box):
+		self.method_input = wx.RadioBox(self, label='Method', choices=mesh_methods)
+		self.method_input.StringSelection = self.default_method
+		dialog_box.Add(self.method_input, flag=wx.EXPAND|wx.ALL, border=5)
+
+	@property
+	def method(self):
+		"""
+		How the triples are turned into a mesh, as for spacq.tool.box.triples_to_mesh.
+		"""
+
+		return self.method_input.StringSelection
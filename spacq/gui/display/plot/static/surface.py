@@ -1,12 +1,10 @@
-from numpy import array
 import wx
 
-from spacq.interface.list_columns import ListParser
-from spacq.tool.box import triples_to_mesh
+from spacq.tool.box import MeshPyramid
 
 from ....tool.box import MessageDialog
 from ..surface import SurfacePlot
-from .common.plot_setup import PlotSetupDialog
+from .common.plot_setup import MeshPlotSetupDialog, PlotSetupDialog
 
 
 class SurfacePlotPanel(wx.Panel):
@@ -50,9 +48,12 @@ class SurfacePlotFrame(wx.Frame):
 		evt.Skip()
 
 
-class SurfacePlotSetupDialog(PlotSetupDialog):
+class SurfacePlotSetupDialog(MeshPlotSetupDialog):
+	# Surfaces with more cells (rows, columns) are shown at a lower resolution.
+	max_shape = (150, 150)
+
 	def __init__(self, parent, headings, data, *args, **kwargs):
-		PlotSetupDialog.__init__(self, parent, headings, ['x', 'y', 'z'],
+		MeshPlotSetupDialog.__init__(self, parent, headings, ['x', 'y', 'z'],
 				*args, **kwargs)
 
 		self.parent = parent
@@ -60,18 +61,17 @@ class SurfacePlotSetupDialog(PlotSetupDialog):
 		self.data = data
 
 	def make_plot(self):
-		try:
-			x_data, y_data, z_data = [self.data[:,axis].astype(float) for axis in self.axes]
-		except ValueError as e:
-			MessageDialog(self, str(e), 'Invalid value').Show()
-			return
+		x_data, y_data, z_data = [self.data.columns[axis] for axis in self.axes]
 
 		try:
-			surface_data, x_bounds, y_bounds, _ = triples_to_mesh(x_data, y_data, z_data)
+			pyramid = MeshPyramid.from_triples(x_data, y_data, z_data, self.data.cache_path,
+					self.method)
 		except Exception as e:
 			MessageDialog(self, str(e), 'Conversion failure').Show()
 			return
 
+		surface_data, x_bounds, y_bounds = pyramid.get(shape=self.max_shape)
+
 		x_label, y_label, z_label = [self.headings[x] for x in self.axes]
 		title = '{0} vs ({1}, {2})'.format(z_label, x_label, y_label)
 
@@ -93,15 +93,17 @@ class WaveformsPlotSetupDialog(PlotSetupDialog):
 
 	def make_plot(self):
 		axis = self.axes[0]
-		lp = ListParser()
 
 		try:
-			surface_data = array([[x[1] for x in lp(row)] for row in self.data[:,axis]])
+			x_axis, surface_data = self.data.columns[axis].to_array()
 		except ValueError as e:
 			MessageDialog(self, str(e), 'Invalid value').Show()
 			return
 
-		x_axis = [x[0] for x in lp(self.data[:,axis][0])]
+		if len(surface_data) == 0:
+			MessageDialog(self, 'No waveforms to plot', 'Invalid value').Show()
+			return
+
 		x_bounds = (x_axis[0], x_axis[-1])
 
 		x_label, y_label, z_label = 'Waveform (s)', 'History', self.headings[axis]
@@ -1,6 +1,5 @@
 import wx
 
-from ....tool.box import MessageDialog
 from ..two_dimensional import TwoDimensionalPlot
 from .common.plot_setup import PlotSetupDialog
 
@@ -19,7 +18,7 @@ class TwoDimensionalPlotPanel(wx.Panel):
 		self.SetSizer(panel_box)
 
 		self.plot.x_label, self.plot.y_label = x_label, y_label
-		self.plot.x_data, self.plot.y_data = x_data, y_data
+		self.plot.set_xy(x_data, y_data)
 
 
 class TwoDimensionalPlotFrame(wx.Frame):
@@ -47,11 +46,7 @@ class TwoDimensionalPlotSetupDialog(PlotSetupDialog):
 		self.data = data
 
 	def make_plot(self):
-		try:
-			x_data, y_data = [self.data[:,axis].astype(float) for axis in self.axes]
-		except ValueError as e:
-			MessageDialog(self, str(e), 'Invalid value').Show()
-			return
+		x_data, y_data = [self.data.columns[axis] for axis in self.axes]
 
 		x_label, y_label = [self.headings[x] for x in self.axes]
 		title = '{0} vs {1}'.format(y_label, x_label)
@@ -2,6 +2,8 @@ from chaco.api import ArrayPlotData
 from enable.api import Window
 from functools import partial
 
+from spacq.tool.box import MinMaxPyramid
+
 from .common.chaco_plot import ChacoPlot
 
 """
@@ -12,8 +14,14 @@ An embeddable two-dimensional plot.
 class TwoDimensionalPlot(ChacoPlot):
 	"""
 	A 2D plot.
+
+	Curves with many points are decimated to about as many points as there are pixels across the plot, and recomputed
+	whenever the visible range changes.
 	"""
 
+	# Curves with more points are decimated.
+	lod_threshold = 10000
+
 	auto_color_idx = 0
 	auto_color_list = ['green', 'brown', 'blue', 'red', 'black']
 
@@ -38,12 +46,20 @@ class TwoDimensionalPlot(ChacoPlot):
 		self.data.set_data('x', [0])
 		self.data.set_data('y', [0])
 
+		# All the points, of which only some may be shown.
+		self.full_data = {'x': [0], 'y': [0]}
+		self.pyramid = None
+		self.updating_lod = False
+
 		ChacoPlot.__init__(self, self.data, *args, **kwargs)
 
 		self.plot(('x', 'y'), color=color)
 
 		self.configure()
 
+		self.on_trait_change(self.update_lod, 'index_range.updated')
+		self.on_trait_change(self.update_lod, 'bounds')
+
 	@property
 	def control(self):
 		"""
@@ -57,10 +73,67 @@ class TwoDimensionalPlot(ChacoPlot):
 		Values for an axis.
 		"""
 
-		return self.data.get_data(axis)
+		return self.full_data[axis]
 
 	def set_data(self, values, axis):
-		self.data.set_data(axis, values)
+		self.full_data[axis] = values
+
+		x, y = self.full_data['x'], self.full_data['y']
+
+		if len(x) != len(y):
+			# The other axis is yet to be set.
+			self.pyramid = None
+			self.data.set_data(axis, values)
+		else:
+			self.show_data(x, y)
+
+	def set_xy(self, x, y):
+		"""
+		Values for both axes at once.
+
+		Unlike setting x_data and y_data in turn, the curve is only rebuilt and redrawn once.
+		"""
+
+		if len(x) != len(y):
+			raise ValueError('Mismatched lengths: {0} and {1}'.format(len(x), len(y)))
+
+		self.full_data['x'], self.full_data['y'] = x, y
+		self.show_data(x, y)
+
+	def show_data(self, x, y):
+		"""
+		Hand the points over to the plot, decimating them if there are too many.
+		"""
+
+		if len(x) > self.lod_threshold:
+			self.pyramid = MinMaxPyramid(x, y)
+			self.update_lod()
+		else:
+			self.pyramid = None
+			self.data.set_data('x', x)
+			self.data.set_data('y', y)
+
+	def update_lod(self):
+		"""
+		Show only the points which can be seen at the current range and size.
+		"""
+
+		if self.pyramid is None or self.updating_lod:
+			return
+
+		self.updating_lod = True
+		try:
+			x_range = self.index_range
+			# An automatic bound follows the data, so all of it must be considered.
+			low = None if x_range.low_setting == 'auto' else x_range.low
+			high = None if x_range.high_setting == 'auto' else x_range.high
+
+			x, y = self.pyramid.get(low, high, max(int(self.width), 100))
+
+			self.data.set_data('x', x)
+			self.data.set_data('y', y)
+		finally:
+			self.updating_lod = False
 
 	x_data = property(partial(get_data, axis='x'), partial(set_data, axis='x'))
 	y_data = property(partial(get_data, axis='y'), partial(set_data, axis='y'))
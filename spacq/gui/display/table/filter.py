@@ -106,26 +106,6 @@ class FilterListDialog(Dialog):
 
 		self.Bind(wx.EVT_CLOSE, self.OnClose)
 
-	def create_filter(self, f_text, col):
-		"""
-		Create a filter out of text.
-		"""
-
-		col_idx = self.table.headings.index(col)
-
-		return lambda i, x: eval(f_text.replace('x', 'float(x[{0}])'.format(col_idx)))
-
-	@property
-	def meta_filter(self):
-		"""
-		Create a meta-filter out of all the filters.
-		"""
-
-		filters = [self.create_filter(f, col) for f, col in
-				zip(self.filters.values(), self.filter_columns.values())]
-
-		return lambda i, x: all([f(i, x) for f in filters])
-
 	def edit_ok_callback(self, dlg, selection=None):
 		col, f = dlg.GetValue()
 
@@ -140,16 +120,10 @@ class FilterListDialog(Dialog):
 		if not f:
 			raise ValueError('No function provided')
 
-		f_function = self.create_filter(f, col)
-
-		try:
-			self.table.apply_filter(f_function)
-		except Exception as e:
-			raise ValueError(e)
+		self.table.add_filter(name, col, f)
 
 		if selection is not None:
 			self.OnRemoveFilter(selection=selection)
-			self.table.apply_filter(f_function)
 
 		self.filters[name] = f
 		self.filter_columns[name] = col
@@ -188,7 +162,10 @@ class FilterListDialog(Dialog):
 
 		self.filter_list.Items = [x for x in self.filter_list.Items if x != selection]
 
-		self.table.apply_filter(self.meta_filter, afresh=True)
+		try:
+			self.table.remove_filter(selection)
+		except KeyError:
+			pass
 
 	def OnClose(self, evt):
 		self.close_callback(self)
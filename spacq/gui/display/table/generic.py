@@ -1,8 +1,9 @@
-from numpy import array, compress, zeros
 import wx
 from wx.lib.mixins.listctrl import ListCtrlAutoWidthMixin
 
-from spacq.interface.list_columns import ListParser
+from spacq.interface.columns import default_headings, find_type, Columns
+from spacq.interface.filters import FilterSet
+from spacq.tool.box import LRUCache
 
 
 """
@@ -13,33 +14,14 @@ Embeddable, generic, virtual, tabular display.
 class VirtualListCtrl(wx.ListCtrl, ListCtrlAutoWidthMixin):
 	"""
 	A generic virtual list.
+
+	Cells are only formatted when they are shown, and the most recently shown rows are kept.
 	"""
 
 	max_value_len = 250 # Characters.
+	row_cache_size = 1000 # Rows.
 
-	@staticmethod
-	def find_type(value):
-		"""
-		Determine the type of a column based on a single value.
-
-		The type is one of: scalar, list, string.
-		"""
-
-		try:
-			float(value)
-		except ValueError:
-			pass
-		else:
-			return 'scalar'
-
-		try:
-			ListParser()(value)
-		except ValueError:
-			pass
-		else:
-			return 'list'
-
-		return 'string'
+	find_type = staticmethod(find_type)
 
 	def __init__(self, parent, *args, **kwargs):
 		wx.ListCtrl.__init__(self, parent,
@@ -52,21 +34,19 @@ class VirtualListCtrl(wx.ListCtrl, ListCtrlAutoWidthMixin):
 
 	def reset(self):
 		self.headings = []
-		self.data = array([])
+		self.data = Columns([], [], [])
+		self.filters = FilterSet(self.data)
 		self.filtered_data = None
-		self.display_data = array([])
+		self.display_data = Columns([], [], [])
+		self.row_cache = LRUCache(self.row_cache_size)
 
 		self.types = []
 
 	def refresh_with_values(self, data):
-		self.ItemCount = len(data)
+		self.display_data = data
+		self.row_cache.clear()
 
-		if self.ItemCount > 0:
-			self.display_data = zeros(data.shape, dtype='|S{0}'.format(self.max_value_len))
-
-			for i, _ in enumerate(self.headings):
-				# Truncate for display.
-				self.display_data[:,i] = [x[:self.max_value_len] for x in data[:,i]]
+		self.ItemCount = len(data)
 
 		self.Refresh()
 
@@ -74,7 +54,7 @@ class VirtualListCtrl(wx.ListCtrl, ListCtrlAutoWidthMixin):
 		"""
 		Set the data to be the old data, along with the application of a filter.
 
-		f is a function of two parameters: the index of the row and the row itself.
+		f is a function of two parameters: the index of the row and the row itself (with typed values).
 		f must return True if the row is to be kept and False otherwise.
 
 		If afresh is True, all old filtered data is discarded.
@@ -89,10 +69,31 @@ class VirtualListCtrl(wx.ListCtrl, ListCtrlAutoWidthMixin):
 		else:
 			original_set = self.data
 
-		self.filtered_data = compress([f(i, x) for i, x in enumerate(original_set)], original_set, axis=0)
+		self.filtered_data = original_set.take([bool(f(i, original_set.row(i))) for i in xrange(len(original_set))])
 
 		self.refresh_with_values(self.filtered_data)
 
+	def add_filter(self, name, heading, text):
+		"""
+		Add a named filter expression (see spacq.interface.filters) on a column.
+		"""
+
+		self.filters.add(name, heading, text)
+
+		self.filtered_data = self.filters.apply()
+		self.refresh_with_values(self.filtered_data)
+
+	def remove_filter(self, name):
+		self.filters.remove(name)
+
+		if self.filters.filters:
+			self.filtered_data = self.filters.apply()
+			self.refresh_with_values(self.filtered_data)
+		else:
+			# Avoid copying everything.
+			self.filtered_data = None
+			self.refresh_with_values(self.data)
+
 	def GetValue(self, types=None):
 		# Get all types by default.
 		if types is None:
@@ -108,19 +109,23 @@ class VirtualListCtrl(wx.ListCtrl, ListCtrlAutoWidthMixin):
 		else:
 			data = self.data
 
-		return ([self.headings[i] for i in idxs], data[:,idxs], [self.types[i] for i in idxs])
+		return ([self.headings[i] for i in idxs], data.select(idxs), [self.types[i] for i in idxs])
 
 	def SetValue(self, headings, data):
 		"""
 		headings: A list of strings.
-		data: A 2D NumPy array.
+		data: Columns, or a sequence of rows of strings.
 		"""
 
 		self.ClearAll()
 		self.reset()
 
+		if not isinstance(data, Columns):
+			data = Columns.from_rows(headings, data)
+
 		self.headings = headings
 		self.data = data
+		self.filters = FilterSet(self.data)
 
 		self.refresh_with_values(self.data)
 
@@ -132,15 +137,21 @@ class VirtualListCtrl(wx.ListCtrl, ListCtrlAutoWidthMixin):
 			for i, heading in enumerate(self.headings):
 				self.InsertColumn(i, heading, width=col_width)
 
-				type = self.find_type(data[0,i])
-				self.types.append(type)
+			self.types = list(data.types)
 
 	def OnGetItemText(self, item, col):
 		"""
 		Return cell value for LC_VIRTUAL.
 		"""
 
-		return self.display_data[item,col]
+		try:
+			row = self.row_cache[item]
+		except KeyError:
+			# Truncate for display.
+			row = [self.display_data.format(item, i, self.max_value_len) for i, _ in enumerate(self.headings)]
+			self.row_cache[item] = row
+
+		return row[col]
 
 
 class TabularDisplayPanel(wx.Panel):
@@ -171,16 +182,18 @@ class TabularDisplayPanel(wx.Panel):
 		"""
 
 		if has_header:
-			headers, rows = values[0], array(values[1:])
+			headers, rows = values[0], values[1:]
 		else:
-			headers, rows = [''] * len(values[0]), array(values)
+			headers, rows = [''] * len(values[0]), values
 
-		# Ensure that all columns have a header.
-		for i, header in enumerate(headers):
-			if not header:
-				headers[i] = 'Column {0}'.format(i + 1)
+		self.SetValue(default_headings(headers), rows)
+
+	def from_columns(self, columns):
+		"""
+		Import the given Columns into the table.
+		"""
 
-		self.SetValue(headers, rows)
+		self.SetValue(columns.headings, columns)
 
 	def GetValue(self, *args, **kwargs):
 		return self.table.GetValue(*args, **kwargs)
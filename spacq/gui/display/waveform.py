@@ -31,8 +31,7 @@ class WaveformDisplay(TwoDimensionalPlot):
 		marker_plot = TwoDimensionalPlot(self, height=self.marker_height, resizable='h')
 		marker_plot.padding_left = self.padding_left
 
-		marker_plot.x_data = self.x_data
-		marker_plot.y_data = data
+		marker_plot.set_xy(self.x_data, data)
 		marker_plot.title = 'Marker {0}'.format(num)
 
 		# Synchronize with waveform plot.
@@ -59,8 +58,7 @@ class WaveformPanel(wx.Panel):
 		# Find the order of magnitude (to within 3 orders, to keep it at n, u, m, etc).
 		magnitude = 3 * floor(floor(log10(max_time)) / 3)
 
-		self.waveform_plot.x_data = linspace(0, max_time / (10 ** magnitude), len(waveform))
-		self.waveform_plot.y_data = waveform
+		self.waveform_plot.set_xy(linspace(0, max_time / (10 ** magnitude), len(waveform)), waveform)
 
 		self.waveform_plot.x_label = '{0}s'.format(SIValues.prefixes_[magnitude])
 
@@ -3,6 +3,8 @@ from os.path import basename
 import pickle
 import wx
 
+from spacq.interface.columns import load_csv_cached
+
 
 OK_BACKGROUND_COLOR = 'PALE GREEN'
 
@@ -106,6 +108,28 @@ def load_csv(parent, extension='csv', file_type='CSV'):
 				# Wrap all problems.
 				raise IOError('Could not load data.', e)
 
+def load_columns(parent, extension='csv', file_type='CSV'):
+	"""
+	Load typed columns from a CSV file based on a file dialog.
+
+	The converted columns are cached next to the file.
+	"""
+
+	wildcard = determine_wildcard(extension, file_type)
+	dlg = wx.FileDialog(parent=parent, message='Load...', wildcard=wildcard,
+			style=wx.FD_OPEN)
+
+	if dlg.ShowModal() == wx.ID_OK:
+		path = dlg.GetPath()
+
+		filename = basename(path)
+
+		try:
+			return (load_csv_cached(path), filename)
+		except Exception as e:
+			# Wrap all problems.
+			raise IOError('Could not load data.', e)
+
 def save_csv(parent, values, headers=None, extension='csv', file_type='CSV'):
 	"""
 	Save data to a CSV file based on a file dialog.
@@ -0,0 +1,414 @@
+import logging
+log = logging.getLogger(__name__)
+
+import csv
+from itertools import islice
+import json
+from numpy import arange, array, concatenate, cumsum, empty, load, nan, repeat, save, zeros
+import os
+from os import path
+
+from .list_columns import parse_list_column
+
+"""
+Typed, columnar storage for tabular data, such as exported sweeps.
+"""
+
+
+def find_type(value):
+	"""
+	Determine the type of a column based on a single value.
+
+	The type is one of: scalar, list, string.
+	"""
+
+	try:
+		float(value)
+	except ValueError:
+		pass
+	else:
+		return 'scalar'
+
+	try:
+		parse_list_column([value])
+	except ValueError:
+		pass
+	else:
+		return 'list'
+
+	return 'string'
+
+def default_headings(headings):
+	"""
+	Ensure that all columns have a heading.
+	"""
+
+	return [heading or 'Column {0}'.format(i + 1) for i, heading in enumerate(headings)]
+
+
+class ListColumn(object):
+	"""
+	A column of lists of pairs.
+
+	All the pairs are stored in a single (N, 2) array of values; row i consists of values[offsets[i]:offsets[i+1]].
+	"""
+
+	def __init__(self, offsets, values):
+		self.offsets = offsets
+		self.values = values
+
+	@classmethod
+	def from_lengths(cls, lengths, values):
+		offsets = zeros(len(lengths) + 1, dtype=int)
+		cumsum(lengths, out=offsets[1:])
+
+		return cls(offsets, values)
+
+	@classmethod
+	def from_lists(cls, lists):
+		values = empty((sum(len(x) for x in lists), 2))
+
+		result = cls.from_lengths([len(x) for x in lists], values)
+		for i, lst in enumerate(lists):
+			if lst:
+				values[result.offsets[i]:result.offsets[i+1]] = lst
+
+		return result
+
+	@classmethod
+	def concatenate(cls, columns):
+		"""
+		Join several columns end to end.
+		"""
+
+		offsets = [zeros(1, dtype=int)]
+		start = 0
+		for column in columns:
+			offsets.append(column.offsets[1:] + start)
+			start += column.offsets[-1]
+
+		return cls(concatenate(offsets), concatenate([x.values for x in columns] + [empty((0, 2))]))
+
+	def __len__(self):
+		return len(self.offsets) - 1
+
+	def __getitem__(self, idx):
+		return self.get(idx)
+
+	def get(self, idx, limit=None):
+		"""
+		The list in a row, or only its first limit pairs.
+		"""
+
+		start, stop = self.offsets[idx], self.offsets[idx+1]
+
+		if limit is not None:
+			stop = min(stop, start + limit)
+
+		return [tuple(x) for x in self.values[start:stop]]
+
+	def __iter__(self):
+		for i in xrange(len(self)):
+			yield self[i]
+
+	def take(self, idxs):
+		"""
+		A column of only the given rows.
+		"""
+
+		starts = self.offsets[:-1][idxs]
+		lengths = self.offsets[1:][idxs] - starts
+
+		offsets = zeros(len(starts) + 1, dtype=int)
+		cumsum(lengths, out=offsets[1:])
+
+		# Index of every value to keep, without looping over the rows.
+		value_idxs = repeat(starts - offsets[:-1], lengths) + arange(offsets[-1])
+
+		return ListColumn(offsets, self.values[value_idxs])
+
+	def to_array(self):
+		"""
+		The first values of the first row, and the second values of every row as a 2D array.
+		"""
+
+		lengths = self.offsets[1:] - self.offsets[:-1]
+
+		if len(lengths) == 0:
+			return (array([]), empty((0, 0)))
+
+		if (lengths != lengths[0]).any():
+			raise ValueError('Lists are not all of the same length')
+
+		return (self.values[:lengths[0],0], self.values[:,1].reshape(len(self), lengths[0]))
+
+
+class ColumnBuilder(object):
+	"""
+	Convert a column from text one chunk at a time.
+
+	If a value does not match the type of the column, the column becomes a string column.
+	"""
+
+	def __init__(self, type):
+		self.type = type
+
+		self.parts = []
+
+	def convert(self, values):
+		if self.type == 'scalar':
+			try:
+				return array(values, dtype=float)
+			except ValueError:
+				# Allow for missing values.
+				return array([float(x) if x else nan for x in values])
+		elif self.type == 'list':
+			return ListColumn.from_lengths(*parse_list_column(values))
+		else:
+			return array(values, dtype=object)
+
+	def add(self, values):
+		try:
+			self.parts.append(self.convert(values))
+		except ValueError:
+			self.parts = [array([format_value(self.type, x) for x in part], dtype=object) for part in self.parts]
+			self.type = 'string'
+
+			self.parts.append(self.convert(values))
+
+	def finish(self):
+		if self.type == 'list':
+			return ListColumn.concatenate(self.parts)
+		else:
+			return concatenate(self.parts + [empty(0, dtype=float if self.type == 'scalar' else object)])
+
+
+def format_value(type, value):
+	"""
+	Textual representation of a value of the given type.
+	"""
+
+	if type == 'scalar':
+		return repr(value)
+	elif type == 'list':
+		return str(value)
+	else:
+		return value
+
+
+class Columns(object):
+	"""
+	Named, typed columns of equal length.
+
+	Scalar columns are float64 arrays, list columns are ListColumn objects, and string columns are object arrays.
+
+	If the columns were loaded from a cache directory, cache_path is that directory, where anything else derived from
+	them can also be cached.
+	"""
+
+	def __init__(self, headings, types, columns, cache_path=None):
+		self.headings = headings
+		self.types = types
+		self.columns = columns
+		self.cache_path = cache_path
+
+	@classmethod
+	def from_chunks(cls, headings, chunks):
+		"""
+		Convert an iterable of chunks of textual rows.
+
+		The type of each column is determined by its first value.
+		"""
+
+		width = len(headings)
+		builders = None
+
+		for chunk in chunks:
+			# Pad or truncate every row to fit the headings.
+			chunk = [row[:width] if len(row) >= width else row + [''] * (width - len(row)) for row in chunk]
+
+			if builders is None:
+				builders = [ColumnBuilder(find_type(x)) for x in chunk[0]]
+
+			for builder, values in zip(builders, zip(*chunk)):
+				builder.add(values)
+
+		if builders is None:
+			builders = [ColumnBuilder('string') for _ in headings]
+
+		return cls(headings, [x.type for x in builders], [x.finish() for x in builders])
+
+	@classmethod
+	def from_rows(cls, headings, rows):
+		rows = [list(row) for row in rows]
+
+		return cls.from_chunks(headings, [rows] if rows else [])
+
+	def __len__(self):
+		if not self.columns:
+			return 0
+
+		return len(self.columns[0])
+
+	def column(self, heading):
+		return self.columns[self.headings.index(heading)]
+
+	def select(self, idxs):
+		"""
+		Only the given columns.
+		"""
+
+		return Columns([self.headings[i] for i in idxs], [self.types[i] for i in idxs], [self.columns[i] for i in idxs],
+				self.cache_path)
+
+	def take(self, idxs):
+		"""
+		Only the given rows, by index or boolean mask.
+		"""
+
+		idxs = array(idxs)
+		if idxs.dtype == bool:
+			idxs = idxs.nonzero()[0]
+		else:
+			idxs = idxs.astype(int)
+
+		return Columns(self.headings, self.types, [x.take(idxs) for x in self.columns], self.cache_path)
+
+	def row(self, idx):
+		return [x[idx] for x in self.columns]
+
+	def format(self, row, col, max_len=None):
+		"""
+		Textual representation of a cell, which may be truncated to max_len characters.
+		"""
+
+		type, column = self.types[col], self.columns[col]
+
+		if type == 'list' and max_len is not None:
+			# Every pair takes at least this much space, so there is no need to format the rest of a long list.
+			value = column.get(row, max_len // len('(0.0, 0.0), ') + 1)
+		else:
+			value = column[row]
+
+		result = format_value(type, value)
+
+		if max_len is not None:
+			result = result[:max_len]
+
+		return result
+
+	def save(self, dir_path):
+		"""
+		Store the columns in a directory, as a file per array.
+		"""
+
+		index_path = path.join(dir_path, 'index.json')
+
+		if not path.isdir(dir_path):
+			os.mkdir(dir_path)
+		elif path.exists(index_path):
+			os.remove(index_path)
+
+		for i, (type, column) in enumerate(zip(self.types, self.columns)):
+			if type == 'list':
+				save(path.join(dir_path, '{0}.offsets.npy'.format(i)), column.offsets)
+				save(path.join(dir_path, '{0}.values.npy'.format(i)), column.values)
+			else:
+				save(path.join(dir_path, '{0}.npy'.format(i)), column)
+
+		# Written last, so that an incomplete directory is never used.
+		with open(index_path, 'w') as f:
+			json.dump({'headings': self.headings, 'types': self.types}, f)
+
+	@classmethod
+	def load(cls, dir_path, mmap_mode='r'):
+		"""
+		Load columns stored by save.
+
+		Scalar and list columns are memory-mapped (unless mmap_mode is None), so only the accessed values are read.
+		"""
+
+		with open(path.join(dir_path, 'index.json')) as f:
+			index = json.load(f)
+
+		headings = [str(x) for x in index['headings']]
+		types = [str(x) for x in index['types']]
+		columns = []
+
+		for i, type in enumerate(types):
+			if type == 'list':
+				columns.append(ListColumn(load(path.join(dir_path, '{0}.offsets.npy'.format(i)), mmap_mode),
+						load(path.join(dir_path, '{0}.values.npy'.format(i)), mmap_mode)))
+			elif type == 'scalar':
+				columns.append(load(path.join(dir_path, '{0}.npy'.format(i)), mmap_mode))
+			else:
+				# Python objects cannot be memory-mapped.
+				columns.append(load(path.join(dir_path, '{0}.npy'.format(i))))
+
+		return cls(headings, types, columns, dir_path)
+
+
+def load_csv(f, chunk_size=10000):
+	"""
+	Load Columns from CSV data, converting chunk_size rows at a time.
+
+	If the first row is empty, there is no header row.
+	"""
+
+	reader = csv.reader(f)
+
+	try:
+		headings = next(reader)
+	except StopIteration:
+		return Columns([], [], [])
+
+	def chunks(first=None):
+		if first is not None:
+			yield [first]
+
+		while True:
+			chunk = list(islice(reader, chunk_size))
+			if not chunk:
+				return
+
+			yield chunk
+
+	if headings:
+		return Columns.from_chunks(default_headings(headings), chunks())
+
+	try:
+		first = next(reader)
+	except StopIteration:
+		return Columns([], [], [])
+
+	return Columns.from_chunks(default_headings([''] * len(first)), chunks(first))
+
+def load_csv_cached(file_path, cache_path=None, chunk_size=10000):
+	"""
+	Load Columns from a CSV file, keeping a converted copy of the columns in cache_path (by default, next to the file).
+
+	The copy is memory-mapped, and is used for as long as it is newer than the file.
+	"""
+
+	if cache_path is None:
+		cache_path = file_path + '.columns'
+
+	index_path = path.join(cache_path, 'index.json')
+
+	try:
+		if path.getmtime(index_path) >= path.getmtime(file_path):
+			return Columns.load(cache_path)
+	except (EnvironmentError, ValueError, KeyError) as e:
+		log.debug('Not using cached columns in "{0}": {1}'.format(cache_path, e))
+
+	with open(file_path, 'rb') as f:
+		result = load_csv(f, chunk_size)
+
+	try:
+		result.save(cache_path)
+	except EnvironmentError as e:
+		log.warning('Could not cache columns in "{0}": {1}'.format(cache_path, e))
+		return result
+
+	# Use the memory-mapped copy rather than holding all the values.
+	return Columns.load(cache_path)
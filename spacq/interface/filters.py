@@ -0,0 +1,191 @@
+import ast
+from collections import OrderedDict
+import operator
+from numpy import (abs as np_abs, array, asarray, errstate, inf, isfinite, isinf, isnan, logical_and,
+		logical_not, logical_or, nan, ndarray, ones, zeros)
+
+"""
+Row filters for columnar data.
+
+A filter is an expression of x, the value of a cell in a column. Expressions on scalar columns which only use
+arithmetic, comparisons, boolean operators, and a few functions are evaluated on the whole column at once; anything
+else is evaluated one row at a time.
+"""
+
+
+class Unsupported(Exception):
+	"""
+	An expression cannot be evaluated on a whole column.
+	"""
+
+	pass
+
+
+class Filter(object):
+	"""
+	A compiled filter expression.
+	"""
+
+	constants = {
+		'True': True,
+		'False': False,
+		'nan': nan,
+		'inf': inf,
+	}
+
+	functions = {
+		'abs': np_abs,
+		'float': lambda x: asarray(x, dtype=float),
+		'isfinite': isfinite,
+		'isinf': isinf,
+		'isnan': isnan,
+	}
+
+	binary_operators = {
+		ast.Add: operator.add,
+		ast.Sub: operator.sub,
+		ast.Mult: operator.mul,
+		ast.Div: operator.div,
+		ast.Mod: operator.mod,
+		ast.Pow: operator.pow,
+	}
+
+	comparisons = {
+		ast.Eq: operator.eq,
+		ast.NotEq: operator.ne,
+		ast.Lt: operator.lt,
+		ast.LtE: operator.le,
+		ast.Gt: operator.gt,
+		ast.GtE: operator.ge,
+	}
+
+	def __init__(self, text):
+		self.text = text
+
+		try:
+			tree = ast.parse(text.strip(), mode='eval')
+		except SyntaxError as e:
+			raise ValueError('Invalid filter "{0}": {1}'.format(text, e.msg))
+
+		try:
+			self.vectorized = self.translate(tree.body)
+		except Unsupported:
+			self.vectorized = None
+
+		self.code = compile(tree, '<filter>', 'eval')
+
+	def translate(self, node):
+		"""
+		Turn an AST node into a function of a whole column.
+		"""
+
+		if isinstance(node, ast.Name):
+			if node.id == 'x':
+				return lambda x: x
+			elif node.id in self.constants:
+				value = self.constants[node.id]
+				return lambda x: value
+		elif isinstance(node, ast.Num):
+			return lambda x: node.n
+		elif isinstance(node, ast.UnaryOp):
+			operand = self.translate(node.operand)
+
+			if isinstance(node.op, ast.Not):
+				return lambda x: logical_not(operand(x))
+			elif isinstance(node.op, ast.USub):
+				return lambda x: -operand(x)
+			elif isinstance(node.op, ast.UAdd):
+				return operand
+		elif isinstance(node, ast.BinOp):
+			if type(node.op) in self.binary_operators:
+				op = self.binary_operators[type(node.op)]
+				left, right = self.translate(node.left), self.translate(node.right)
+
+				return lambda x: op(left(x), right(x))
+		elif isinstance(node, ast.BoolOp):
+			values = [self.translate(value) for value in node.values]
+			combine = logical_and if isinstance(node.op, ast.And) else logical_or
+
+			return lambda x: reduce(combine, [value(x) for value in values])
+		elif isinstance(node, ast.Compare):
+			if all(type(op) in self.comparisons for op in node.ops):
+				operands = [self.translate(node.left)] + [self.translate(value) for value in node.comparators]
+				ops = [self.comparisons[type(op)] for op in node.ops]
+
+				# Chained comparisons must all hold.
+				return lambda x: reduce(logical_and, [op(left(x), right(x)) for op, left, right in
+						zip(ops, operands[:-1], operands[1:])])
+		elif isinstance(node, ast.Call):
+			if (isinstance(node.func, ast.Name) and node.func.id in self.functions and len(node.args) == 1 and
+					not (node.keywords or node.starargs or node.kwargs)):
+				f, arg = self.functions[node.func.id], self.translate(node.args[0])
+
+				return lambda x: f(arg(x))
+
+		raise Unsupported(ast.dump(node))
+
+	def __call__(self, column):
+		"""
+		The mask of the rows in the column (a sequence of values) which pass the filter.
+		"""
+
+		try:
+			if self.vectorized is not None and isinstance(column, ndarray) and column.dtype == float:
+				with errstate(divide='ignore', invalid='ignore'):
+					result = self.vectorized(column)
+
+				# Constant expressions apply to every row.
+				return zeros(len(column), dtype=bool) | asarray(result, dtype=bool)
+
+			return array([bool(eval(self.code, {}, {'x': x})) for x in column], dtype=bool)
+		except Exception as e:
+			# Wrap all problems.
+			raise ValueError(e)
+
+
+class FilterSet(object):
+	"""
+	Named filters on the columns of some data.
+
+	The mask of each filter is kept, so that filters can be added and removed without evaluating the others again.
+	"""
+
+	def __init__(self, data):
+		"""
+		data: Columns.
+		"""
+
+		self.data = data
+
+		# Name -> (heading, filter, mask).
+		self.filters = OrderedDict()
+		self.mask = ones(len(data), dtype=bool)
+
+	def add(self, name, heading, text):
+		if name in self.filters:
+			raise ValueError('Filter "{0}" already exists'.format(name))
+
+		try:
+			column = self.data.column(heading)
+		except ValueError:
+			raise ValueError('No column "{0}"'.format(heading))
+
+		f = Filter(text)
+		mask = f(column)
+
+		self.filters[name] = (heading, f, mask)
+		self.mask &= mask
+
+	def remove(self, name):
+		del self.filters[name]
+
+		self.mask = ones(len(self.data), dtype=bool)
+		for _, _, mask in self.filters.values():
+			self.mask &= mask
+
+	def apply(self):
+		"""
+		The rows which pass all the filters.
+		"""
+
+		return self.data.take(self.mask)
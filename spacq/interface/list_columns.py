@@ -1,4 +1,6 @@
+from numpy import array, empty
 from pyparsing import (delimitedList, ParseBaseException, Regex, Suppress)
+import re
 from re import IGNORECASE
 
 """
@@ -6,12 +8,17 @@ Tools for parsing list columns on import.
 """
 
 
+value_pattern = r'[-+]?[0-9]+(?:\.[0-9]*)?(?:[eE][-+]?[0-9]+)?'
+item_pattern = r'\(\s*{0}\s*,\s*{0}\s*\)'.format(value_pattern)
+list_re = re.compile(r'\s*\[\s*{0}(?:\s*,\s*{0})*\s*\]\s*$'.format(item_pattern))
+
+
 def ListParser():
 	"""
 	A parser for list columns, where each list is composed of pairs of values.
 	"""
 
-	value = Regex(r'[-+]?[0-9]+(?:\.[0-9]*)?(?:e[-+]?[0-9]+)?', IGNORECASE)
+	value = Regex(value_pattern, IGNORECASE)
 	value.setParseAction(lambda toks: float(toks[0]))
 
 	item = Suppress('(') + value + Suppress(',') + value + Suppress(')')
@@ -27,3 +34,48 @@ def ListParser():
 			raise ValueError(e)
 
 	return parse
+
+def parse_list_column(values):
+	"""
+	Parse a whole column of lists at once.
+
+	Lists which are well-formed are only checked with a regular expression, and all their numbers are converted by NumPy in a single pass; anything else is left to ListParser.
+
+	The result is the number of pairs in each list, and all the pairs as an (N, 2) array.
+	"""
+
+	strict_parser = None
+
+	lengths = empty(len(values), dtype=int)
+	texts = []
+
+	for i, value in enumerate(values):
+		value = str(value)
+
+		if list_re.match(value):
+			lengths[i] = value.count('(')
+			texts.append(value.translate(None, '[]()'))
+		else:
+			if strict_parser is None:
+				strict_parser = ListParser()
+
+			pairs = strict_parser(value)
+
+			lengths[i] = len(pairs)
+			texts.append(', '.join(repr(x) for pair in pairs for x in pair))
+
+	if texts:
+		result = array(','.join(texts).split(','), dtype=float)
+	else:
+		result = empty(0)
+
+	return (lengths, result.reshape(-1, 2))
+
+def parse_list(value):
+	"""
+	Parse a single list into an (N, 2) array.
+	"""
+
+	_, result = parse_list_column([value])
+
+	return result
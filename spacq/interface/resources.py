@@ -2,19 +2,25 @@ import logging
 log = logging.getLogger(__name__)
 
 from copy import copy
-from numpy import linspace
-from threading import Thread
+from threading import Lock, Thread
 import time
 
-from .units import IncompatibleDimensions, Quantity
+from .units import IncompatibleDimensions, Quantity, QuantityArray
 
-from spacq.tool.box import Without
+from spacq.tool.box import Enum, Without
 
 """
 Tools for working with generic resources.
 """
 
 
+# How long a value obtained from a getter may be reused:
+#   never: always ask the getter
+#   until_set: until the resource (or its device) is written to
+#   ttl: until the resource is written to, or cache_ttl has elapsed
+cache_policies = Enum(['never', 'until_set', 'ttl'])
+
+
 class NotReadable(Exception):
 	"""
 	Resource cannot be read from.
@@ -31,6 +37,59 @@ class NotWritable(Exception):
 	pass
 
 
+class ResourceCache(object):
+	"""
+	The last value obtained from the getter of a resource.
+
+	The cache is shared by all wrapped copies of a resource, so that writing through any of them invalidates the value for all.
+	"""
+
+	def __init__(self):
+		self.lock = Lock()
+
+		# Bumped on every invalidation, so that a read which was in progress during an invalidation is not stored.
+		self.generation = 0
+
+		self.valid = False
+		self.value = None
+		self.time = None
+
+	def invalidate(self):
+		with self.lock:
+			self.generation += 1
+
+			self.valid = False
+			self.value = None
+			self.time = None
+
+	def store(self, value, generation):
+		"""
+		Remember the value, unless the cache was invalidated since the value was requested.
+		"""
+
+		with self.lock:
+			if generation != self.generation:
+				return
+
+			self.valid = True
+			self.value = value
+			self.time = time.time()
+
+	def fetch(self, max_age=None):
+		"""
+		Return a tuple of whether a sufficiently fresh value is available, and that value.
+		"""
+
+		with self.lock:
+			if not self.valid:
+				return (False, None)
+
+			if max_age is not None and time.time() - self.time > max_age:
+				return (False, None)
+
+			return (True, self.value)
+
+
 class Resource(object):
 	"""
 	A generic resource which can potentially be read from or written to.
@@ -66,12 +125,24 @@ class Resource(object):
 
 		# Dimensions (specified as unit symbol strings) which values for this resource must match.
 		self._units = None
+		# The dimensions corresponding to the units, determined once.
+		self._dimensions = None
+		# Unit symbol strings of values which have already been found to match the dimensions.
+		self._verified_units = set()
 		# String used for display purposes. Typically the same as self.units.
 		self.display_units = None
 
 		# Resources marked slow should not be fetched implicitly.
 		self.slow = False
 
+		# Maximum rate of change (in units per s) when ramping, if any.
+		self._slew_rate = None
+
+		# Values from the getter are reused according to the policy.
+		self.cache_policy = cache_policies.never
+		self._cache_ttl = None
+		self._cache = ResourceCache()
+
 	@property
 	def units(self):
 		return self._units
@@ -80,9 +151,65 @@ class Resource(object):
 	def units(self, value):
 		self._units = value
 
+		if value is not None:
+			self._dimensions = Quantity(1, value).dimensions
+		else:
+			self._dimensions = None
+
+		self._verified_units = set()
+
 		if self.display_units is None:
 			self.display_units = self.units
 
+	@property
+	def cache_ttl(self):
+		"""
+		The maximum age of a cached value, as a quantity in s.
+		"""
+
+		return self._cache_ttl
+
+	@cache_ttl.setter
+	def cache_ttl(self, value):
+		if value is not None:
+			value.assert_dimensions('s')
+
+		self._cache_ttl = value
+
+	@property
+	def slew_rate(self):
+		"""
+		The maximum rate of change when ramping.
+
+		A quantity in the units of the resource per s, or a real for resources without units.
+		"""
+
+		return self._slew_rate
+
+	@slew_rate.setter
+	def slew_rate(self, value):
+		if value is not None:
+			if self.units is not None:
+				try:
+					value.assert_dimensions('{0}.s-1'.format(self.units))
+				except AttributeError:
+					raise TypeError('Expected a Quantity, not "{0}"'.format(value))
+			elif isinstance(value, Quantity):
+				raise TypeError('Unexpected Quantity "{0}"'.format(value))
+
+			rate = value.value if isinstance(value, Quantity) else value
+			if rate <= 0:
+				raise ValueError('Slew rate must be positive, not "{0}".'.format(value))
+
+		self._slew_rate = value
+
+	def invalidate_cache(self):
+		"""
+		Forget any cached value, so that the next read goes to the getter.
+		"""
+
+		self._cache.invalidate()
+
 	def verify_dimensions(self, value, exception=True, from_string=False):
 		"""
 		Ensure that the type and dimensions of the value are as expected.
@@ -90,19 +217,29 @@ class Resource(object):
 		If from_string is True, the value is expected to be a unit symbol string.
 		"""
 
+		if self.units is not None:
+			# Fast path: the units of the value are known to match.
+			if from_string:
+				if value in self._verified_units:
+					return True
+			elif isinstance(value, (Quantity, QuantityArray)) and value.original_units in self._verified_units:
+				return True
+
 		if from_string:
 			value = Quantity(1, value)
 
 		try:
 			if self.units is not None:
 				try:
-					value.assert_dimensions(self.units)
+					value.assert_dimensions(self._dimensions)
 				except AttributeError:
 					raise TypeError('Expected a Quantity, not "{0}"'.format(value))
 				except IncompatibleDimensions:
 					raise TypeError('Expected dimensions matching "{0}", not "{1}"'.format(self.units, value))
+
+				self._verified_units.add(value.original_units)
 			else:
-				if isinstance(value, Quantity):
+				if isinstance(value, (Quantity, QuantityArray)):
 					raise TypeError('Unexpected Quantity "{0}"'.format(value))
 		except Exception:
 			if exception:
@@ -121,14 +258,23 @@ class Resource(object):
 		if self.getter is None:
 			raise NotReadable('Resource not readable.')
 
-		if callable(self.getter):
-			result = self.getter()
-		elif self.obj is not None:
-			result = getattr(self.obj, self.getter)
+		if self.cache_policy == cache_policies.never:
+			result = self._get()
 		else:
-			raise NotReadable('Cannot read from resource.')
+			if self.cache_policy == cache_policies.ttl:
+				if self.cache_ttl is None:
+					raise ValueError('No TTL given for cache.')
 
-		self.verify_dimensions(result)
+				max_age = self.cache_ttl.value
+			else:
+				max_age = None
+
+			found, result = self._cache.fetch(max_age)
+
+			if not found:
+				generation = self._cache.generation
+				result = self._get()
+				self._cache.store(result, generation)
 
 		# Apply the wrappers.
 		for _, getter_filter, _ in self.wrappers:
@@ -158,12 +304,32 @@ class Resource(object):
 		if self.allowed_values is not None and v not in self.allowed_values:
 			raise ValueError('Disallowed value: {0}'.format(v))
 
-		if callable(self.setter):
-			self.setter(v)
+		try:
+			if callable(self.setter):
+				self.setter(v)
+			elif self.obj is not None:
+				setattr(self.obj, self.setter, v)
+			else:
+				raise NotWritable('Cannot write to resource.')
+		finally:
+			# Even a failed write may have changed the value.
+			self._cache.invalidate()
+
+	def _get(self):
+		"""
+		Obtain a verified, unwrapped value directly from the getter.
+		"""
+
+		if callable(self.getter):
+			result = self.getter()
 		elif self.obj is not None:
-			setattr(self.obj, self.setter, v)
+			result = getattr(self.obj, self.getter)
 		else:
-			raise NotWritable('Cannot write to resource.')
+			raise NotReadable('Cannot read from resource.')
+
+		self.verify_dimensions(result)
+
+		return result
 
 	def convert(self, value):
 		"""
@@ -174,7 +340,7 @@ class Resource(object):
 			return self.converter(value)
 		elif self.units is not None:
 			q = Quantity(value)
-			q.assert_dimensions(self.units)
+			q.assert_dimensions(self._dimensions)
 
 			return q
 		else:
@@ -245,6 +411,53 @@ class Resource(object):
 		Sweep the Resource slowly over a linear space.
 		"""
 
+		ramp = Ramp(delay)
+		ramp.add(self, value_from, value_to, steps, exception_callback)
+		ramp.run()
+
+
+class Ramp(object):
+	"""
+	A smooth transition of several resources over linear spaces, in lockstep.
+
+	Every resource starts and finishes at the same time, and each step is held for at least the minimum delay and long enough to respect the slew rate of the resource. Steps are scheduled against a common start time, so the time spent writing does not accumulate.
+
+	Resources belonging to the same device are written by a single thread, holding the device lock for all the steps due at once; different devices are written in parallel.
+	"""
+
+	def __init__(self, delay=0.1):
+		"""
+		delay: Minimum time in s for which each step is held.
+		"""
+
+		self.delay = delay
+
+		# Tuples of (resource, values, exception_callback).
+		self.entries = []
+
+	@staticmethod
+	def space(value_from, value_to, steps):
+		"""
+		A linear space which works with both reals and quantities.
+
+		Quantities are spaced as a single QuantityArray.
+		"""
+
+		if steps == 1:
+			return [value_from]
+
+		if isinstance(value_from, Quantity):
+			return QuantityArray.linspace(value_from, value_to, steps)
+
+		step = (value_to - value_from) / float(steps - 1)
+
+		return [value_from + i * step for i in xrange(steps - 1)] + [value_to]
+
+	def add(self, resource, value_from, value_to, steps, exception_callback=None):
+		"""
+		Ramp the resource from value_from to value_to in the given number of steps.
+		"""
+
 		# Check for dimension mismatches.
 		if isinstance(value_from, Quantity) and not isinstance(value_to, Quantity) and value_to == 0:
 			value_to = Quantity(0, value_from.original_units)
@@ -253,28 +466,147 @@ class Resource(object):
 		elif isinstance(value_from, Quantity) and isinstance(value_to, Quantity):
 			value_from.assert_dimensions(value_to)
 
-		for value in linspace(value_from, value_to, steps):
-			try:
-				self.value = value
-			except Exception as e:
-				if exception_callback is not None:
-					exception_callback(e)
+		self.entries.append((resource, self.space(value_from, value_to, steps), exception_callback))
+
+	def period(self, resource, values):
+		"""
+		The time in s for which each step of the resource must be held.
+		"""
+
+		if resource.slew_rate is None or len(values) < 2:
+			return self.delay
+
+		step_size = values[1] - values[0]
+		if isinstance(step_size, Quantity):
+			step_size = step_size.value
+
+		rate = resource.slew_rate
+		if isinstance(rate, Quantity):
+			rate = rate.value
+
+		return max(self.delay, abs(step_size) / rate)
+
+	@property
+	def duration(self):
+		"""
+		The time in s taken by the entire ramp.
+		"""
+
+		if not self.entries:
+			return 0
+
+		return max(len(values) * self.period(resource, values) for resource, values, _ in self.entries)
+
+	def _run_group(self, start_time, duration, entries):
+		"""
+		Write all the steps for resources which share a lock.
+		"""
+
+		lock = getattr(entries[0][0].obj, 'lock', None)
+		if lock is None:
+			lock = Without()
+
+		# Tuples of (time offset, entry index, value).
+		schedule = []
+		for i, (_, values, _) in enumerate(entries):
+			period = duration / len(values)
+			schedule.extend((j * period, i, value) for j, value in enumerate(values))
+		schedule.sort(key=lambda x: (x[0], x[1]))
+
+		failed = set()
+
+		pos = 0
+		while pos < len(schedule):
+			offset = schedule[pos][0]
+
+			delay = start_time + offset - time.time()
+			if delay > 0:
+				time.sleep(delay)
+
+			with lock:
+				while pos < len(schedule) and schedule[pos][0] == offset:
+					_, i, value = schedule[pos]
+					pos += 1
+
+					if i in failed:
+						continue
+
+					resource, _, exception_callback = entries[i]
+
+					try:
+						resource.value = value
+					except Exception as e:
+						failed.add(i)
+
+						if exception_callback is not None:
+							exception_callback(e)
+
+			if len(failed) == len(entries):
 				return
 
+		# Hold the last step.
+		delay = start_time + duration - time.time()
+		if delay > 0:
 			time.sleep(delay)
 
+	def run(self):
+		"""
+		Perform the ramp, blocking until it is done.
+		"""
+
+		if not self.entries:
+			return
+
+		# Group the resources by the lock of their device.
+		groups = []
+		group_locks = []
+		for entry in self.entries:
+			lock = getattr(entry[0].obj, 'lock', None)
+
+			if lock is not None and lock in group_locks:
+				groups[group_locks.index(lock)].append(entry)
+			else:
+				groups.append([entry])
+				group_locks.append(lock)
+
+		duration = self.duration
+		start_time = time.time()
+
+		if len(groups) == 1:
+			self._run_group(start_time, duration, groups[0])
+			return
+
+		thrs = []
+		for group in groups:
+			thr = Thread(target=self._run_group, args=(start_time, duration, group))
+			thrs.append(thr)
+			thr.daemon = True
+			thr.start()
+
+		for thr in thrs:
+			thr.join()
+
 
 class AcquisitionThread(Thread):
 	"""
 	Once every delay, call the callback with a fresh value from the resource.
 
+	If batch_size is given, the values are instead collected, and the callback is called with lists of at least
+	batch_size values and of the times at which they were obtained. A buffered resource returns several samples per read
+	(for example, a multimeter which takes a number of readings per trigger); its samples are always delivered in
+	batches, and are spread evenly over the time taken by the read.
+
+	Reads are scheduled a fixed delay apart, regardless of how long each takes, so that they do not drift.
+
 	An optional running lock can block execution until it is released elsewhere.
 	"""
 
-	def __init__(self, delay, callback, resource=None, running_lock=None):
-		Thread.__init__(self)
+	# The clock, which may be replaced (for example, to test the scheduling).
+	clock = staticmethod(time.time)
+	sleep = staticmethod(time.sleep)
 
-		delay.assert_dimensions('s')
+	def __init__(self, delay, callback, resource=None, running_lock=None, batch_size=None, buffered=False):
+		Thread.__init__(self)
 
 		self.resource = resource
 		self.delay = delay
@@ -284,33 +616,74 @@ class AcquisitionThread(Thread):
 		else:
 			self.running_lock = running_lock
 
+		self.batch_size = batch_size
+		self.buffered = buffered
+
 		# Allow the thread to be stopped prematurely.
 		self.done = False
 
+	@property
+	def delay(self):
+		return self._delay
+
+	@delay.setter
+	def delay(self, value):
+		value.assert_dimensions('s')
+
+		self._delay = value
+		# Converted once, rather than on every read.
+		self.delay_value = value.value
+
+	def read(self, values, times):
+		"""
+		Add the samples of a single read of the resource to the lists of values and times.
+		"""
+
+		start_time = self.clock()
+		value = self.resource.value
+		end_time = self.clock()
+
+		if self.buffered:
+			num_samples = len(value)
+			values.extend(value)
+			times.extend(end_time - (end_time - start_time) * (num_samples - 1 - i) / num_samples
+					for i in xrange(num_samples))
+		else:
+			values.append(value)
+			times.append(end_time)
+
 	def run(self):
+		deadline = None
+		values, times = [], []
+
 		while not self.done:
-			# If something goes wrong, sleep the maximum.
-			delay = self.delay.value
+			delay = self.delay_value
 
 			with self.running_lock:
-				if time:
-					next_run = time.time() + self.delay.value
+				now = self.clock()
+				if deadline is None or abs(now - deadline) > delay:
+					# Start afresh after falling behind (for example, while paused), or if the clock jumps.
+					deadline = now
+				deadline += delay
+
+				if self.resource is None:
+					# Samples from another resource are of no use.
+					values, times = [], []
 				else:
-					# Weird things happen at shutdown.
-					return
-
-				if self.resource is not None:
 					try:
-						value = self.resource.value
+						self.read(values, times)
 					except Exception as e:
 						log.error('Could not obtain resource value: {0!r}'.format(e))
-					else:
+
+				if self.batch_size is None and not self.buffered:
+					for value in values:
 						self.callback(value)
+					values, times = [], []
+				elif values and len(values) >= (self.batch_size or 1):
+					self.callback(values, times)
+					values, times = [], []
 
-				if time:
-					delay = next_run - time.time()
-				else:
-					return
+				delay = deadline - self.clock()
 
 			if not self.done and delay > 0:
-				time.sleep(delay)
+				self.sleep(delay)
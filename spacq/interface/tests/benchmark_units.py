@@ -0,0 +1,57 @@
+from timeit import Timer
+
+from .. import units
+
+"""
+Microbenchmarks for quantities.
+
+Run with: python -m spacq.interface.tests.benchmark_units
+"""
+
+
+def construction_cold():
+	units.Quantity.units_cache.clear()
+	units.Quantity(5, 'kg.m.s-2')
+
+def construction_warm():
+	units.Quantity(5, 'kg.m.s-2')
+
+def construction_string():
+	units.Quantity('5 kg.m.s-2')
+
+q1, q2 = units.Quantity(5, 'mV'), units.Quantity(7, 'kV')
+
+def comparison():
+	q1 < q2
+
+def equality():
+	q1 == q2
+
+def addition():
+	q1 + q2
+
+def multiplication():
+	q1 * 3
+
+
+benchmarks = [construction_cold, construction_warm, construction_string,
+		comparison, equality, addition, multiplication]
+
+
+def run(number=10000, repeat=3):
+	"""
+	Time each benchmark, in microseconds per call.
+	"""
+
+	result = []
+
+	for f in benchmarks:
+		times = Timer(f).repeat(repeat, number)
+		result.append((f.__name__, 1e6 * min(times) / number))
+
+	return result
+
+
+if __name__ == '__main__':
+	for name, time in run():
+		print '{0:>20}: {1:8.2f} us'.format(name, time)
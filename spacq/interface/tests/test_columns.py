@@ -0,0 +1,174 @@
+from nose.tools import eq_
+from numpy import isnan, memmap
+from numpy.testing import assert_array_equal
+import os
+from os import path
+from shutil import rmtree
+from StringIO import StringIO
+from tempfile import mkdtemp
+from unittest import main, TestCase
+
+from .. import columns
+
+
+class ListColumnTest(TestCase):
+	def testTake(self):
+		"""
+		Select rows of differing lengths.
+		"""
+
+		lists = [[(1.0, 2.0)], [], [(3.0, 4.0), (5.0, 6.0)], [(7.0, 8.0)]]
+		col = columns.ListColumn.from_lists(lists)
+
+		eq_(len(col), 4)
+		eq_(list(col), lists)
+
+		eq_(list(col.take([2, 0])), [lists[2], lists[0]])
+		eq_(list(col.take([1])), [[]])
+
+		joined = columns.ListColumn.concatenate([col, col.take([3])])
+		eq_(list(joined), lists + [lists[3]])
+
+	def testToArray(self):
+		"""
+		Only lists of the same length make an array.
+		"""
+
+		col = columns.ListColumn.from_lists([[(0.0, 1.0), (0.5, 2.0)], [(0.0, 3.0), (0.5, 4.0)]])
+
+		x_axis, values = col.to_array()
+		assert_array_equal(x_axis, [0.0, 0.5])
+		assert_array_equal(values, [[1.0, 2.0], [3.0, 4.0]])
+
+		try:
+			columns.ListColumn.from_lists([[(0.0, 1.0)], []]).to_array()
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+
+class LoadTest(TestCase):
+	data = '\r\n'.join([
+		'Time (s),,Waveform,Name',
+		'0.5,1,"[(0.0, 1.0), (1.0, 2.0)]",a',
+		'1.5,2,"[(0.0, 3.0)]",b',
+		'2.5,,"[(0.0, 5.0)]",c',
+		'3.5,4,"[(0.0, 7.0)]"',
+	]) + '\r\n'
+
+	def testTypes(self):
+		"""
+		Columns are converted according to their first value, in chunks.
+		"""
+
+		for chunk_size in [1, 3, 100]:
+			data = columns.load_csv(StringIO(self.data), chunk_size)
+
+			eq_(len(data), 4)
+			eq_(data.headings, ['Time (s)', 'Column 2', 'Waveform', 'Name'])
+			eq_(data.types, ['scalar', 'scalar', 'list', 'string'])
+
+			time, value, waveform, name = data.columns
+			eq_(time.dtype, float)
+			assert_array_equal(time, [0.5, 1.5, 2.5, 3.5])
+			# Missing values.
+			eq_(list(value[[0, 1, 3]]), [1.0, 2.0, 4.0])
+			assert isnan(value[2])
+			eq_(waveform[0], [(0.0, 1.0), (1.0, 2.0)])
+			eq_(list(name), ['a', 'b', 'c', ''])
+
+			eq_(data.format(1, 2), '[(0.0, 3.0)]')
+			eq_(data.format(3, 0), '3.5')
+
+	def testNoHeader(self):
+		"""
+		An empty first row means that there is no header.
+		"""
+
+		data = columns.load_csv(StringIO('\r\n1,x\r\n2,y\r\n'))
+
+		eq_(data.headings, ['Column 1', 'Column 2'])
+		eq_(data.types, ['scalar', 'string'])
+		eq_(data.row(1), [2.0, 'y'])
+
+		eq_(len(columns.load_csv(StringIO(''))), 0)
+		eq_(len(columns.load_csv(StringIO('a,b\r\n'))), 0)
+
+	def testMismatch(self):
+		"""
+		A column with a value of another type becomes a string column.
+		"""
+
+		data = columns.load_csv(StringIO('a,b\r\n1,"[(1, 2)]"\r\n2,"[(3, 4)]"\r\nxyz,5\r\n'), 2)
+
+		eq_(data.types, ['string', 'string'])
+		eq_(list(data.columns[0]), ['1.0', '2.0', 'xyz'])
+		eq_(list(data.columns[1]), ['[(1.0, 2.0)]', '[(3.0, 4.0)]', '5'])
+
+	def testSelection(self):
+		"""
+		Select rows and columns.
+		"""
+
+		data = columns.load_csv(StringIO(self.data))
+
+		selected = data.select([3, 0]).take([False, True, True, False])
+		eq_(selected.headings, ['Name', 'Time (s)'])
+		eq_(selected.types, ['string', 'scalar'])
+		eq_([selected.row(i) for i in xrange(len(selected))], [['b', 1.5], ['c', 2.5]])
+
+		eq_(list(data.take([3, 0]).column('Waveform')), [[(0.0, 7.0)], [(0.0, 1.0), (1.0, 2.0)]])
+		eq_(len(data.take([])), 0)
+
+	def testFormat(self):
+		"""
+		Long lists are only partially formatted.
+		"""
+
+		data = columns.Columns(['a'], ['list'], [columns.ListColumn.from_lists([[(1.0, 2.0)] * 1000])])
+
+		eq_(data.format(0, 0, 5), '[(1.0')
+		eq_(data.format(0, 0, 100), str([(1.0, 2.0)] * 1000)[:100])
+		eq_(len(data.format(0, 0)), 12 * 1000)
+
+
+class CacheTest(TestCase):
+	def setUp(self):
+		self.tmp_dir = mkdtemp()
+
+	def tearDown(self):
+		rmtree(self.tmp_dir)
+
+	def testCache(self):
+		"""
+		Reuse memory-mapped columns until the file changes.
+		"""
+
+		file_path = path.join(self.tmp_dir, 'data.csv')
+		with open(file_path, 'w') as f:
+			f.write(LoadTest.data)
+
+		data = columns.load_csv_cached(file_path)
+
+		assert path.isdir(file_path + '.columns')
+		eq_(data.types, ['scalar', 'scalar', 'list', 'string'])
+		assert isinstance(data.columns[0], memmap)
+		assert_array_equal(data.columns[0], [0.5, 1.5, 2.5, 3.5])
+		eq_(data.columns[2][0], [(0.0, 1.0), (1.0, 2.0)])
+		eq_(list(data.columns[3]), ['a', 'b', 'c', ''])
+
+		# The cache is used.
+		with open(path.join(file_path + '.columns', '0.npy'), 'r+b') as f:
+			f.seek(-8, os.SEEK_END)
+			f.write('\0' * 8)
+		eq_(columns.load_csv_cached(file_path).columns[0][3], 0.0)
+
+		# Until the file is newer.
+		index_time = path.getmtime(path.join(file_path + '.columns', 'index.json'))
+		os.utime(file_path, (index_time + 10, index_time + 10))
+		eq_(columns.load_csv_cached(file_path).columns[0][3], 3.5)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,95 @@
+from nose.tools import eq_
+from numpy import array, inf, nan
+from unittest import main, TestCase
+
+from ..columns import Columns, ListColumn
+
+from .. import filters
+
+
+class FilterTest(TestCase):
+	values = array([-1.0, 0.0, 1.5, 3.0, nan, inf])
+
+	def testVectorized(self):
+		"""
+		Simple expressions work on whole columns.
+		"""
+
+		exprs = [
+			('x > 1.0 and x < 5.0', [False, False, True, True, False, False]),
+			('0 <= x < 3', [False, True, True, False, False, False]),
+			('x == 3.0 or not x', [False, True, False, True, False, False]),
+			('isfinite(x) and abs(x - 1) >= 2 * 1', [True, False, False, True, False, False]),
+			('isnan(x)', [False, False, False, False, True, False]),
+			('-x != 1/x', [True, True, True, True, True, True]),
+			('True', [True] * 6),
+		]
+
+		for expr, expected in exprs:
+			f = filters.Filter(expr)
+
+			assert f.vectorized is not None, expr
+			eq_(list(f(self.values)), expected, expr)
+
+	def testFallback(self):
+		"""
+		Anything else is evaluated a row at a time.
+		"""
+
+		f = filters.Filter('round(x) == 2')
+		eq_(f.vectorized, None)
+		eq_(list(f(self.values[:4])), [False, False, True, False])
+
+		# Strings are never vectorized.
+		f = filters.Filter('x == "b"')
+		eq_(list(f(array(['a', 'b'], dtype=object))), [False, True])
+
+		f = filters.Filter('len(x) > 1')
+		eq_(list(f(ListColumn.from_lists([[(1.0, 2.0)], [(1.0, 2.0), (3.0, 4.0)]]))), [False, True])
+
+	def testInvalid(self):
+		"""
+		Problems are reported as ValueError.
+		"""
+
+		for expr, values in [('x ==', self.values), ('y == 5', self.values), ('x.foo', self.values)]:
+			try:
+				filters.Filter(expr)(values)
+			except ValueError:
+				pass
+			else:
+				assert False, 'Expected ValueError.'
+
+
+class FilterSetTest(TestCase):
+	def testFilters(self):
+		"""
+		Add and remove filters.
+		"""
+
+		data = Columns(['a', 'b'], ['scalar', 'string'],
+				[array([1.0, 2.0, 3.0, 4.0]), array(['w', 'x', 'y', 'z'], dtype=object)])
+		fs = filters.FilterSet(data)
+
+		fs.add('small', 'a', 'x < 4')
+		fs.add('large', 'a', 'x > 1')
+		fs.add('not y', 'b', 'x != "y"')
+		eq_(list(fs.apply().column('b')), ['x'])
+
+		fs.remove('large')
+		eq_(list(fs.apply().column('b')), ['w', 'x'])
+
+		for name, heading, text in [('small', 'a', 'x < 3'), ('other', 'c', 'x < 3'), ('bad', 'a', 'x <')]:
+			try:
+				fs.add(name, heading, text)
+			except ValueError:
+				pass
+			else:
+				assert False, 'Expected ValueError.'
+
+		eq_(fs.filters.keys(), ['small', 'not y'])
+		eq_(len(fs.apply()), 2)
+
+
+if __name__ == '__main__':
+	main()
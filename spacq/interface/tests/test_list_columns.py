@@ -1,4 +1,5 @@
 from nose.tools import assert_raises, eq_
+from numpy.testing import assert_array_equal
 from unittest import main, TestCase
 
 from .. import list_columns
@@ -44,5 +45,52 @@ class ListParserTest(TestCase):
 			assert_raises(ValueError, lp, lst)
 
 
+class ParseListColumnTest(TestCase):
+	def testColumn(self):
+		"""
+		Parse several lists together.
+		"""
+
+		lsts = [
+			[(float(x) / 3, float(x) / 7) for x in xrange(100)],
+			[(-1e-05, 2e+20)],
+			[(1.0, 2.0), (3.0, 4.0)],
+		]
+
+		lengths, values = list_columns.parse_list_column([str(x) for x in lsts])
+
+		eq_(list(lengths), [100, 1, 2])
+		assert_array_equal(values, [pair for lst in lsts for pair in lst])
+
+		eq_(list_columns.parse_list_column([])[1].shape, (0, 2))
+
+	def testWhitespace(self):
+		"""
+		Accept the same spacing as ListParser.
+		"""
+
+		lst = '[(1.5,2)\n,\t(3, 4E1) ]'
+
+		eq_([tuple(x) for x in list_columns.parse_list(lst)], list_columns.ListParser()(lst))
+
+	def testInvalid(self):
+		"""
+		The same lists as for ListParser are rejected.
+		"""
+
+		lsts = [
+			'',
+			'[]',
+			'(1,2),(3,4)',
+			'[(1,2),',
+			'[(1,2,3),(4,5,6)]',
+			'[(1,.2)]',
+		]
+
+		for lst in lsts:
+			assert_raises(ValueError, list_columns.parse_list, lst)
+			assert_raises(ValueError, list_columns.ListParser(), lst)
+
+
 if __name__ == '__main__':
 	main()
@@ -1,12 +1,14 @@
+from functools import partial
 from nose.tools import eq_
 from numpy import linspace
-from threading import Lock
+from numpy.testing import assert_array_almost_equal
+from threading import current_thread, Lock, RLock
 import time
 from unittest import main, TestCase
 
 from spacq.tests.tool.box import AssertHandler
 
-from ..units import Quantity
+from ..units import IncompatibleDimensions, Quantity, QuantityArray
 
 from .. import resources
 
@@ -365,6 +367,237 @@ class ResourceTest(TestCase):
 		else:
 			assert False, 'Expected TypeError'
 
+		## Arrays of quantities are checked the same way.
+		res1.value = QuantityArray([1, 2], 'kg.m2.s-3.A-2')
+		assert res1.verify_dimensions(QuantityArray([1, 2], 'ns.V2.pJ-1'))
+		assert not res1.verify_dimensions(QuantityArray([1, 2], 's'), exception=False)
+
+	def testChangedUnits(self):
+		"""
+		Units which were previously accepted are rejected after changing the units.
+		"""
+
+		value = []
+
+		res = resources.Resource(getter=lambda: value[-1], setter=lambda x: value.append(x))
+		res.units = 'V'
+
+		for _ in xrange(2):
+			res.value = Quantity(1, 'mV')
+			eq_(res.value, Quantity(1, 'mV'))
+			assert res.verify_dimensions('kV', from_string=True)
+
+		res.units = 's'
+
+		try:
+			res.value = Quantity(1, 'mV')
+		except TypeError:
+			pass
+		else:
+			assert False, 'Expected TypeError'
+
+		try:
+			res.value
+		except TypeError:
+			pass
+		else:
+			assert False, 'Expected TypeError'
+
+		assert not res.verify_dimensions('kV', exception=False, from_string=True)
+
+	def testCache(self):
+		"""
+		Reuse values from the getter according to the cache policy.
+		"""
+
+		reads = [0]
+		def getter():
+			reads[0] += 1
+
+			return dev.get_x()
+
+		dev = WithMethods()
+		res1 = resources.Resource(getter=getter, setter=dev.set_x)
+		res2 = res1.wrapped('wrapper', lambda x: 2 * x)
+
+		# Never.
+		eq_(res1.value, 5)
+		eq_(res1.value, 5)
+		eq_(reads, [2])
+
+		# Until set.
+		res1.cache_policy = res2.cache_policy = resources.cache_policies.until_set
+
+		eq_(res1.value, 5)
+		eq_(res1.value, 5)
+		eq_(res2.value, 10)
+		eq_(reads, [3])
+
+		## Setting through a wrapper affects the original.
+		res2.value = 6
+		eq_(res1.value, 6)
+		eq_(res2.value, 12)
+		eq_(reads, [4])
+
+		## Invalidation by hand.
+		dev.set_x(7)
+		eq_(res1.value, 6)
+		res1.invalidate_cache()
+		eq_(res1.value, 7)
+		eq_(reads, [5])
+
+		# TTL.
+		res1.cache_policy = resources.cache_policies.ttl
+
+		try:
+			res1.value
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+		try:
+			res1.cache_ttl = Quantity(1, 'm')
+		except IncompatibleDimensions:
+			pass
+		else:
+			assert False, 'Expected IncompatibleDimensions.'
+
+		res1.cache_ttl = Quantity(50, 'ms')
+
+		eq_(res1.value, 7)
+		eq_(reads, [5])
+
+		time.sleep(res1.cache_ttl.value * 1.5)
+
+		eq_(res1.value, 7)
+		eq_(res1.value, 7)
+		eq_(reads, [6])
+
+
+class RampTest(TestCase):
+	def testLockstep(self):
+		"""
+		Ramp several resources together.
+		"""
+
+		bufs = [[], []]
+		times = [[], []]
+		def setter(i, value):
+			bufs[i].append(value)
+			times[i].append(time.time())
+
+		res0 = resources.Resource(setter=partial(setter, 0))
+		res1 = resources.Resource(setter=partial(setter, 1))
+		res1.units = 'V'
+
+		ramp = resources.Ramp(delay=0.02)
+		ramp.add(res0, 0.0, 4.0, 5)
+		ramp.add(res1, 0, Quantity(1, 'V'), 2)
+
+		eq_(ramp.duration, 0.1)
+
+		start_time = time.time()
+		ramp.run()
+		time_diff = time.time() - start_time
+
+		assert time_diff > 0.1
+		assert time_diff < 0.2
+
+		eq_(bufs[0], [0.0, 1.0, 2.0, 3.0, 4.0])
+		eq_(bufs[1], [Quantity(0, 'V'), Quantity(1, 'V')])
+
+		# Both start together, and the last step of each is held for its share of the ramp.
+		assert abs(times[0][0] - times[1][0]) < 0.01
+		assert abs(times[1][1] - times[0][0] - 0.05) < 0.01
+
+	def testSlewRate(self):
+		"""
+		Slow down to respect the slew rate.
+		"""
+
+		res0 = resources.Resource(setter=lambda x: None)
+		res0.units = 'T'
+		res1 = resources.Resource(setter=lambda x: None)
+
+		try:
+			res0.slew_rate = Quantity(1, 'T')
+		except TypeError:
+			pass
+		else:
+			assert False, 'Expected TypeError.'
+
+		try:
+			res1.slew_rate = Quantity(1, 's-1')
+		except TypeError:
+			pass
+		else:
+			assert False, 'Expected TypeError.'
+
+		try:
+			res1.slew_rate = -5.0
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+		res0.slew_rate = Quantity(10, 'T.s-1')
+		res1.slew_rate = 100.0
+
+		ramp = resources.Ramp(delay=0.01)
+		ramp.add(res0, Quantity(0, 'T'), Quantity(-2, 'T'), 5)
+		eq_(ramp.duration, 0.25)
+
+		ramp.add(res1, 0.0, 100.0, 3)
+		eq_(ramp.duration, 1.5)
+
+	def testDeadlines(self):
+		"""
+		Slow writes do not accumulate extra delay.
+		"""
+
+		def setter(value):
+			time.sleep(0.03)
+
+		res = resources.Resource(setter=setter)
+
+		ramp = resources.Ramp(delay=0.05)
+		ramp.add(res, 0.0, 1.0, 10)
+
+		start_time = time.time()
+		ramp.run()
+		time_diff = time.time() - start_time
+
+		assert time_diff > 0.5
+		assert time_diff < 0.6
+
+	def testSameDevice(self):
+		"""
+		Resources on the same device are written by a single thread, while holding its lock.
+		"""
+
+		class Device(object):
+			def __init__(self):
+				self.lock = RLock()
+				self.threads = set()
+
+			def set_x(self, value):
+				assert self.lock._is_owned()
+				self.threads.add(current_thread())
+
+		dev = Device()
+		res0 = resources.Resource(dev, setter=dev.set_x)
+		res1 = resources.Resource(dev, setter=dev.set_x)
+		res2 = resources.Resource(setter=lambda x: None)
+
+		ramp = resources.Ramp(delay=0.01)
+		ramp.add(res0, 0.0, 1.0, 3)
+		ramp.add(res1, 0.0, 1.0, 3)
+		ramp.add(res2, 0.0, 1.0, 3)
+		ramp.run()
+
+		eq_(len(dev.threads), 1)
+
 
 class AcquisitionThreadTest(TestCase):
 	def testWithoutResource(self):
@@ -452,6 +685,112 @@ class AcquisitionThreadTest(TestCase):
 
 		eq_(buf, [])
 
+	def testBatches(self):
+		"""
+		Deliver values in batches, with their times.
+		"""
+
+		values = iter(xrange(100))
+		res = resources.Resource(getter=lambda: next(values))
+
+		buf = []
+		delay = Quantity(10, 'ms')
+
+		thr = resources.AcquisitionThread(delay, lambda *args: buf.append(args), res, batch_size=3)
+
+		start_time = time.time()
+		thr.start()
+		time.sleep(delay.value * 7.5)
+		thr.done = True
+		thr.join()
+
+		# The incomplete third batch is dropped.
+		eq_([x[0] for x in buf], [[0, 1, 2], [3, 4, 5]])
+
+		times = buf[0][1] + buf[1][1]
+		eq_(times, sorted(times))
+		assert start_time <= times[0] < times[-1] <= time.time()
+
+	def testBuffered(self):
+		"""
+		Each read of a buffered resource gives several samples, spread over the read.
+		"""
+
+		clock = [0.0]
+
+		def get_samples():
+			clock[0] += 0.4
+			return [1.0, 2.0, 3.0, 4.0]
+		res = resources.Resource(getter=get_samples)
+
+		buf = []
+		delay = Quantity(1, 's')
+
+		thr = resources.AcquisitionThread(delay, lambda *args: buf.append(args), res, buffered=True)
+		thr.clock = lambda: clock[0]
+
+		def sleep(duration):
+			clock[0] += duration
+			if clock[0] >= 2:
+				thr.done = True
+		thr.sleep = sleep
+
+		thr.run()
+
+		eq_(len(buf), 2)
+		eq_([x[0] for x in buf], [[1.0, 2.0, 3.0, 4.0]] * 2)
+		assert_array_almost_equal([x[1] for x in buf], [[0.1, 0.2, 0.3, 0.4], [1.1, 1.2, 1.3, 1.4]])
+
+	def testSchedule(self):
+		"""
+		Reads stay on schedule, however long each one takes.
+		"""
+
+		clock = [0.0]
+		durations = iter([0.3, 0.1, 0.5, 0.2, 2.5, 0.1])
+
+		def get_x():
+			start_time = clock[0]
+			clock[0] += next(durations)
+			return start_time
+		res = resources.Resource(getter=get_x)
+
+		buf = []
+		delay = Quantity(1, 's')
+
+		thr = resources.AcquisitionThread(delay, buf.append, res)
+		thr.clock = lambda: clock[0]
+
+		def sleep(duration):
+			clock[0] += duration
+			if len(buf) == 6:
+				thr.done = True
+		thr.sleep = sleep
+
+		thr.run()
+
+		# After falling behind, the schedule starts afresh.
+		eq_(buf, [0.0, 1.0, 2.0, 3.0, 4.0, 6.5])
+
+	def testDelay(self):
+		"""
+		The delay is converted when it is set.
+		"""
+
+		thr = resources.AcquisitionThread(Quantity(30, 'ms'), None)
+		eq_(thr.delay_value, 0.03)
+
+		thr.delay = Quantity(2, 's')
+		eq_(thr.delay, Quantity(2, 's'))
+		eq_(thr.delay_value, 2.0)
+
+		try:
+			thr.delay = Quantity(2, 'V')
+		except IncompatibleDimensions:
+			pass
+		else:
+			assert False, 'Expected IncompatibleDimensions.'
+
 
 if __name__ == '__main__':
 	main()
@@ -1,5 +1,9 @@
 from copy import deepcopy
 from nose.tools import assert_raises, eq_
+from numpy import array
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+import pickle
+import quantities as pq
 from unittest import main, TestCase
 
 from .. import units
@@ -79,11 +83,31 @@ class QuantityTest(TestCase):
 		# Insert fake unit.
 		assert 'ps' not in units.SIValues.units
 		units.SIValues.units.add('ps')
+		units.Quantity.units_cache.clear()
 
 		try:
 			assert_raises(ValueError, units.Quantity, 5, 'ps')
 		finally:
 			units.SIValues.units.remove('ps')
+			units.Quantity.units_cache.clear()
+
+	def testUnitsCache(self):
+		"""
+		Known units are not parsed again.
+		"""
+
+		record = units.Quantity.units_record('kg.ms-1')
+		assert units.Quantity.units_record('kg.ms-1') is record
+		eq_(record.pq_units, 'g*s**-1.0')
+
+		q1, q2 = units.Quantity(5, 'kg.ms-1'), units.Quantity('7 kg.ms-1')
+		assert q1._record is q2._record is record
+		eq_(q1.dimensions, q2.dimensions)
+		eq_(q2.original_value, 7)
+
+		# Even if they are forgotten, they can be parsed again.
+		units.Quantity.units_cache.clear()
+		eq_(units.Quantity(5, 'kg.ms-1'), q1)
 
 	def testAssertDimensions(self):
 		"""
@@ -212,6 +236,12 @@ class QuantityTest(TestCase):
 		eq_(q, units.Quantity(-1.5, 'J'))
 		eq_(q_mul, units.Quantity(0.5, 'J'))
 
+		# Not by quantities.
+		for other in [units.Quantity(2, 's'), units.QuantityArray([2], 's')]:
+			assert_raises(TypeError, lambda: q * other)
+			assert_raises(TypeError, lambda: other * q)
+			assert_raises(TypeError, lambda: q / other)
+
 	def testRepr(self):
 		"""
 		Ensure that repr() gives a useful value.
@@ -246,6 +276,140 @@ class QuantityTest(TestCase):
 
 		eq_(deepcopy(q), units.Quantity('100 ns.V2'))
 
+	def testExactArithmetic(self):
+		"""
+		Values are not rounded by arithmetic or copying.
+		"""
+
+		value = 1.2345678901234567
+		q = units.Quantity(value, 'mV')
+
+		eq_((q * 3).original_value, value * 3)
+		eq_((q / 7).original_value, value / 7)
+		eq_((q + units.Quantity(1, 'mV')).original_value, value + 1)
+		eq_((-q).original_value, -value)
+		eq_(abs(-q).original_value, value)
+		eq_(deepcopy(q).original_value, value)
+
+		# The units of the left operand are kept.
+		eq_((q - units.Quantity(1, 'V')).original_units, 'mV')
+
+		assert not hasattr(q, '__dict__')
+
+	def testPickle(self):
+		"""
+		Quantities survive pickling, including in the old format.
+		"""
+
+		q = units.Quantity(-12.5, 'kg.ms-1')
+
+		for protocol in [0, 2]:
+			result = pickle.loads(pickle.dumps(q, protocol))
+
+			eq_(result, q)
+			eq_(result.original_value, q.original_value)
+			eq_(result.original_units, q.original_units)
+
+		old = units.Quantity.__new__(units.Quantity)
+		old.__setstate__({'_q': pq.Quantity(0.0125, 'V'), 'original_units': 'mV', 'original_multiplier': -3})
+		eq_(old, units.Quantity(12.5, 'mV'))
+		eq_(str(old), '12.5 mV')
+
+
+class QuantityArrayTest(TestCase):
+	def testElements(self):
+		"""
+		Elements and slices keep the units.
+		"""
+
+		qa = units.QuantityArray([1, 2, 3, 4], 'mV')
+
+		eq_(len(qa), 4)
+		eq_(qa[1], units.Quantity(2, 'mV'))
+		eq_(list(qa), [units.Quantity(x, 'mV') for x in [1, 2, 3, 4]])
+		assert_array_almost_equal(qa.value, [0.001, 0.002, 0.003, 0.004])
+		assert_array_equal(qa.original_value, [1, 2, 3, 4])
+
+		sliced = qa[1:3]
+		assert isinstance(sliced, units.QuantityArray)
+		eq_(str(sliced), '[2, 3] mV')
+		eq_(repr(sliced), "QuantityArray([2.0, 3.0], 'mV')")
+
+	def testConstruction(self):
+		"""
+		Arrays from scalar quantities.
+		"""
+
+		qa = units.QuantityArray.from_quantities([units.Quantity(1, 'mV'), units.Quantity(0.5, 'V')])
+		eq_(qa.original_units, 'mV')
+		assert_array_almost_equal(qa.original_value, [1, 500])
+
+		qa = units.QuantityArray.linspace(units.Quantity(0, 'ms'), units.Quantity(1, 's'), 3)
+		assert_array_almost_equal(qa.original_value, [0, 500, 1000])
+
+		assert_raises(units.IncompatibleDimensions, units.QuantityArray.from_quantities,
+				[units.Quantity(1, 'mV'), units.Quantity(1, 's')])
+		assert_raises(ValueError, units.QuantityArray.from_quantities, [])
+
+	def testArithmetic(self):
+		"""
+		Vector arithmetic with matching dimensions.
+		"""
+
+		qa = units.QuantityArray([1, 2, 3], 'ms')
+
+		assert_array_almost_equal((qa + units.Quantity(1, 's')).original_value, [1001, 1002, 1003])
+		assert_array_almost_equal((units.Quantity(1, 's') - qa).original_value, [999, 998, 997])
+		assert_array_almost_equal((qa + qa.to('s')).original_value, [2, 4, 6])
+		assert_array_almost_equal((2 * qa / 4).original_value, [0.5, 1, 1.5])
+		assert_array_almost_equal((qa * array([1, 0, -1])).original_value, [1, 0, -3])
+		assert_array_almost_equal(abs(-qa).original_value, [1, 2, 3])
+
+		assert_raises(units.IncompatibleDimensions, lambda: qa + units.Quantity(1, 'V'))
+		assert_raises(TypeError, lambda: qa + 5)
+		assert_raises(TypeError, lambda: qa * units.Quantity(2, 's'))
+		assert_raises(TypeError, lambda: qa / qa)
+
+	def testComparison(self):
+		"""
+		Element-wise comparison.
+		"""
+
+		qa = units.QuantityArray([1, 2, 3], 'ms')
+
+		assert_array_equal(qa == units.Quantity(2, 'ms'), [False, True, False])
+		assert_array_equal(qa < units.Quantity(2, 'ms'), [True, False, False])
+		assert_array_equal(qa >= units.Quantity(0.002, 's'), [False, True, True])
+		assert_array_equal(qa == units.QuantityArray([0.001, 0, 3e-3], 's'), [True, False, True])
+
+		assert_raises(units.IncompatibleDimensions, lambda: qa < units.Quantity(1, 'V'))
+
+	def testConversion(self):
+		"""
+		Same values, different units.
+		"""
+
+		qa = units.QuantityArray([1, 2500], 'mV').to('V')
+
+		eq_(qa.original_units, 'V')
+		assert_array_almost_equal(qa.original_value, [0.001, 2.5])
+
+		assert_raises(units.IncompatibleDimensions, qa.to, 's')
+
+	def testAssertDimensions(self):
+		"""
+		Dimensions are compared with those of units, quantities, and arrays.
+		"""
+
+		qa = units.QuantityArray([1, 2], 'mV')
+
+		assert qa.assert_dimensions('kV', exception=False)
+		assert qa.assert_dimensions(units.Quantity(1, 'V'), exception=False)
+		assert qa.assert_dimensions(units.QuantityArray([3], 'V'))
+		assert not qa.assert_dimensions('s', exception=False)
+
+		assert_raises(units.IncompatibleDimensions, qa.assert_dimensions, units.Quantity(1, 's'))
+
 
 if __name__ == '__main__':
 	main()
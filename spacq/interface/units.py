@@ -1,11 +1,13 @@
 import logging
 log = logging.getLogger(__name__)
 
-from copy import deepcopy
+from collections import namedtuple
 from math import log10
-from numpy import allclose
+import numpy
 import quantities as pq
 
+from spacq.tool.box import LRUCache
+
 """
 Tools for working with quantities and units.
 """
@@ -55,11 +57,29 @@ class SIValues(object):
 	units.update(['Hz', 'J', 'N', 'T', 'V'])
 
 
+"""
+Everything needed to build a quantity from a units string:
+	pq_units: pq-acceptable notation without prefixes
+	multiplier: the power of 10 given by the prefixes
+	factor: the magnitude of 1 of the units in SI base units
+	dimensions: the simplified units and their exponents
+"""
+UnitsRecord = namedtuple('UnitsRecord', 'pq_units, multiplier, factor, dimensions')
+
+
 class Quantity(object):
 	"""
 	A quantity with a value and dimensions.
 	"""
 
+	__slots__ = ('_magnitude', '_record', 'original_units')
+
+	# Tolerances for equality, as in numpy.allclose.
+	rtol, atol = 1e-05, 1e-08
+
+	# Parsed units strings, since few distinct ones are ever used.
+	units_cache = LRUCache(256)
+
 	@staticmethod
 	def parse_units(string):
 		"""
@@ -114,6 +134,34 @@ class Quantity(object):
 
 		return ('*'.join(result_units), result_multiplier)
 
+	@classmethod
+	def units_record(cls, units):
+		"""
+		Find the UnitsRecord for a units string, parsing it only if it is unfamiliar.
+
+		Note: The cache must be cleared if SIValues is modified.
+		"""
+
+		try:
+			return cls.units_cache[units]
+		except KeyError:
+			pass
+
+		log.debug('Parsing units: {0}'.format(units))
+
+		# Remove unit prefixes.
+		pq_units, multiplier = cls.parse_units(units)
+
+		# Normalize to SI base units.
+		simplified = pq.Quantity(10 ** multiplier, pq_units).simplified
+		dimensions = frozenset((unit.symbol, exponent) for unit, exponent in
+				simplified.dimensionality.items())
+
+		result = UnitsRecord(pq_units, multiplier, float(simplified.magnitude), dimensions)
+		cls.units_cache[units] = result
+
+		return result
+
 	@staticmethod
 	def from_string(string):
 		"""
@@ -138,27 +186,53 @@ class Quantity(object):
 		if isinstance(value, basestring):
 			value, units = self.from_string(value)
 
-		# Always work with single floats.
-		value = float(value)
+		# Always work with single floats, in the given units.
+		self._magnitude = float(value)
+		self._record = self.units_record(units)
 
-		log.debug('Creating Quantity: {0}, {1}'.format(value, units))
+		self.original_units = units
 
-		# Remove unit prefixes.
-		new_units, multiplier = self.parse_units(units)
-		new_value = value * (10 ** multiplier)
+	@classmethod
+	def from_record(cls, value, record, units):
+		"""
+		Create a quantity from a value normalized to the base units and the UnitsRecord of the units, without any parsing.
+		"""
 
-		# Normalize to SI base units.
-		original_quantity = pq.Quantity(new_value, new_units)
-		self._q = original_quantity.simplified
+		return cls._from_magnitude(value / record.factor, record, units)
 
-		# Information to restore original representation.
-		self.original_units = units
-		self.original_multiplier = multiplier
+	@classmethod
+	def _from_magnitude(cls, magnitude, record, units):
+		result = cls.__new__(cls)
+		result._magnitude = magnitude
+		result._record = record
+		result.original_units = units
+
+		return result
+
+	def _other_magnitude(self, other):
+		"""
+		The magnitude of a quantity with matching dimensions, in the units of this quantity.
+		"""
+
+		try:
+			other_record = other._record
+		except AttributeError:
+			raise TypeError('Expected dimensions for "{0!r}"'.format(other))
+
+		if other_record is self._record:
+			return other._magnitude
+
+		self.assert_dimensions(other_record.dimensions)
 
-		# Find the normalization factor.
-		q, orig = self._q.magnitude, original_quantity.magnitude
-		if q != orig:
-			self.original_multiplier += log10(abs(q)) - log10(abs(orig))
+		return other._magnitude * other_record.factor / self._record.factor
+
+	@property
+	def original_multiplier(self):
+		"""
+		The power of 10 relating the original units to the SI base units.
+		"""
+
+		return log10(abs(self._record.factor))
 
 	@property
 	def dimensions(self):
@@ -166,7 +240,7 @@ class Quantity(object):
 		The set of simplified units and their exponents.
 		"""
 
-		return set(self._q.dimensionality.items())
+		return self._record.dimensions
 
 	@property
 	def value(self):
@@ -174,9 +248,7 @@ class Quantity(object):
 		The magnitude of the quantity, normalized to the base units.
 		"""
 
-		result = self._q.magnitude
-
-		return result.tolist()
+		return self._magnitude * self._record.factor
 
 	@property
 	def original_value(self):
@@ -184,7 +256,7 @@ class Quantity(object):
 		The magnitude of the quantity that matches the units.
 		"""
 
-		return self._q.magnitude / (10 ** self.original_multiplier)
+		return self._magnitude
 
 	def assert_dimensions(self, other, exception=True):
 		"""
@@ -195,8 +267,8 @@ class Quantity(object):
 
 		if isinstance(other, basestring):
 			# Given a units string.
-			other = Quantity(1, other).dimensions
-		elif isinstance(other, Quantity):
+			other = Quantity.units_record(other).dimensions
+		elif isinstance(other, (Quantity, QuantityArray)):
 			# Given a Quantity.
 			other = other.dimensions
 
@@ -209,14 +281,22 @@ class Quantity(object):
 
 	# FIXME: Python 2.7 provides functools.total_ordering()
 	def __eq__(self, other):
+		if isinstance(other, QuantityArray):
+			return NotImplemented
+
 		try:
 			self.assert_dimensions(other.dimensions)
 		except AttributeError:
 			raise TypeError('Expected dimensions for "{0!r}"'.format(other))
 
-		return allclose(self.value, other.value)
+		a, b = self.value, other.value
+
+		return abs(a - b) <= self.atol + self.rtol * abs(b)
 
 	def __lt__(self, other):
+		if isinstance(other, QuantityArray):
+			return NotImplemented
+
 		try:
 			self.assert_dimensions(other.dimensions)
 		except AttributeError:
@@ -237,50 +317,45 @@ class Quantity(object):
 		return not self <= other
 
 	def __abs__(self):
-		if self.value < 0:
-			return Quantity(abs(self.original_value), self.original_units)
+		if self._magnitude < 0:
+			return self._from_magnitude(-self._magnitude, self._record, self.original_units)
 		else:
 			return self
 
+	def __neg__(self):
+		return self._from_magnitude(-self._magnitude, self._record, self.original_units)
+
 	def __add__(self, other):
 		"""
 		Addition with matching dimensions.
 		"""
 
-		try:
-			self.assert_dimensions(other.dimensions)
-		except AttributeError:
-			raise TypeError('Expected dimensions for "{0!r}"'.format(other))
+		if isinstance(other, QuantityArray):
+			return NotImplemented
 
-		result = deepcopy(self)
-		result._q += other._q
-
-		return result
+		return self._from_magnitude(self._magnitude + self._other_magnitude(other),
+				self._record, self.original_units)
 
 	def __sub__(self, other):
 		"""
 		Subtraction with matching dimensions.
 		"""
 
-		try:
-			self.assert_dimensions(other.dimensions)
-		except AttributeError:
-			raise TypeError('Expected dimensions for "{0!r}"'.format(other))
-
-		result = deepcopy(self)
-		result._q -= other._q
+		if isinstance(other, QuantityArray):
+			return NotImplemented
 
-		return result
+		return self._from_magnitude(self._magnitude - self._other_magnitude(other),
+				self._record, self.original_units)
 
 	def __mul__(self, other):
 		"""
 		Multiplication by reals.
 		"""
 
-		result = deepcopy(self)
-		result._q *= other
+		if isinstance(other, (Quantity, QuantityArray)):
+			raise TypeError('Expected a real, not "{0!r}"'.format(other))
 
-		return result
+		return self._from_magnitude(self._magnitude * other, self._record, self.original_units)
 
 	def __rmul__(self, other):
 		return self * other
@@ -290,10 +365,10 @@ class Quantity(object):
 		Division by reals.
 		"""
 
-		result = deepcopy(self)
-		result._q /= other
+		if isinstance(other, (Quantity, QuantityArray)):
+			raise TypeError('Expected a real, not "{0!r}"'.format(other))
 
-		return result
+		return self._from_magnitude(self._magnitude / other, self._record, self.original_units)
 
 	def __repr__(self):
 		return '{0}(\'{1}\')'.format(self.__class__.__name__, str(self))
@@ -304,9 +379,245 @@ class Quantity(object):
 
 		return '{0:.10g} {1}'.format(value, symbol)
 
+	def __copy__(self):
+		return self._from_magnitude(self._magnitude, self._record, self.original_units)
+
 	def __deepcopy__(self, memo):
 		"""
-		Rather than copying anything, simply create a new instance.
+		Nothing is mutable, so the parts can be shared.
+		"""
+
+		return self.__copy__()
+
+	def __getstate__(self):
+		return (self._magnitude, self.original_units)
+
+	def __setstate__(self, state):
+		if isinstance(state, dict):
+			# Pickled before the units record existed.
+			if '_magnitude' in state:
+				magnitude = state['_magnitude']
+			else:
+				magnitude = float(state['_q'].magnitude) / 10 ** state['original_multiplier']
+
+			state = (magnitude, state['original_units'])
+
+		self._magnitude, self.original_units = state
+		self._record = self.units_record(self.original_units)
+
+
+class QuantityArray(object):
+	"""
+	An array of values which share units and dimensions.
+
+	Elements are obtained as Quantity objects, but bulk operations act on the whole array at once.
+	"""
+
+	# Take precedence over NumPy arrays in mixed arithmetic.
+	__array_priority__ = 1000
+
+	def __init__(self, values, units):
+		# Magnitudes in the given units.
+		self._magnitudes = numpy.array(values, dtype=float, ndmin=1)
+		self._record = Quantity.units_record(units)
+
+		self.original_units = units
+
+	@classmethod
+	def from_quantities(cls, quantities, units=None):
+		"""
+		Gather quantities into an array, in the given units or those of the first quantity.
+		"""
+
+		if units is None:
+			if not quantities:
+				raise ValueError('Units required for empty array.')
+
+			units = quantities[0].original_units
+
+		record = Quantity.units_record(units)
+
+		values = []
+		for q in quantities:
+			q.assert_dimensions(record.dimensions)
+			values.append(q.value / record.factor)
+
+		return cls(values, units)
+
+	@classmethod
+	def linspace(cls, value_from, value_to, steps):
+		"""
+		A linear space between two quantities, in the units of the first.
+		"""
+
+		value_from.assert_dimensions(value_to)
+
+		units = value_from.original_units
+		factor = Quantity.units_record(units).factor
+
+		return cls(numpy.linspace(value_from.original_value, value_to.value / factor, steps), units)
+
+	@property
+	def dimensions(self):
+		"""
+		The set of simplified units and their exponents.
+		"""
+
+		return self._record.dimensions
+
+	@property
+	def value(self):
+		"""
+		The magnitudes of the quantities, normalized to the base units.
+		"""
+
+		return self._magnitudes * self._record.factor
+
+	@property
+	def original_value(self):
+		"""
+		The magnitudes of the quantities that match the units.
+		"""
+
+		return self._magnitudes.copy()
+
+	def assert_dimensions(self, other, exception=True):
+		"""
+		Whether the dimensions match.
+
+		If exception is True and we would have returned False, raise an exception.
 		"""
 
-		return Quantity(str(self))
+		if isinstance(other, basestring):
+			# Given a units string.
+			other = Quantity.units_record(other).dimensions
+		elif isinstance(other, (Quantity, QuantityArray)):
+			# Given a Quantity.
+			other = other.dimensions
+
+		if self.dimensions == other:
+			return True
+		elif exception:
+			raise IncompatibleDimensions(self.dimensions, other)
+		else:
+			return False
+
+	def to(self, units):
+		"""
+		The same quantities in other units.
+		"""
+
+		self.assert_dimensions(units)
+
+		return QuantityArray(self.value / Quantity.units_record(units).factor, units)
+
+	def _other_value(self, other):
+		"""
+		The base-unit magnitude(s) of a quantity or array of quantities with matching dimensions.
+		"""
+
+		try:
+			self.assert_dimensions(other.dimensions)
+		except AttributeError:
+			raise TypeError('Expected dimensions for "{0!r}"'.format(other))
+
+		return other.value
+
+	def _with_magnitudes(self, magnitudes):
+		result = QuantityArray.__new__(QuantityArray)
+		result._magnitudes = magnitudes
+		result._record = self._record
+		result.original_units = self.original_units
+
+		return result
+
+	def __len__(self):
+		return len(self._magnitudes)
+
+	def __iter__(self):
+		record, units = self._record, self.original_units
+
+		return (Quantity._from_magnitude(float(x), record, units) for x in self._magnitudes)
+
+	def __getitem__(self, key):
+		result = self._magnitudes[key]
+
+		if isinstance(result, numpy.ndarray):
+			return self._with_magnitudes(result)
+		else:
+			return Quantity._from_magnitude(float(result), self._record, self.original_units)
+
+	def __eq__(self, other):
+		return numpy.isclose(self.value, self._other_value(other))
+
+	def __ne__(self, other):
+		return ~(self == other)
+
+	def __lt__(self, other):
+		return self.value < self._other_value(other)
+
+	def __le__(self, other):
+		return (self < other) | (self == other)
+
+	def __gt__(self, other):
+		return ~(self <= other)
+
+	def __ge__(self, other):
+		return ~(self < other)
+
+	def __abs__(self):
+		return self._with_magnitudes(abs(self._magnitudes))
+
+	def __neg__(self):
+		return self._with_magnitudes(-self._magnitudes)
+
+	def __add__(self, other):
+		"""
+		Addition with matching dimensions.
+		"""
+
+		return self._with_magnitudes(self._magnitudes + self._other_value(other) / self._record.factor)
+
+	def __radd__(self, other):
+		return self + other
+
+	def __sub__(self, other):
+		"""
+		Subtraction with matching dimensions.
+		"""
+
+		return self._with_magnitudes(self._magnitudes - self._other_value(other) / self._record.factor)
+
+	def __rsub__(self, other):
+		return -self + other
+
+	def __mul__(self, other):
+		"""
+		Multiplication by reals or arrays of reals.
+		"""
+
+		if isinstance(other, (Quantity, QuantityArray)):
+			raise TypeError('Expected reals, not "{0!r}"'.format(other))
+
+		return self._with_magnitudes(self._magnitudes * other)
+
+	def __rmul__(self, other):
+		return self * other
+
+	def __div__(self, other):
+		"""
+		Division by reals or arrays of reals.
+		"""
+
+		if isinstance(other, (Quantity, QuantityArray)):
+			raise TypeError('Expected reals, not "{0!r}"'.format(other))
+
+		return self._with_magnitudes(self._magnitudes / other)
+
+	def __repr__(self):
+		return '{0}({1!r}, {2!r})'.format(self.__class__.__name__, self._magnitudes.tolist(), self.original_units)
+
+	def __str__(self):
+		values = ', '.join('{0:.10g}'.format(x) for x in self._magnitudes)
+
+		return '[{0}] {1}'.format(values, self.original_units)
@@ -0,0 +1,160 @@
+from collections import defaultdict
+from itertools import product
+
+"""
+Adaptive sweep plans, which choose where to sample based on the measured values.
+"""
+
+
+class AdaptivePlan(object):
+	"""
+	Sweep positions which are refined where the measured values change fastest.
+
+	Positions are tuples of indices into the values of each order. The plan starts with a coarse grid, then repeatedly samples the midpoints between neighbouring sampled positions whose measured values differ the most, until the point budget is spent or there is nothing left to refine. Gaps across which nothing changes are never refined.
+
+	Every position is tagged with its refinement level: 0 for the coarse grid, and one more for each refinement.
+	"""
+
+	def __init__(self, group_lengths, max_points, coarse_steps=5, batch_size=None, measurement_index=0):
+		"""
+		group_lengths: The number of values in each order.
+		max_points: The total number of positions to sample.
+		coarse_steps: The number of values per order in the coarse grid.
+		batch_size: The maximum number of positions added by each refinement; the size of the coarse grid by default.
+		measurement_index: The measurement which guides the refinement.
+		"""
+
+		if max_points <= 0:
+			raise ValueError('Number of points must be positive, not "{0}".'.format(max_points))
+
+		if coarse_steps < 2:
+			raise ValueError('At least 2 coarse steps required, not "{0}".'.format(coarse_steps))
+
+		self.group_lengths = list(group_lengths)
+		self.max_points = max_points
+		self.coarse_steps = coarse_steps
+		self.batch_size = batch_size
+		self.measurement_index = measurement_index
+
+		self.reset()
+
+	def reset(self):
+		"""
+		Start over from the coarse grid.
+		"""
+
+		# Position -> refinement level, for every position which has been handed out.
+		self.levels = {}
+		# Position -> measured value, or None if it is unusable.
+		self.values = {}
+
+		self.level = 0
+		self.pending = self.coarse_grid()[:self.max_points]
+
+		if self.batch_size is None:
+			self.batch_size = len(self.pending)
+
+	def coarse_grid(self):
+		"""
+		Evenly spaced positions, including both ends of each order.
+		"""
+
+		axes = []
+		for length in self.group_lengths:
+			steps = min(self.coarse_steps, length)
+
+			if steps < 2:
+				axes.append([0])
+			else:
+				axes.append(sorted(set(int(round(i * (length - 1) / float(steps - 1))) for i in xrange(steps))))
+
+		return list(product(*axes))
+
+	@property
+	def num_points(self):
+		"""
+		The number of positions handed out so far.
+		"""
+
+		return len(self.levels)
+
+	@property
+	def exhausted(self):
+		"""
+		Whether there are no more positions to sample.
+		"""
+
+		if not self.pending:
+			self.refine()
+
+		return not self.pending
+
+	def next_indices(self):
+		"""
+		The indices of the next position to sample.
+		"""
+
+		if self.exhausted:
+			raise StopIteration()
+
+		position = self.pending.pop(0)
+		self.levels[position] = self.level
+
+		return list(position)
+
+	def level_of(self, indices):
+		return self.levels[tuple(indices)]
+
+	def record(self, indices, measurements):
+		"""
+		Note the measured values at a position.
+		"""
+
+		try:
+			value = measurements[self.measurement_index]
+			# Quantities are compared by their normalized values.
+			value = float(getattr(value, 'value', value))
+		except (IndexError, TypeError, ValueError):
+			value = None
+
+		self.values[tuple(indices)] = value
+
+	def refine(self):
+		"""
+		Choose the next batch of positions, in the order in which they should be visited.
+		"""
+
+		budget = min(self.batch_size, self.max_points - self.num_points)
+		if budget <= 0:
+			return
+
+		# Midpoint -> the largest change across a gap which it splits.
+		candidates = {}
+
+		for dim in xrange(len(self.group_lengths)):
+			# Positions which only differ along this order.
+			lines = defaultdict(list)
+			for position, value in self.values.items():
+				lines[position[:dim] + position[dim+1:]].append((position[dim], value))
+
+			for key, line in lines.items():
+				line.sort()
+
+				for (a, value_a), (b, value_b) in zip(line[:-1], line[1:]):
+					if b - a < 2 or value_a is None or value_b is None or value_a == value_b:
+						continue
+
+					midpoint = key[:dim] + ((a + b) // 2,) + key[dim:]
+					if midpoint in self.levels:
+						continue
+
+					candidates[midpoint] = max(candidates.get(midpoint, 0), abs(value_b - value_a))
+
+		if not candidates:
+			return
+
+		chosen = sorted(candidates, key=lambda x: (-candidates[x], x))[:budget]
+
+		self.level += 1
+		# Outer orders first, to keep transitions short.
+		self.pending = sorted(chosen)
@@ -0,0 +1,161 @@
+from numpy import array, asarray, empty, nan, zeros
+
+"""
+Measurements of a sweep arranged on the grid of its two innermost orders, as they are taken.
+"""
+
+
+def cell_edges(values):
+	"""
+	The bounds of a row of evenly spaced cells centred on the first and last values.
+	"""
+
+	first, last = values[0], values[-1]
+
+	if len(values) > 1:
+		half_step = 0.5 * (last - first) / (len(values) - 1)
+	else:
+		half_step = 0.5
+
+	return (first - half_step, last + half_step)
+
+
+class SweepGrid(object):
+	"""
+	A preallocated grid of the values measured by a sweep.
+
+	The columns correspond to the values of the innermost order of variables, and the rows to those of the next order
+	out; with fewer orders, there is a single row. Cells are placed by index, so the values of each order are assumed to
+	be evenly spaced. With more orders, each cell holds the latest value measured there.
+
+	Cells which have not been measured are NaN. The region which has changed since it was last taken is kept, so that
+	only it needs to be redrawn.
+	"""
+
+	def __init__(self, num_groups, x_values, y_values=None, x_label='', y_label=''):
+		"""
+		num_groups: Number of indices for each point of the sweep.
+		x_values, y_values: Values of the variables along each axis, in index order.
+		"""
+
+		if y_values is None:
+			y_values = [0.0]
+
+		self.num_groups = num_groups
+		self.x_label, self.y_label = x_label, y_label
+
+		self.x_values, self.y_values = asarray(x_values, dtype=float), asarray(y_values, dtype=float)
+
+		# Descending values are shown in ascending order.
+		self.x_flipped = len(self.x_values) > 1 and self.x_values[-1] < self.x_values[0]
+		self.y_flipped = len(self.y_values) > 1 and self.y_values[-1] < self.y_values[0]
+
+		self.values = empty((len(self.y_values), len(self.x_values)))
+		self.reset()
+
+	@classmethod
+	def from_variables(cls, variables):
+		"""
+		The grid for variables sorted and grouped by spacq.iteration.variables.sort_variables.
+
+		Each axis is labelled with, and takes its values from, the first variable of its order.
+		"""
+
+		if not variables:
+			raise ValueError('No variables')
+
+		axes = []
+		for group in variables[-2:]:
+			length = min(len(var) for var in group)
+			axes.append(([group[0].raw_value(i) for i in xrange(length)], group[0].name))
+
+		if len(axes) == 1:
+			(x_values, x_label), = axes
+
+			return cls(len(variables), x_values, x_label=x_label)
+		else:
+			(y_values, y_label), (x_values, x_label) = axes
+
+			return cls(len(variables), x_values, y_values, x_label, y_label)
+
+	@property
+	def shape(self):
+		return self.values.shape
+
+	@property
+	def x_bounds(self):
+		return cell_edges(self.x_values[::-1] if self.x_flipped else self.x_values)
+
+	@property
+	def y_bounds(self):
+		return cell_edges(self.y_values[::-1] if self.y_flipped else self.y_values)
+
+	def reset(self):
+		"""
+		Clear all the cells.
+		"""
+
+		self.values.fill(nan)
+
+		# (first row, last row, first column, last column)
+		self.dirty = (0, self.shape[0] - 1, 0, self.shape[1] - 1)
+
+	def add(self, indices, values):
+		"""
+		Place values measured at the given indices of the sweep (one sequence of indices per value).
+
+		Values which are not numbers are treated as missing.
+		"""
+
+		indices = asarray(indices, dtype=int)
+		if len(indices) == 0:
+			return
+
+		if indices.ndim != 2 or indices.shape[1] != self.num_groups:
+			raise ValueError('Expected {0} indices per value'.format(self.num_groups))
+
+		converted = []
+		for value in values:
+			try:
+				converted.append(float(getattr(value, 'value', value)))
+			except (TypeError, ValueError):
+				converted.append(nan)
+		converted = array(converted)
+
+		if len(converted) != len(indices):
+			raise ValueError('Mismatched lengths: {0} and {1}'.format(len(indices), len(converted)))
+
+		cols = indices[:,-1]
+		if self.x_flipped:
+			cols = self.shape[1] - 1 - cols
+
+		if self.num_groups > 1:
+			rows = indices[:,-2]
+			if self.y_flipped:
+				rows = self.shape[0] - 1 - rows
+		else:
+			rows = zeros(len(indices), dtype=int)
+
+		if (cols < 0).any() or (cols >= self.shape[1]).any() or (rows < 0).any() or (rows >= self.shape[0]).any():
+			raise ValueError('Indices out of range for a grid of shape {0}'.format(self.shape))
+
+		self.values[rows, cols] = converted
+
+		box = (rows.min(), rows.max(), cols.min(), cols.max())
+		if self.dirty is not None:
+			box = (min(box[0], self.dirty[0]), max(box[1], self.dirty[1]),
+					min(box[2], self.dirty[2]), max(box[3], self.dirty[3]))
+		self.dirty = box
+
+	def take_dirty(self):
+		"""
+		The (rows, columns) slices of the region which has changed since the last call, or None if nothing has.
+		"""
+
+		if self.dirty is None:
+			return None
+
+		row_min, row_max, col_min, col_max = self.dirty
+		self.dirty = None
+
+		return (slice(row_min, row_max + 1), slice(col_min, col_max + 1))
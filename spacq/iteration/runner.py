@@ -0,0 +1,548 @@
+import logging
+log = logging.getLogger(__name__)
+
+from argparse import ArgumentParser
+import csv
+from datetime import timedelta
+import json
+import os
+import pickle
+import sys
+from threading import Thread
+from time import localtime, time
+
+from spacq.interface.pulse.parser import PulseError
+from spacq.interface.pulse.program import Program
+from spacq.tool.box import flatten, sift
+
+from .adaptive import AdaptivePlan
+from .simulation import LatencyModel, SimulatedSweep
+from .sweep import Checkpoint, PulseConfiguration, SweepController
+from .variables import sort_variables, InputVariable, OutputVariable
+
+"""
+Sweeps without a GUI, configured from saved device and variable configurations.
+
+Run with: python -m spacq.iteration.runner --help
+"""
+
+
+def export_header(variables, measurement_variables, measurement_units, refined=False):
+	"""
+	The first row of an export file.
+	"""
+
+	return (['Time (s)'] +
+			['{0.name} ({0.units})'.format(var) if var.units is not None else var.name
+					for var in flatten(variables)] +
+			['{0.name} ({1})'.format(var, units) if units is not None else var.name
+					for var, units in zip(measurement_variables, measurement_units)] +
+			(['Refinement level'] if refined else []))
+
+def export_row(cur_time, values, measurement_values, level=None):
+	"""
+	A row of an export file.
+	"""
+
+	# Extract values out of quantities, since the units have already been taken care of in the header.
+	values = [x.original_value if hasattr(x, 'original_value') else x for x in values]
+	measurement_values = [x.original_value if hasattr(x, 'original_value') else x for x in measurement_values]
+
+	result = [cur_time] + values + measurement_values
+
+	if level is not None:
+		result.append(level)
+
+	return result
+
+def load_pickled(path):
+	"""
+	Unpickle data from a file.
+	"""
+
+	with open(path, 'rb') as f:
+		try:
+			return pickle.load(f)
+		except Exception as e:
+			# Wrap all problems.
+			raise IOError('Could not load data from "{0}".'.format(path), e)
+
+def connect_devices(device_configs):
+	"""
+	Connect to the configured devices, and find their labelled resources.
+
+	The result is a dictionary of resources by label.
+	"""
+
+	resources = {}
+
+	for dev_cfg in device_configs:
+		dev_cfg.connect()
+
+		for path, label in dev_cfg.resource_labels.items():
+			if label in resources:
+				raise ValueError('Conflicting resource: "{0}"'.format(label))
+
+			dev_cfg.resources[label] = dev_cfg.device.find_resource(path)
+			resources[label] = dev_cfg.resources[label]
+
+	return resources
+
+def gather_resources(resources, variables, measurement_variables):
+	"""
+	Match sorted output variables and input variables with their resources.
+
+	The result is a tuple of:
+		groups of (name, resource) pairs for the output variables
+		(name, resource) pairs for the input variables
+	"""
+
+	missing_resources = set()
+	unreadable_resources = set()
+	unwritable_resources = set()
+	mismatched_resources = []
+
+	output_resources = []
+	for group in variables:
+		group_resources = []
+
+		for var in group:
+			if var.resource_name == '':
+				group_resources.append((str(len(output_resources)), None))
+			elif var.resource_name not in resources:
+				missing_resources.add(var.resource_name)
+			elif not resources[var.resource_name].writable:
+				unwritable_resources.add(var.resource_name)
+			else:
+				resource = resources[var.resource_name]
+
+				if resource.units is not None:
+					if not (var.type == 'quantity' and
+							resource.verify_dimensions(var.units, exception=False, from_string=True)):
+						mismatched_resources.append('{0}/{1}'.format(var.resource_name, var.name))
+				elif var.type not in ['float', 'integer']:
+					mismatched_resources.append('{0}/{1}'.format(var.resource_name, var.name))
+
+				group_resources.append((var.resource_name, resource))
+
+		output_resources.append(tuple(group_resources))
+
+	measurement_resources = []
+	for var in measurement_variables:
+		if var.resource_name not in resources:
+			missing_resources.add(var.resource_name)
+		elif not resources[var.resource_name].readable:
+			unreadable_resources.add(var.resource_name)
+		else:
+			measurement_resources.append((var.resource_name, resources[var.resource_name]))
+
+	errors = []
+	for items, msg in [
+		(sorted(missing_resources), 'Missing resources'),
+		(sorted(unreadable_resources), 'Unreadable resources'),
+		(sorted(unwritable_resources), 'Unwritable resources'),
+		(mismatched_resources, 'Mismatched resources')]:
+
+		if items:
+			errors.append('{0}: {1}'.format(msg, ', '.join('"{0}"'.format(x) for x in items)))
+
+	if errors:
+		raise ValueError('\n'.join(errors))
+
+	return (output_resources, measurement_resources)
+
+def pulse_configuration(program, devices, awg, oscilloscope, channels):
+	"""
+	Prepare a pulse program to be run by the named devices.
+	"""
+
+	program = program.with_resources
+
+	try:
+		program.generate_waveforms(dry_run=True)
+	except PulseError as e:
+		raise ValueError('\n'.join(e[0]))
+
+	missing_devices = [name for name in [awg, oscilloscope] if name not in devices]
+	if missing_devices:
+		raise ValueError('Missing devices: {0}'.format(', '.join(missing_devices)))
+
+	pulse_awg = devices[awg].device
+	pulse_oscilloscope = devices[oscilloscope].device
+
+	actual_channels = range(1, len(pulse_awg.channels))
+	invalid_channels = [k for k, v in channels.items() if v not in actual_channels]
+	if invalid_channels:
+		raise ValueError('Invalid channels for: {0}'.format(', '.join(invalid_channels)))
+
+	try:
+		return PulseConfiguration(program, channels, pulse_awg, pulse_oscilloscope)
+	except TypeError as e:
+		raise ValueError(str(e))
+
+
+class SweepRunner(SweepController):
+	"""
+	A sweep which exports its data and reports its progress without a GUI.
+	"""
+
+	# Rows to keep before writing them out.
+	max_buf_size = 100
+
+	def __init__(self, resources, variables, num_items, measurement_resources, measurement_variables,
+			pulse_config=None, continuous=False, plan=None, export_path=None, progress_file=None,
+			progress_interval=1.0, json_progress=False):
+		"""
+		export_path: The CSV file to which rows are written, or None to discard them.
+		progress_file: The file to which progress is reported, or None for no reports.
+		progress_interval: The minimum time between progress reports, in s.
+		json_progress: Whether to report progress as JSON objects, one per line.
+		"""
+
+		SweepController.__init__(self, resources, variables, num_items, measurement_resources,
+				measurement_variables, pulse_config, continuous=continuous, plan=plan)
+
+		self.export_path = export_path
+		self.progress_file = progress_file
+		self.progress_interval = progress_interval
+		self.json_progress = json_progress
+
+		self.errors = []
+		self.last_report_time = None
+
+		self.export_file = None
+		self.buf = []
+		self.last_checkpoint = None
+
+		self.data_callback = self._data_callback
+		self.close_callback = self._close_callback
+		self.general_exception_handler = self._general_exception_handler
+		self.resource_exception_handler = self._resource_exception_handler
+
+	@property
+	def checkpoint_path(self):
+		return self.export_path + Checkpoint.extension
+
+	def _general_exception_handler(self, f, e):
+		log.error('Sweep error in "{0}": {1}'.format(f, str(e)))
+		self.errors.append(str(e))
+
+	def _resource_exception_handler(self, resource_name, e, write=True):
+		dir = 'writing to' if write else 'reading from'
+		log.error('Error {0} resource "{1}": {2}'.format(dir, resource_name, str(e)))
+		self.errors.append(str(e))
+
+		self.abort(fatal=write)
+
+	def open_export(self, resuming=False):
+		"""
+		Open the export file, writing the header unless continuing after existing data.
+		"""
+
+		if self.export_path is None:
+			return
+
+		self.export_file = open(self.export_path, 'a' if resuming else 'w')
+		self.export_csv = csv.writer(self.export_file)
+
+		if not resuming:
+			measurement_units = [resource.display_units for _, resource in self.measurement_resources]
+
+			self.export_csv.writerow(export_header(self.variables, self.measurement_variables,
+					measurement_units, self.plan is not None))
+
+	def flush(self):
+		if self.export_file is None:
+			return
+
+		self.export_csv.writerows(self.buf)
+		self.export_file.flush()
+		self.buf = []
+
+		# Only once the data is safely written.
+		if self.last_checkpoint is not None:
+			os.fsync(self.export_file.fileno())
+			self.last_checkpoint.save(self.checkpoint_path)
+			self.last_checkpoint = None
+
+	def report(self, force=False):
+		"""
+		Write out the progress of the sweep, at most once per interval unless forced.
+		"""
+
+		if self.progress_file is None:
+			return
+
+		now = time()
+		if not force and self.last_report_time is not None and now - self.last_report_time < self.progress_interval:
+			return
+		self.last_report_time = now
+
+		item = max(self.item, 0)
+		if self.first_time_point is not None:
+			elapsed_time = now - self.first_time_point
+		else:
+			elapsed_time = 0.0
+
+		remaining_time = None
+		if not self.continuous and 0 < item <= self.num_items:
+			remaining_time = elapsed_time * (self.num_items - item) / item
+
+		if self.json_progress:
+			msg = json.dumps({'item': item, 'num_items': self.num_items, 'stage': self.current_f,
+					'elapsed_time': elapsed_time, 'remaining_time': remaining_time,
+					'continuous_count': self.continuous_count, 'done': self.done})
+		else:
+			msg = '{0}/{1} ({2}%), elapsed {3}'.format(item, self.num_items,
+					100 * item // self.num_items if self.num_items > 0 else 0,
+					timedelta(seconds=int(elapsed_time)))
+
+			if remaining_time is not None:
+				msg += ', remaining {0}'.format(timedelta(seconds=int(remaining_time)))
+
+		self.progress_file.write(msg + '\n')
+		self.progress_file.flush()
+
+	def _data_callback(self, cur_time, values, measurement_values):
+		if self.export_file is not None:
+			if self.plan is not None:
+				self.buf.append(export_row(cur_time, values, measurement_values, self.current_level))
+			else:
+				self.buf.append(export_row(cur_time, values, measurement_values))
+				self.last_checkpoint = self.checkpoint()
+
+			if len(self.buf) >= self.max_buf_size:
+				self.flush()
+
+		self.report()
+
+	def _close_callback(self):
+		if self.export_file is not None:
+			self.flush()
+			self.export_file.close()
+
+			# A complete sweep has nothing to resume, but a failed one might.
+			finished = self.completed and not self.errors and not self.aborting
+			if finished and os.path.exists(self.checkpoint_path):
+				os.remove(self.checkpoint_path)
+
+		self.report(force=True)
+
+	def start(self, checkpoint=None):
+		"""
+		Run the sweep in the background, optionally continuing from a checkpoint.
+		"""
+
+		if checkpoint is not None:
+			self.resume(checkpoint)
+
+		self.open_export(resuming=checkpoint is not None)
+
+		thr = Thread(target=self.run)
+		thr.daemon = True
+		thr.start()
+
+		return thr
+
+	def wait(self, thr):
+		"""
+		Wait for the sweep to end, cancelling it cleanly on an interrupt.
+		"""
+
+		try:
+			# Joining with a timeout keeps the main thread responsive to interrupts.
+			while thr.is_alive():
+				thr.join(0.1)
+		except KeyboardInterrupt:
+			log.warning('Interrupted; cancelling the sweep.')
+
+			self.abort()
+
+			while thr.is_alive():
+				thr.join(0.1)
+
+
+def parse_channel(value):
+	try:
+		name, number = value.split('=')
+
+		return (name, int(number))
+	except ValueError:
+		raise ValueError('Invalid channel: "{0}"'.format(value))
+
+def build_runner(args, progress_file=sys.stdout):
+	"""
+	Create a SweepRunner from parsed command line arguments.
+
+	The result is a tuple of the runner and the checkpoint from which to resume, if any. For a dry run, the runner is a SimulatedSweep using mock devices.
+	"""
+
+	checkpoint = None
+	if args.resume is not None:
+		if not args.resume.endswith(Checkpoint.extension):
+			raise ValueError('Not a checkpoint file: "{0}"'.format(args.resume))
+
+		checkpoint = Checkpoint.load(args.resume)
+
+	devices = {}
+	for path in args.device:
+		dev_cfg = load_pickled(path)
+		devices[dev_cfg.name] = dev_cfg
+
+	all_variables = []
+	for path in args.variables:
+		all_variables.extend(load_pickled(path))
+	all_variables = [var for var in all_variables if var.enabled]
+
+	output_variables = sift(all_variables, OutputVariable)
+	input_variables = [var for var in sift(all_variables, InputVariable) if var.resource_name != '']
+
+	if not output_variables:
+		output_variables.append(OutputVariable(order=0, name='<Dummy>', enabled=True))
+
+	output_variables, num_items = sort_variables(output_variables)
+
+	plan = None
+	if args.adaptive is not None:
+		if checkpoint is not None:
+			raise ValueError('Adaptive sweeps cannot be resumed.')
+
+		if not input_variables:
+			raise ValueError('Adaptive sweeps require a measurement.')
+
+		plan = AdaptivePlan([min(len(var) for var in group) for group in output_variables], args.adaptive)
+		num_items = plan.max_points
+
+	if args.dry_run:
+		for dev_cfg in devices.values():
+			dev_cfg.mock = True
+
+	resources = connect_devices(devices.values())
+	output_resources, measurement_resources = gather_resources(resources, output_variables, input_variables)
+
+	pulse_config = None
+	if args.pulse is not None:
+		channels = dict(parse_channel(x) for x in args.channel)
+		pulse_config = pulse_configuration(Program.from_file(args.pulse), devices, args.awg,
+				args.oscilloscope, channels)
+
+	if args.dry_run:
+		latencies = None
+		if args.latencies is not None:
+			latencies = LatencyModel.load(args.latencies)
+
+		sweep = SimulatedSweep(output_resources, output_variables, num_items, measurement_resources,
+				input_variables, pulse_config, plan=plan, latencies=latencies)
+
+		return (sweep, checkpoint)
+
+	if checkpoint is not None:
+		export_path = args.resume[:-len(Checkpoint.extension)]
+		if not os.path.isfile(export_path):
+			raise ValueError('Missing export file: "{0}"'.format(export_path))
+	elif args.output is not None:
+		export_path = args.output
+	elif args.output_dir is not None:
+		# YYYY-MM-DD_HH-MM-SS.csv
+		name = '{0:04}-{1:02}-{2:02}_{3:02}-{4:02}-{5:02}.csv'.format(*localtime())
+		export_path = os.path.join(args.output_dir, name)
+	else:
+		export_path = None
+
+	if checkpoint is None and export_path is not None and os.path.exists(export_path):
+		raise ValueError('File exists: "{0}"'.format(export_path))
+
+	runner = SweepRunner(output_resources, output_variables, num_items, measurement_resources,
+			input_variables, pulse_config, continuous=args.continuous, plan=plan, export_path=export_path,
+			progress_file=None if args.quiet else progress_file, progress_interval=args.progress_interval,
+			json_progress=args.json)
+
+	return (runner, checkpoint)
+
+def format_estimate(sweep, json_format=False):
+	"""
+	Describe the outcome of a simulated sweep.
+	"""
+
+	phases = [(f, sweep.phase_times[f]) for f in SweepController.stages if sweep.phase_times[f] > 0]
+
+	if json_format:
+		return json.dumps({'estimated_time': sweep.elapsed_time, 'num_items': sweep.num_simulated,
+				'phase_times': dict(phases)})
+
+	lines = ['Estimated time for {0} items: {1}'.format(sweep.num_simulated,
+			timedelta(seconds=int(sweep.elapsed_time)))]
+	for f, phase_time in phases:
+		lines.append('  {0}: {1} ({2}%)'.format(f, timedelta(seconds=int(phase_time)),
+				int(100 * phase_time / sweep.elapsed_time)))
+
+	return '\n'.join(lines)
+
+def main(argv=None, progress_file=sys.stdout):
+	parser = ArgumentParser(description='Run a sweep without a GUI.')
+	parser.add_argument('-d', '--device', action='append', default=[], metavar='FILE',
+			help='saved device configuration (.dev); may be repeated')
+	parser.add_argument('-v', '--variables', action='append', default=[], metavar='FILE',
+			help='saved variables (.var); may be repeated')
+	parser.add_argument('-o', '--output', metavar='FILE', help='file to which to export the data')
+	parser.add_argument('--output-dir', metavar='DIR', help='directory in which to export the data to a new file')
+	parser.add_argument('--resume', metavar='FILE', help='checkpoint (.checkpoint) of a sweep to continue')
+	parser.add_argument('--continuous', action='store_true', help='repeat the sweep until interrupted')
+	parser.add_argument('--adaptive', type=int, metavar='POINTS', help='refine the sweep adaptively, up to POINTS points')
+	parser.add_argument('--pulse', metavar='FILE', help='pulse program to run at every point')
+	parser.add_argument('--awg', metavar='DEVICE', help='device which outputs the pulse program')
+	parser.add_argument('--oscilloscope', metavar='DEVICE', help='device which acquires the pulse program')
+	parser.add_argument('--channel', action='append', default=[], metavar='OUTPUT=NUMBER',
+			help='AWG channel for a pulse program output; may be repeated')
+	parser.add_argument('--dry-run', action='store_true',
+			help='only estimate how long the sweep would take, using mock devices')
+	parser.add_argument('--latencies', metavar='FILE', help='resource latencies for a dry run')
+	parser.add_argument('--record-latencies', metavar='FILE',
+			help='record the resource latencies of the sweep, adding to any already in the file')
+	parser.add_argument('--json', action='store_true', help='report progress as JSON objects, one per line')
+	parser.add_argument('--progress-interval', type=float, default=1.0, metavar='SECONDS',
+			help='minimum time between progress reports')
+	parser.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+	args = parser.parse_args(argv)
+
+	try:
+		runner, checkpoint = build_runner(args, progress_file)
+
+		if args.dry_run:
+			if checkpoint is not None:
+				runner.resume(checkpoint)
+
+			runner.run()
+			progress_file.write(format_estimate(runner, args.json) + '\n')
+
+			return 0
+
+		latencies = None
+		if args.record_latencies is not None:
+			if os.path.exists(args.record_latencies):
+				latencies = LatencyModel.load(args.record_latencies)
+			else:
+				latencies = LatencyModel()
+
+			latencies.instrument(runner)
+
+		thr = runner.start(checkpoint)
+	except Exception as e:
+		log.error(str(e))
+		return 2
+
+	runner.wait(thr)
+
+	if latencies is not None:
+		latencies.save(args.record_latencies)
+
+	if runner.errors or runner.aborting:
+		return 1
+	else:
+		return 0
+
+
+if __name__ == '__main__':
+	logging.basicConfig(level=logging.WARNING)
+
+	sys.exit(main())
@@ -0,0 +1,241 @@
+from collections import defaultdict
+import json
+from random import Random
+from threading import Lock
+from time import time
+
+from spacq.interface.resources import Ramp
+
+from .sweep import update_current_f, SweepController
+
+"""
+Dry runs of sweeps, which predict how long they would take without touching any devices.
+"""
+
+
+class VirtualClock(object):
+	"""
+	A clock which only advances when asked to sleep.
+	"""
+
+	def __init__(self, start=0.0):
+		self.now = start
+
+	def time(self):
+		return self.now
+
+	def sleep(self, delay):
+		if delay > 0:
+			self.now += delay
+
+
+class LatencyModel(object):
+	"""
+	The typical time in s taken to write to and read from each resource.
+
+	Times can be set directly, or recorded from real sweeps; recorded times are averaged.
+	"""
+
+	kinds = ['write', 'read']
+
+	def __init__(self, default_write=0.0, default_read=0.0):
+		self.defaults = {'write': default_write, 'read': default_read}
+
+		self.lock = Lock()
+		# Kind -> resource name -> [count, total time].
+		self.samples = dict((kind, {}) for kind in self.kinds)
+
+	def verify_kind(self, kind):
+		if kind not in self.kinds:
+			raise ValueError('Invalid kind: {0}'.format(kind))
+
+	def set(self, name, kind, duration):
+		"""
+		Use a fixed time for a resource.
+		"""
+
+		self.verify_kind(kind)
+
+		with self.lock:
+			self.samples[kind][name] = [1, duration]
+
+	def record(self, name, kind, duration):
+		"""
+		Add a measured time for a resource.
+		"""
+
+		self.verify_kind(kind)
+
+		with self.lock:
+			sample = self.samples[kind].setdefault(name, [0, 0.0])
+			sample[0] += 1
+			sample[1] += duration
+
+	def latency(self, name, kind):
+		"""
+		The expected time for a resource.
+		"""
+
+		self.verify_kind(kind)
+
+		try:
+			count, total = self.samples[kind][name]
+		except KeyError:
+			return self.defaults[kind]
+
+		return total / count
+
+	def instrument(self, sweep):
+		"""
+		Record the time taken by every write and read during a sweep.
+		"""
+
+		write_resource, read_resource = sweep.write_resource, sweep.read_resource
+
+		def timed_write_resource(name, resource, value):
+			start_time = time()
+			write_resource(name, resource, value)
+			self.record(name, 'write', time() - start_time)
+
+		def timed_read_resource(name, resource, save_callback):
+			start_time = time()
+			read_resource(name, resource, save_callback)
+			self.record(name, 'read', time() - start_time)
+
+		sweep.write_resource, sweep.read_resource = timed_write_resource, timed_read_resource
+
+	def save(self, path):
+		with open(path, 'w') as f:
+			json.dump({'defaults': self.defaults, 'samples': self.samples}, f, indent=1, separators=(',', ': '),
+					sort_keys=True)
+
+	@classmethod
+	def load(cls, path):
+		with open(path) as f:
+			try:
+				data = json.load(f)
+
+				result = cls(data['defaults']['write'], data['defaults']['read'])
+				for kind in cls.kinds:
+					for name, (count, total) in data['samples'][kind].items():
+						result.samples[kind][name] = [count, total]
+			except (KeyError, TypeError, ValueError) as e:
+				raise ValueError('Invalid latency model: {0}'.format(e))
+
+		return result
+
+
+class SimulatedSweep(SweepController):
+	"""
+	A sweep which pretends to access its resources, advancing a virtual clock by their latencies instead.
+
+	After running, phase_times holds the time spent in each stage of the sweep, elapsed_time the total, and num_simulated the number of items.
+	"""
+
+	def __init__(self, resources, variables, num_items, measurement_resources, measurement_variables,
+			pulse_config=None, plan=None, latencies=None, seed=0):
+		"""
+		latencies: A LatencyModel for the resources; by default, all accesses are instantaneous.
+		seed: For the random values which are "measured", so that adaptive sweeps use their whole budget.
+		"""
+
+		# A single pass is simulated, regardless of how the sweep would be run.
+		SweepController.__init__(self, resources, variables, num_items, measurement_resources,
+				measurement_variables, pulse_config, continuous=False, plan=plan)
+
+		if latencies is None:
+			latencies = LatencyModel()
+
+		self.latencies = latencies
+		self.random = Random(seed)
+
+		self.clock = VirtualClock()
+		self.time = self.clock.time
+
+		self.phase_times = defaultdict(float)
+		self.num_simulated = 0
+
+		self.access_lock = Lock()
+		# Device lock -> total latency of the accesses since the last settle.
+		self.pending_accesses = defaultdict(float)
+
+	@property
+	def elapsed_time(self):
+		return self.clock.now
+
+	def sleep(self, delay):
+		if delay > 0:
+			self.phase_times[self.current_f] += delay
+			self.clock.sleep(delay)
+
+	def access(self, name, resource, kind):
+		"""
+		Note an access, to be accounted for by the next settle.
+		"""
+
+		# Accesses to the same device are serialized by its lock.
+		lock = getattr(resource.obj, 'lock', None)
+		if lock is None:
+			lock = name
+
+		with self.access_lock:
+			self.pending_accesses[lock] += self.latencies.latency(name, kind)
+
+	def settle(self):
+		"""
+		Wait for all the accesses, which run in parallel across devices.
+		"""
+
+		with self.access_lock:
+			delay = max(self.pending_accesses.values()) if self.pending_accesses else 0
+			self.pending_accesses.clear()
+
+		self.sleep(delay)
+
+	def write_resource(self, name, resource, value):
+		self.access(name, resource, 'write')
+
+	def read_resource(self, name, resource, save_callback):
+		self.access(name, resource, 'read')
+
+		save_callback(self.random.random())
+
+	def ramp(self, resources, values_from, values_to, steps):
+		ramp = Ramp()
+
+		durations = [0]
+		for (name, resource), value_from, value_to, resource_steps in zip(resources,
+				values_from, values_to, steps):
+			if resource is None:
+				continue
+
+			ramp.add(resource, value_from, value_to, resource_steps)
+
+			# Each step takes at least as long as the write.
+			_, values, _ = ramp.entries[-1]
+			durations.append(len(values) * max(ramp.period(resource, values), self.latencies.latency(name, 'write')))
+
+		self.sleep(max(max(durations), ramp.duration))
+
+	def write(self):
+		result = SweepController.write(self)
+		self.settle()
+
+		return result
+
+	@update_current_f
+	def pulse(self):
+		if self.pulse_config.channels:
+			program = self.pulse_config.program
+
+			self.sleep(self.trigger_ready_time + program.times_average * program.acq_delay.value)
+
+		return self.read
+
+	def read(self):
+		result = SweepController.read(self)
+		self.settle()
+
+		self.num_simulated += 1
+
+		return result
@@ -2,10 +2,13 @@ import logging
 log = logging.getLogger(__name__)
 
 from functools import partial, wraps
-from itertools import izip, repeat
+from itertools import repeat
+import json
+import os
 from threading import Condition, Thread
 from time import sleep, time
 
+from spacq.interface.resources import Ramp
 from spacq.tool.box import flatten
 
 
@@ -51,6 +54,54 @@ class PulseConfiguration(object):
 		self.oscilloscope = oscilloscope
 
 
+class Checkpoint(object):
+	"""
+	The position of a sweep after a completed item, from which it can be resumed.
+	"""
+
+	# Appended to the path of the export file.
+	extension = '.checkpoint'
+
+	def __init__(self, item, steps_taken, reversed, group_lengths, group_names, continuous_count=0,
+			elapsed_time=0.0):
+		self.item = item
+		self.steps_taken = list(steps_taken)
+		self.reversed = list(reversed)
+		self.group_lengths = list(group_lengths)
+		self.group_names = [list(names) for names in group_names]
+		self.continuous_count = continuous_count
+		self.elapsed_time = elapsed_time
+
+	def save(self, path):
+		"""
+		Write the checkpoint, replacing any previous one only once it is complete.
+		"""
+
+		tmp_path = path + '.tmp'
+
+		with open(tmp_path, 'w') as f:
+			json.dump(self.__dict__, f)
+			f.flush()
+			os.fsync(f.fileno())
+
+		try:
+			os.rename(tmp_path, path)
+		except OSError:
+			# Windows does not replace existing files.
+			os.remove(path)
+			os.rename(tmp_path, path)
+
+	@classmethod
+	def load(cls, path):
+		with open(path) as f:
+			values = json.load(f)
+
+		try:
+			return cls(**dict((str(k), v) for k, v in values.items()))
+		except TypeError:
+			raise ValueError('Invalid checkpoint: {0}'.format(path))
+
+
 class SweepController(object):
 	"""
 	A simple controller for a sweep of several variables.
@@ -61,8 +112,22 @@ class SweepController(object):
 	|________________________________________________________________________|
 	"""
 
+	# The functions of the sweep, in order.
+	stages = ['init', 'next', 'transition', 'write', 'dwell', 'pulse', 'read', 'ramp_down', 'end']
+
+	# How long to wait for the oscilloscope to ready its trigger, in s.
+	trigger_ready_time = 1
+
+	# The clock, which may be replaced (for example, by a virtual clock for simulations).
+	time = staticmethod(time)
+	sleep = staticmethod(sleep)
+
 	def __init__(self, resources, variables, num_items, measurement_resources, measurement_variables,
-			pulse_config=None, continuous=False):
+			pulse_config=None, continuous=False, plan=None):
+		"""
+		plan: If given, an object (such as spacq.iteration.adaptive.AdaptivePlan) which chooses the indices of the values of every order, instead of going through all of them in order; num_items is then the maximum number of items.
+		"""
+
 		self.resources = resources
 		self.variables = variables
 		self.num_items = num_items
@@ -70,6 +135,7 @@ class SweepController(object):
 		self.measurement_variables = measurement_variables
 		self.pulse_config = pulse_config
 		self.continuous = continuous
+		self.plan = plan
 
 		# The callbacks should be set before calling run(), if necessary.
 		self.data_callback, self.close_callback, self.write_callback, self.read_callback = [None] * 4
@@ -90,38 +156,92 @@ class SweepController(object):
 		self.aborting = False
 		self.abort_fatal = False
 
-		self.sweep_start_time = time()
+		self.sweep_start_time = self.time()
 		self.first_time_point = None
 
-	def create_iterator(self, pos):
+		self.group_lengths = [min(len(var) for var in group) for group in self.variables]
+		# Snake groups alternate direction every time they roll over.
+		self.snake_groups = [any(var.snake for var in group) for group in self.variables]
+
+		# Number of completed loops of a continuous sweep.
+		self.continuous_count = 0
+		# Checkpoint from which to continue, instead of starting at the beginning.
+		self.resume_checkpoint = None
+
+	@property
+	def completed(self):
+		"""
+		Whether every item of the sweep has been taken.
+		"""
+
+		return self.item >= self.num_items or (self.plan is not None and self.plan.exhausted)
+
+	def checkpoint(self):
+		"""
+		The current position of the sweep.
+		"""
+
+		if self.first_time_point is not None:
+			elapsed_time = self.time() - self.first_time_point
+		else:
+			elapsed_time = 0.0
+
+		return Checkpoint(self.item, self.steps_taken, self.reversed, self.group_lengths,
+				[[var.name for var in group] for group in self.variables], self.continuous_count,
+				elapsed_time)
+
+	def resume(self, checkpoint):
+		"""
+		Continue from the item after the checkpoint, rather than from the beginning.
+
+		Must be called before running the sweep.
+		"""
+
+		if self.plan is not None:
+			raise ValueError('Cannot resume a planned sweep.')
+
+		group_names = [[var.name for var in group] for group in self.variables]
+
+		if checkpoint.group_lengths != self.group_lengths or checkpoint.group_names != group_names:
+			raise ValueError('Checkpoint does not match the variables.')
+
+		self.resume_checkpoint = checkpoint
+
+	def group_values(self, pos, index):
+		"""
+		The values of an order of variables at an index.
 		"""
-		Create an iterator for an order of variables.
+
+		return tuple(var[index] for var in self.variables[pos])
+
+	def group_index(self, pos):
+		"""
+		The true index of the current values of an order of variables, accounting for direction.
 		"""
 
-		return izip(*(iter(var) for var in self.variables[pos]))
+		if self.reversed[pos]:
+			return self.group_lengths[pos] - 1 - self.steps_taken[pos]
+		else:
+			return self.steps_taken[pos]
 
 	def ramp(self, resources, values_from, values_to, steps):
 		"""
-		Slowly sweep the resources.
+		Slowly sweep the resources, all together.
 		"""
 
-		thrs = []
+		ramp = Ramp()
 		for (name, resource), value_from, value_to, resource_steps in zip(resources,
 				values_from, values_to, steps):
 			if resource is None:
 				continue
 
-			kwargs = {}
+			exception_callback = None
 			if self.resource_exception_handler is not None:
-				kwargs['exception_callback'] = partial(self.resource_exception_handler, name, write=True)
+				exception_callback = partial(self.resource_exception_handler, name, write=True)
 
-			thr = Thread(target=resource.sweep, args=(value_from, value_to, resource_steps), kwargs=kwargs)
-			thrs.append(thr)
-			thr.daemon = True
-			thr.start()
+			ramp.add(resource, value_from, value_to, resource_steps, exception_callback)
 
-		for thr in thrs:
-			thr.join()
+		ramp.run()
 
 	def write_resource(self, name, resource, value):
 		"""
@@ -198,12 +318,38 @@ class SweepController(object):
 		Initialize values and possibly devices.
 		"""
 
-		self.iterators = None
+		self.steps_taken = None
+		self.current_indices = None
+		# Refinement level of the current values, for planned sweeps.
+		self.current_level = None
 		self.current_values = None
 		self.last_values = None
 
 		self.item = -1
 
+		if self.plan is not None:
+			self.plan.reset()
+
+		if self.resume_checkpoint is not None:
+			checkpoint, self.resume_checkpoint = self.resume_checkpoint, None
+			self.continuous_count = checkpoint.continuous_count
+
+			if checkpoint.item < self.num_items - 1:
+				log.debug('Resuming after item {0}'.format(checkpoint.item))
+
+				self.item = checkpoint.item
+				self.steps_taken = list(checkpoint.steps_taken)
+				self.reversed = list(checkpoint.reversed)
+
+				# Keep the times continuous.
+				self.first_time_point = self.time() - checkpoint.elapsed_time
+			elif self.continuous:
+				# The loop was complete, so start the next one.
+				self.continuous_count += 1
+			else:
+				# Nothing left to do.
+				return
+
 		if not self.devices_configured:
 			log.debug('Configuring devices')
 
@@ -222,34 +368,71 @@ class SweepController(object):
 	@update_current_f
 	def next(self):
 		"""
-		Get the next set of values from the iterators.
+		Get the next set of values.
+
+		Snake groups reverse direction instead of returning to their first values when they roll over; the current indices are always the true positions of the values.
 		"""
 
 		self.item += 1
 		if self.current_values is not None:
 			self.last_values = self.current_values[:]
 
-		if self.iterators is None:
+		if self.plan is not None:
+			indices = self.plan.next_indices()
+
+			# Any order may move, by any amount.
+			if self.current_indices is None:
+				self.changed_indices = range(len(self.variables))
+			else:
+				self.changed_indices = [pos for pos, (a, b) in enumerate(zip(self.current_indices, indices))
+						if a != b]
+
+			self.current_indices = indices
+
+			if self.current_values is None:
+				self.current_values = [None] * len(self.variables)
+
+			for pos in self.changed_indices:
+				self.current_values[pos] = self.group_values(pos, indices[pos])
+
+			self.current_level = self.plan.level_of(indices)
+
+			return self.transition
+
+		if self.steps_taken is None:
 			# First time around.
-			self.iterators = []
-			for pos in xrange(len(self.variables)):
-				self.iterators.append(self.create_iterator(pos))
+			num_groups = len(self.variables)
 
-			self.current_values = [it.next() for it in self.iterators]
-			self.changed_indices = range(len(self.variables))
+			self.steps_taken = [0] * num_groups
+			self.reversed = [False] * num_groups
 		else:
 			pos = len(self.variables) - 1
 			while pos >= 0:
-				try:
-					self.current_values[pos] = self.iterators[pos].next()
+				if self.steps_taken[pos] + 1 < self.group_lengths[pos]:
+					self.steps_taken[pos] += 1
 					break
-				except StopIteration:
-					self.iterators[pos] = self.create_iterator(pos)
-					self.current_values[pos] = self.iterators[pos].next()
 
-					pos -= 1
+				# Roll over.
+				self.steps_taken[pos] = 0
+				if self.snake_groups[pos]:
+					self.reversed[pos] = not self.reversed[pos]
+
+				pos -= 1
+
+			# Rolled-over snake groups stay where they are.
+			self.changed_indices = [x for x in range(pos, len(self.variables))
+					if x == pos or not self.snake_groups[x]]
 
-			self.changed_indices = range(pos, len(self.variables))
+		self.current_indices = [self.group_index(pos) for pos in xrange(len(self.variables))]
+
+		if self.current_values is None:
+			# Starting or resuming, so everything is new.
+			self.changed_indices = range(len(self.variables))
+			self.current_values = [self.group_values(pos, index) for pos, index in
+					enumerate(self.current_indices)]
+		else:
+			for pos in self.changed_indices:
+				self.current_values[pos] = self.group_values(pos, self.current_indices[pos])
 
 		return self.transition
 
@@ -281,7 +464,10 @@ class SweepController(object):
 			self.ramp(resources, from_values, to_values, steps)
 		else:
 			# The first changed group is simply stepping; all others rolled over.
-			affected_groups = self.changed_indices[1:]
+			if self.plan is not None:
+				affected_groups = self.changed_indices
+			else:
+				affected_groups = self.changed_indices[1:]
 
 			steps, resources, from_values, to_values = [], [], [], []
 
@@ -334,7 +520,7 @@ class SweepController(object):
 		"""
 
 		delay = max(var._wait.value for pos in self.changed_indices for var in self.variables[pos])
-		sleep(delay)
+		self.sleep(delay)
 
 		if self.pulse_config is not None:
 			return self.pulse
@@ -392,7 +578,7 @@ class SweepController(object):
 
 			osc.acquiring = True
 			# Wait for the oscilloscope to ready the trigger.
-			sleep(1)
+			self.sleep(self.trigger_ready_time)
 
 			# All together now!
 			trigger = awg.trigger
@@ -402,11 +588,11 @@ class SweepController(object):
 				trigger()
 				awg.opc
 
-				end_time = time() + delay
-				time_diff = end_time - time()
+				end_time = self.time() + delay
+				time_diff = end_time - self.time()
 				while time_diff > 0:
-					sleep(time_diff)
-					time_diff = end_time - time()
+					self.sleep(time_diff)
+					time_diff = end_time - self.time()
 
 			osc.opc
 
@@ -440,16 +626,19 @@ class SweepController(object):
 		for thr in thrs:
 			thr.join()
 
+		if self.plan is not None:
+			self.plan.record(self.current_indices, measurements)
+
 		if self.data_callback is not None:
 			if self.first_time_point is None:
 				cur_time = 0
-				self.first_time_point = time()
+				self.first_time_point = self.time()
 			else:
-				cur_time = time() - self.first_time_point
+				cur_time = self.time() - self.first_time_point
 
 			self.data_callback(cur_time, tuple(flatten(self.current_values)), tuple(measurements))
 
-		if self.item == self.num_items - 1:
+		if self.item == self.num_items - 1 or (self.plan is not None and self.plan.exhausted):
 			self.item += 1
 
 			return self.ramp_down
@@ -486,6 +675,8 @@ class SweepController(object):
 		self.ramp(resources, from_values, to_values, steps)
 
 		if self.continuous and not self.last_continuous:
+			self.continuous_count += 1
+
 			return self.init
 
 	@update_current_f
@@ -0,0 +1,304 @@
+from argparse import ArgumentParser
+from collections import defaultdict
+from functools import wraps
+import gc
+import json
+from os import path
+import sys
+import threading
+from time import time
+
+from spacq.devices.agilent.mock.mock_dm34410a import MockDM34410A
+from spacq.devices.iqc.mock.mock_voltage_source import MockVoltageSource
+from spacq.devices.tektronix.mock.mock_awg5014b import MockAWG5014B
+from spacq.devices.tektronix.mock.mock_dpo7104 import MockDPO7104
+from spacq.interface import resources
+from spacq.interface.pulse.program import Program
+from spacq.interface.units import Quantity
+
+from .. import sweep
+from ..variables import sort_variables, InputVariable, OutputVariable, LinSpaceConfig
+
+"""
+Benchmarks for sweeps, using mock devices.
+
+Run with: python -m spacq.iteration.tests.benchmark_sweep [--save-baseline] [scenario ...]
+"""
+
+
+resource_dir = path.join(path.dirname(__file__), 'resources')
+baseline_path = path.join(resource_dir, 'benchmark_sweep.json')
+
+
+class BenchmarkSweep(sweep.SweepController):
+	"""
+	A sweep which times its stages.
+	"""
+
+	# Only the overhead of running pulse programs is of interest.
+	trigger_ready_time = 0
+
+	def __init__(self, *args, **kwargs):
+		sweep.SweepController.__init__(self, *args, **kwargs)
+
+		self.phase_times = defaultdict(float)
+
+		for name in self.stages:
+			setattr(self, name, self.timed(getattr(self, name)))
+
+	def timed(self, f):
+		@wraps(f)
+		def wrapped():
+			start_time = time()
+
+			try:
+				return f()
+			finally:
+				self.phase_times[f.__name__] += time() - start_time
+
+		return wrapped
+
+
+class CountingThread(threading.Thread):
+	"""
+	A thread which keeps track of how many threads are started.
+	"""
+
+	lock = threading.Lock()
+
+	started = 0
+	peak = 0
+
+	@classmethod
+	def reset(cls):
+		cls.started = 0
+		cls.peak = 0
+
+	def start(self):
+		with self.lock:
+			CountingThread.started += 1
+			CountingThread.peak = max(CountingThread.peak, threading.active_count() + 1)
+
+		threading.Thread.start(self)
+
+
+def voltage_variables(names, num_points, order=1):
+	result = []
+
+	for name in names:
+		var = OutputVariable(name=name, order=order, enabled=True)
+		var.config = LinSpaceConfig(-1.0, 1.0, num_points)
+		var.type, var.units = 'quantity', 'V'
+
+		result.append(var)
+
+	return result
+
+def port_resources(source, names):
+	return [(name, source.subdevices['port{0:02}'.format(i)].resources['voltage']) for i, name in enumerate(names)]
+
+def group_resources(vars, named_resources):
+	"""
+	Arrange the resources in the same way as the sorted variables.
+	"""
+
+	named_resources = dict(named_resources)
+
+	return [tuple((var.name, named_resources[var.name]) for var in group) for group in vars]
+
+def reading_measurement(multimeter):
+	return ([('reading', multimeter.resources['reading'])], [InputVariable(name='Reading')])
+
+
+def many_points():
+	"""
+	A single variable with many values.
+	"""
+
+	source, multimeter = MockVoltageSource(), MockDM34410A()
+
+	names = ['V']
+	vars, num_items = sort_variables(voltage_variables(names, 2000))
+	meas_resources, meas_vars = reading_measurement(multimeter)
+
+	return (group_resources(vars, port_resources(source, names)), vars, num_items, meas_resources, meas_vars, None)
+
+def many_variables():
+	"""
+	Many variables stepping together.
+	"""
+
+	source, multimeter = MockVoltageSource(), MockDM34410A()
+
+	names = ['V{0}'.format(i) for i in xrange(16)]
+	vars, num_items = sort_variables(voltage_variables(names, 200))
+	meas_resources, meas_vars = reading_measurement(multimeter)
+
+	return (group_resources(vars, port_resources(source, names)), vars, num_items, meas_resources, meas_vars, None)
+
+def nested():
+	"""
+	Several nested orders.
+	"""
+
+	source, multimeter = MockVoltageSource(), MockDM34410A()
+
+	names = ['X', 'Y', 'Z']
+	vars = []
+	for order, name in enumerate(names):
+		vars.extend(voltage_variables([name], 10, order))
+	vars, num_items = sort_variables(vars)
+	meas_resources, meas_vars = reading_measurement(multimeter)
+
+	return (group_resources(vars, port_resources(source, names)), vars, num_items, meas_resources, meas_vars, None)
+
+def pulse_program():
+	"""
+	A pulse program run at every point.
+	"""
+
+	source, awg, oscilloscope = MockVoltageSource(), MockAWG5014B(), MockDPO7104()
+
+	p = Program.from_file(path.join(resource_dir, '01.pulse'))
+	p.frequency = Quantity(1, 'GHz')
+	p.set_value(('_acq_marker', 'marker_num'), 1)
+	p.set_value(('_acq_marker', 'output'), 'f1')
+
+	pulse_config = sweep.PulseConfiguration(p.with_resources, {'f1': 1}, awg, oscilloscope)
+
+	names = ['V']
+	vars, num_items = sort_variables(voltage_variables(names, 100))
+
+	return (group_resources(vars, port_resources(source, names)), vars, num_items, [], [], pulse_config)
+
+def waveforms():
+	"""
+	Waveforms read at every point.
+	"""
+
+	source, multimeter, oscilloscope = MockVoltageSource(), MockDM34410A(), MockDPO7104()
+
+	names = ['V']
+	vars, num_items = sort_variables(voltage_variables(names, 100))
+	meas_resources, meas_vars = reading_measurement(multimeter)
+
+	meas_resources.append(('waveform', oscilloscope.channels[1].resources['waveform']))
+	meas_vars.append(InputVariable(name='Waveform'))
+
+	return (group_resources(vars, port_resources(source, names)), vars, num_items, meas_resources, meas_vars, None)
+
+
+scenarios = [many_points, many_variables, nested, pulse_program, waveforms]
+
+
+def run_scenario(scenario):
+	"""
+	Run a sweep, measuring:
+		the throughput in points per second
+		the time spent in each stage, in ms per point
+		the net number of objects created per point (with the garbage collector disabled)
+		the number of threads started per point, and the most threads alive at once
+	"""
+
+	ctrl = BenchmarkSweep(*scenario())
+
+	CountingThread.reset()
+	old_threads = sweep.Thread, resources.Thread
+	sweep.Thread = resources.Thread = CountingThread
+
+	gc.collect()
+	gc.disable()
+	num_objects = len(gc.get_objects())
+
+	try:
+		start_time = time()
+		ctrl.run()
+		duration = time() - start_time
+
+		num_objects = len(gc.get_objects()) - num_objects
+	finally:
+		gc.enable()
+		sweep.Thread, resources.Thread = old_threads
+
+	num_points = ctrl.num_items
+
+	return {
+		'points_per_second': num_points / duration,
+		'phase_ms_per_point': dict((f, 1e3 * t / num_points) for f, t in ctrl.phase_times.items()),
+		'objects_per_point': float(num_objects) / num_points,
+		'threads_per_point': float(CountingThread.started) / num_points,
+		'peak_threads': CountingThread.peak,
+	}
+
+def run(names=None):
+	"""
+	Run the named scenarios, or all of them.
+	"""
+
+	result = {}
+
+	for scenario in scenarios:
+		if names and scenario.__name__ not in names:
+			continue
+
+		result[scenario.__name__] = run_scenario(scenario)
+
+	return result
+
+def regressions(results, baseline, tolerance=0.5):
+	"""
+	The scenarios whose throughput has dropped by more than the tolerated fraction of the baseline.
+	"""
+
+	result = []
+
+	for name, values in sorted(results.items()):
+		if name not in baseline:
+			continue
+
+		if values['points_per_second'] < (1 - tolerance) * baseline[name]['points_per_second']:
+			result.append(name)
+
+	return result
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description='Benchmark sweeps with mock devices.')
+	parser.add_argument('scenario', nargs='*', help='scenarios to run (by default, all of them)')
+	parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+	parser.add_argument('--tolerance', type=float, default=0.5,
+			help='fraction of the baseline throughput which may be lost before a regression is reported')
+	args = parser.parse_args()
+
+	results = run(args.scenario)
+
+	try:
+		with open(baseline_path) as f:
+			baseline = json.load(f)
+	except IOError:
+		baseline = {}
+
+	for name, values in sorted(results.items()):
+		if name in baseline:
+			ratio = ' ({0:.2f}x baseline)'.format(values['points_per_second'] / baseline[name]['points_per_second'])
+		else:
+			ratio = ''
+
+		print '{0}: {1:.1f} points/s{2}'.format(name, values['points_per_second'], ratio)
+		print '  {0:.1f} objects/point, {1:.1f} threads/point, {2} peak threads'.format(values['objects_per_point'],
+				values['threads_per_point'], values['peak_threads'])
+		for f in sweep.SweepController.stages:
+			if f in values['phase_ms_per_point']:
+				print '  {0:>10}: {1:8.3f} ms/point'.format(f, values['phase_ms_per_point'][f])
+
+	if args.save_baseline:
+		baseline.update(results)
+
+		with open(baseline_path, 'w') as f:
+			json.dump(baseline, f, indent=1, separators=(',', ': '), sort_keys=True)
+	else:
+		slower = regressions(results, baseline, args.tolerance)
+
+		if slower:
+			print 'Regressions: {0}'.format(', '.join(slower))
+			sys.exit(1)
@@ -0,0 +1,119 @@
+from nose.tools import eq_
+from unittest import main, TestCase
+
+from spacq.interface.resources import Resource
+from spacq.interface.units import Quantity
+
+from ..sweep import SweepController
+from ..variables import sort_variables, InputVariable, OutputVariable, LinSpaceConfig
+
+from .. import adaptive
+
+
+def run_plan(plan, f):
+	"""
+	Sample everything the plan asks for, with the values given by f.
+	"""
+
+	result = []
+
+	while not plan.exhausted:
+		indices = plan.next_indices()
+		result.append((tuple(indices), plan.level_of(indices)))
+		plan.record(indices, (f(*indices),))
+
+	return result
+
+
+class AdaptivePlanTest(TestCase):
+	def testCoarseGrid(self):
+		"""
+		Both ends of every order are included.
+		"""
+
+		plan = adaptive.AdaptivePlan([9, 1, 4], 100, coarse_steps=3)
+
+		eq_(plan.coarse_grid(), [(0, 0, 0), (0, 0, 2), (0, 0, 3), (4, 0, 0), (4, 0, 2), (4, 0, 3),
+				(8, 0, 0), (8, 0, 2), (8, 0, 3)])
+
+	def testStep(self):
+		"""
+		Refinement is concentrated around a step.
+		"""
+
+		plan = adaptive.AdaptivePlan([65], 12, coarse_steps=5, batch_size=2)
+		sampled = run_plan(plan, lambda x: 1.0 if x > 37 else 0.0)
+
+		eq_([x for (x,), level in sampled if level == 0], [0, 16, 32, 48, 64])
+
+		# Bisecting the step every time, until it is found.
+		eq_([(x, level) for (x,), level in sampled if level > 0], [(40, 1), (36, 2), (38, 3), (37, 4)])
+
+	def testBudget(self):
+		"""
+		Flat data is never refined, and the budget is respected.
+		"""
+
+		plan = adaptive.AdaptivePlan([10, 10], 100, coarse_steps=3)
+		eq_(len(run_plan(plan, lambda x, y: 5.0)), 9)
+
+		plan = adaptive.AdaptivePlan([100, 100], 20, coarse_steps=3)
+		sampled = run_plan(plan, lambda x, y: x * y)
+		eq_(len(sampled), 20)
+		eq_(len(set(x for x, _ in sampled)), 20)
+
+		plan = adaptive.AdaptivePlan([10, 10], 4, coarse_steps=3)
+		eq_(len(run_plan(plan, lambda x, y: x)), 4)
+
+	def testUnusableValues(self):
+		"""
+		Missing and non-numeric measurements do not guide the refinement.
+		"""
+
+		plan = adaptive.AdaptivePlan([9], 10, coarse_steps=3)
+
+		for value in [None, 'abc', Quantity(5, 'V')]:
+			indices = plan.next_indices()
+			plan.record(indices, (value,))
+
+		eq_(plan.values, {(0,): None, (4,): None, (8,): 5.0})
+		assert plan.exhausted
+
+	def testSweep(self):
+		"""
+		A sweep follows the plan, and ends when it is exhausted.
+		"""
+
+		res_buf = []
+		res = Resource(setter=res_buf.append)
+		meas_res = Resource(getter=lambda: 1.0 if res_buf[-1] > 3.5 else 0.0)
+
+		var = OutputVariable(name='Var', order=1, enabled=True)
+		var.config = LinSpaceConfig(0.0, 8.0, 9)
+		meas_var = InputVariable(name='Meas')
+
+		vars, num_items = sort_variables([var])
+		plan = adaptive.AdaptivePlan([len(var)], 100, coarse_steps=3, batch_size=1)
+		ctrl = SweepController([(('Res', res),)], vars, plan.max_points, [('Meas res', meas_res)], [meas_var],
+				plan=plan)
+
+		actual = []
+
+		def data_callback(cur_time, values, measurement_values):
+			actual.append((values, measurement_values, ctrl.current_level))
+		ctrl.data_callback = data_callback
+
+		ctrl.run()
+
+		eq_(actual, [
+			((0.0,), (0.0,), 0),
+			((4.0,), (1.0,), 0),
+			((8.0,), (1.0,), 0),
+			((2.0,), (0.0,), 1),
+			((3.0,), (0.0,), 2),
+		])
+		eq_(res_buf, [0.0, 4.0, 8.0, 2.0, 3.0])
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,108 @@
+from nose.tools import eq_
+from numpy import isnan
+from numpy.testing import assert_array_equal
+from unittest import main, TestCase
+
+from spacq.interface.units import Quantity
+
+from ..sweep import SweepController
+from ..variables import sort_variables, OutputVariable, LinSpaceConfig
+
+from .. import grid
+
+
+class SweepGridTest(TestCase):
+	def testFromVariables(self):
+		"""
+		The innermost order makes the columns, and the next one the rows.
+		"""
+
+		vars = [OutputVariable(name='Outer', order=2, enabled=True), OutputVariable(name='Y', order=1, enabled=True),
+				OutputVariable(name='X', order=0, enabled=True)]
+		vars[0].config = LinSpaceConfig(0.0, 1.0, 2)
+		vars[1].config = LinSpaceConfig(1.0, -1.0, 3)
+		vars[2].config = LinSpaceConfig(0.0, 3.0, 4)
+
+		sorted_vars, _ = sort_variables(vars)
+		g = grid.SweepGrid.from_variables(sorted_vars)
+
+		eq_(g.shape, (3, 4))
+		eq_((g.x_label, g.y_label), ('X', 'Y'))
+		eq_(g.x_bounds, (-0.5, 3.5))
+		eq_(g.y_bounds, (-1.5, 1.5))
+		assert isnan(g.values).all()
+
+		# The descending order is flipped.
+		g.add([(0, 0, 1), (1, 2, 3)], [1.0, Quantity(2.0, 'V')])
+		eq_(g.values[2, 1], 1.0)
+		eq_(g.values[0, 3], 2.0)
+		eq_(isnan(g.values).sum(), 10)
+
+		# A single order makes a single row.
+		g = grid.SweepGrid.from_variables(sorted_vars[-1:])
+		eq_(g.shape, (1, 4))
+		g.add([(2,)], [5.0])
+		eq_(g.values[0, 2], 5.0)
+
+		try:
+			g.add([(0, 0)], [1.0])
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+		try:
+			g.add([(4,)], [1.0])
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+	def testDirty(self):
+		"""
+		Only the region which has changed is taken.
+		"""
+
+		g = grid.SweepGrid(2, range(10), range(5))
+
+		# Everything starts out dirty.
+		eq_(g.take_dirty(), (slice(0, 5), slice(0, 10)))
+		eq_(g.take_dirty(), None)
+
+		g.add([(1, 2), (1, 3)], [1.0, 2.0])
+		g.add([(3, 3)], ['not a number'])
+		rows, cols = g.take_dirty()
+		eq_((rows, cols), (slice(1, 4), slice(2, 4)))
+		assert_array_equal(g.values[rows, cols][0], [1.0, 2.0])
+		assert isnan(g.values[3, 3])
+
+		g.add([], [])
+		eq_(g.take_dirty(), None)
+
+	def testSweep(self):
+		"""
+		Fill the grid from the indices of a snake sweep.
+		"""
+
+		vars = [OutputVariable(name='Y', order=1, enabled=True), OutputVariable(name='X', order=0, enabled=True)]
+		vars[0].config = LinSpaceConfig(0.0, 2.0, 3)
+		vars[1].config = LinSpaceConfig(0.0, 1.0, 2)
+		vars[1].snake = True
+
+		sorted_vars, num_items = sort_variables(vars)
+		g = grid.SweepGrid.from_variables(sorted_vars)
+
+		ctrl = SweepController([[('Y', None)], [('X', None)]], sorted_vars, num_items, [], [])
+
+		def data_callback(cur_time, values, measurement_values):
+			y, x = values
+			g.add([ctrl.current_indices], [10 * y + x])
+		ctrl.data_callback = data_callback
+
+		ctrl.run()
+
+		assert_array_equal(g.values, [[0.0, 1.0], [10.0, 11.0], [20.0, 21.0]])
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,229 @@
+import csv
+import json
+from nose.tools import eq_
+from os import path
+import pickle
+from shutil import rmtree
+from StringIO import StringIO
+from tempfile import mkdtemp
+from unittest import main, TestCase
+
+from spacq.devices.config import DeviceConfig
+from spacq.interface.resources import Resource
+from spacq.interface.units import Quantity
+
+from ..simulation import LatencyModel
+from ..sweep import Checkpoint
+from ..variables import sort_variables, InputVariable, OutputVariable, ArbitraryConfig, LinSpaceConfig
+
+from .. import runner
+
+
+class ExportTest(TestCase):
+	def testHeader(self):
+		"""
+		Units are only in the header.
+		"""
+
+		var1 = OutputVariable(name='Var 1', order=1)
+		var1.type, var1.units = 'quantity', 'mV'
+		var2 = OutputVariable(name='Var 2', order=1)
+		meas1, meas2 = InputVariable(name='Meas 1'), InputVariable(name='Meas 2')
+
+		eq_(runner.export_header([(var1, var2)], [meas1, meas2], ['V', None]),
+				['Time (s)', 'Var 1 (mV)', 'Var 2', 'Meas 1 (V)', 'Meas 2'])
+		eq_(runner.export_header([(var1,)], [], [], refined=True),
+				['Time (s)', 'Var 1 (mV)', 'Refinement level'])
+
+		eq_(runner.export_row(1.5, (Quantity(5, 'mV'), 3), (Quantity(2, 'kV'), 'abc')),
+				[1.5, 5, 3, 2, 'abc'])
+		eq_(runner.export_row(0, (1,), (), level=0), [0, 1, 0])
+
+
+class SweepRunnerTest(TestCase):
+	def setUp(self):
+		self.tmp_dir = mkdtemp()
+
+	def tearDown(self):
+		rmtree(self.tmp_dir)
+
+	def testRun(self):
+		"""
+		Export and report a whole sweep.
+		"""
+
+		res_buf = []
+		res = Resource(setter=res_buf.append)
+		meas_res = Resource(getter=lambda: 2 * res_buf[-1])
+
+		var = OutputVariable(name='Var', order=1, enabled=True)
+		var.config = LinSpaceConfig(1.0, 3.0, 3)
+		meas_var = InputVariable(name='Meas')
+
+		vars, num_items = sort_variables([var])
+		export_path = path.join(self.tmp_dir, 'data.csv')
+		progress = StringIO()
+
+		sweep = runner.SweepRunner([(('Res', res),)], vars, num_items, [('Meas res', meas_res)], [meas_var],
+				export_path=export_path, progress_file=progress, progress_interval=0, json_progress=True)
+		sweep.wait(sweep.start())
+
+		eq_(res_buf, [1.0, 2.0, 3.0])
+		eq_(sweep.errors, [])
+
+		with open(export_path) as f:
+			rows = list(csv.reader(f))
+
+		eq_(rows[0], ['Time (s)', 'Var', 'Meas'])
+		eq_([row[1:] for row in rows[1:]], [['1.0', '2.0'], ['2.0', '4.0'], ['3.0', '6.0']])
+
+		# Nothing left to resume.
+		assert not path.exists(export_path + Checkpoint.extension)
+
+		reports = [json.loads(line) for line in progress.getvalue().splitlines()]
+		eq_([x['item'] for x in reports], [0, 1, 2, 3])
+		assert reports[-1]['done']
+		eq_(reports[-1]['remaining_time'], 0)
+
+	def testFailure(self):
+		"""
+		Keep the checkpoint of a sweep which stopped on an error.
+		"""
+
+		res_buf = []
+		res = Resource(setter=res_buf.append)
+		meas_res = Resource(getter=lambda: 2 * res_buf[-1])
+
+		var = OutputVariable(name='Var', order=1, enabled=True)
+		var.config = LinSpaceConfig(1.0, 3.0, 3)
+		meas_var = InputVariable(name='Meas')
+
+		vars, num_items = sort_variables([var])
+		export_path = path.join(self.tmp_dir, 'data.csv')
+
+		sweep = runner.SweepRunner([(('Res', res),)], vars, num_items, [('Meas res', meas_res)], [meas_var],
+				export_path=export_path, progress_file=StringIO(), progress_interval=0)
+
+		data_callback = sweep.data_callback
+		def failing_data_callback(*args):
+			if sweep.item == 1:
+				raise ValueError('Timed out')
+
+			data_callback(*args)
+		sweep.data_callback = failing_data_callback
+
+		sweep.wait(sweep.start())
+
+		eq_(res_buf, [1.0, 2.0])
+		eq_(sweep.errors, ['Timed out'])
+		assert not sweep.aborting
+
+		checkpoint = Checkpoint.load(export_path + Checkpoint.extension)
+		eq_(checkpoint.item, 0)
+
+	def testMain(self):
+		"""
+		Run from saved configurations.
+		"""
+
+		dev_cfg = DeviceConfig('dm')
+		dev_cfg.address_mode = dev_cfg.address_modes.gpib
+		dev_cfg.manufacturer, dev_cfg.model = 'Agilent', '34410A'
+		dev_cfg.mock = True
+		dev_cfg.resource_labels = {('integration_time',): 'time', ('reading',): 'reading'}
+
+		var = OutputVariable(name='Var', order=1, enabled=True, resource_name='time')
+		var.config = ArbitraryConfig([0.2, 1.0, 2.0, 10.0])
+		meas_var = InputVariable(name='Meas', enabled=True, resource_name='reading')
+
+		dev_path, var_path = path.join(self.tmp_dir, 'dm.dev'), path.join(self.tmp_dir, 'vars.var')
+		for file_path, value in [(dev_path, dev_cfg), (var_path, [var, meas_var])]:
+			with open(file_path, 'wb') as f:
+				pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+		export_path = path.join(self.tmp_dir, 'data.csv')
+		progress = StringIO()
+
+		eq_(runner.main(['-d', dev_path, '-v', var_path, '-o', export_path], progress), 0)
+
+		with open(export_path) as f:
+			rows = list(csv.reader(f))
+
+		eq_(rows[0], ['Time (s)', 'Var', 'Meas (V)'])
+		eq_([row[1] for row in rows[1:]], ['0.2', '1.0', '2.0', '10.0'])
+		assert progress.getvalue().splitlines()[-1].startswith('4/4 (100%)')
+
+		# Refuse to overwrite.
+		eq_(runner.main(['-d', dev_path, '-v', var_path, '-o', export_path, '-q'], progress), 2)
+
+	def testDryRun(self):
+		"""
+		Estimate a sweep with mock devices, even if real ones are configured.
+		"""
+
+		dev_cfg = DeviceConfig('dm')
+		dev_cfg.address_mode = dev_cfg.address_modes.gpib
+		dev_cfg.manufacturer, dev_cfg.model = 'Agilent', '34410A'
+		dev_cfg.resource_labels = {('integration_time',): 'time', ('reading',): 'reading'}
+
+		var = OutputVariable(name='Var', order=1, enabled=True, resource_name='time', wait='2 s')
+		var.config = ArbitraryConfig([0.2, 1.0, 2.0, 10.0])
+		meas_var = InputVariable(name='Meas', enabled=True, resource_name='reading')
+
+		latencies = LatencyModel()
+		latencies.set('reading', 'read', 0.5)
+
+		dev_path, var_path = path.join(self.tmp_dir, 'dm.dev'), path.join(self.tmp_dir, 'vars.var')
+		for file_path, value in [(dev_path, dev_cfg), (var_path, [var, meas_var])]:
+			with open(file_path, 'wb') as f:
+				pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+		latencies_path = path.join(self.tmp_dir, 'latencies.json')
+		latencies.save(latencies_path)
+
+		progress = StringIO()
+		eq_(runner.main(['-d', dev_path, '-v', var_path, '--dry-run', '--latencies', latencies_path, '--json'],
+				progress), 0)
+
+		estimate = json.loads(progress.getvalue())
+		eq_(estimate['num_items'], 4)
+		eq_(estimate['estimated_time'], 10.0)
+		eq_(estimate['phase_times'], {'dwell': 8.0, 'read': 2.0})
+
+	def testResources(self):
+		"""
+		All resource problems are reported together.
+		"""
+
+		resources = {
+			'ro': Resource(getter=lambda: 1),
+			'wo': Resource(setter=lambda x: None),
+			'volts': Resource(getter=lambda: 1, setter=lambda x: None),
+		}
+		resources['volts'].units = 'V'
+
+		var1 = OutputVariable(name='Var 1', order=1, resource_name='ro')
+		var2 = OutputVariable(name='Var 2', order=1, resource_name='volts')
+		var3 = OutputVariable(name='Var 3', order=1, resource_name='')
+		meas1 = InputVariable(name='Meas 1', resource_name='wo')
+		meas2 = InputVariable(name='Meas 2', resource_name='missing')
+
+		try:
+			runner.gather_resources(resources, [(var1, var2, var3)], [meas1, meas2])
+		except ValueError as e:
+			eq_(str(e).splitlines(), [
+				'Missing resources: "missing"',
+				'Unreadable resources: "wo"',
+				'Unwritable resources: "ro"',
+				'Mismatched resources: "volts/Var 2"',
+			])
+		else:
+			assert False, 'Expected ValueError.'
+
+		output_resources, measurement_resources = runner.gather_resources(resources, [(var3,)], [])
+		eq_(output_resources, [(('0', None),)])
+		eq_(measurement_resources, [])
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,158 @@
+from nose.tools import assert_almost_equal, eq_
+from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import RLock
+from time import sleep
+from unittest import main, TestCase
+
+from spacq.interface.resources import Resource
+
+from ..sweep import SweepController
+from ..variables import sort_variables, InputVariable, OutputVariable, LinSpaceConfig
+
+from .. import simulation
+
+
+class LatencyModelTest(TestCase):
+	def testLatency(self):
+		"""
+		Recorded times are averaged.
+		"""
+
+		model = simulation.LatencyModel(default_write=0.5)
+
+		eq_(model.latency('a', 'write'), 0.5)
+		eq_(model.latency('a', 'read'), 0.0)
+
+		model.record('a', 'write', 1.0)
+		model.record('a', 'write', 2.0)
+		model.set('b', 'read', 3.0)
+
+		eq_(model.latency('a', 'write'), 1.5)
+		eq_(model.latency('b', 'read'), 3.0)
+		eq_(model.latency('b', 'write'), 0.5)
+
+		tmp_dir = mkdtemp()
+		try:
+			file_path = path.join(tmp_dir, 'latencies.json')
+			model.save(file_path)
+			loaded = simulation.LatencyModel.load(file_path)
+		finally:
+			rmtree(tmp_dir)
+
+		eq_(loaded.latency('a', 'write'), 1.5)
+		eq_(loaded.latency('b', 'read'), 3.0)
+		eq_(loaded.latency('c', 'write'), 0.5)
+
+		try:
+			model.record('a', 'wait', 1.0)
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+	def testInstrument(self):
+		"""
+		Measure the accesses of a real sweep.
+		"""
+
+		res = Resource(setter=lambda x: sleep(0.01))
+		meas_res = Resource(getter=lambda: 5)
+
+		var = OutputVariable(name='Var', order=1, enabled=True)
+		var.config = LinSpaceConfig(1.0, 3.0, 3)
+
+		vars, num_items = sort_variables([var])
+		ctrl = SweepController([(('Res', res),)], vars, num_items, [('Meas res', meas_res)],
+				[InputVariable(name='Meas')])
+
+		model = simulation.LatencyModel()
+		model.instrument(ctrl)
+
+		ctrl.run()
+
+		eq_(model.samples['write']['Res'][0], 3)
+		eq_(model.samples['read']['Meas res'][0], 3)
+		assert model.latency('Res', 'write') >= 0.01
+
+
+class SimulatedSweepTest(TestCase):
+	def testEstimate(self):
+		"""
+		Account for ramps, writes, dwells, and reads without waiting for any of them.
+		"""
+
+		res_a_buf, res_b_buf = [], []
+		res_a, res_b = Resource(setter=res_a_buf.append), Resource(setter=res_b_buf.append)
+		meas_res = Resource(getter=lambda: 5)
+
+		var_v = OutputVariable(name='V', order=1, enabled=True, wait='0.5 s')
+		var_v.config = LinSpaceConfig(0.0, 1.0, 5)
+		var_v.smooth_transition = True
+		var_v.smooth_steps = 3
+
+		var_w = OutputVariable(name='W', order=2, enabled=True, wait='2 s')
+		var_w.config = LinSpaceConfig(1.0, 2.0, 2)
+		var_w.smooth_from = True
+		var_w.smooth_steps = 5
+
+		vars, num_items = sort_variables([var_v, var_w])
+
+		latencies = simulation.LatencyModel()
+		latencies.set('A', 'write', 0.1)
+		latencies.set('B', 'write', 0.3)
+		latencies.set('M', 'read', 0.2)
+
+		sweep = simulation.SimulatedSweep([(('B', res_b),), (('A', res_a),)], vars, num_items, [('M', meas_res)],
+				[InputVariable(name='Meas')], latencies=latencies)
+
+		data = []
+		sweep.data_callback = lambda cur_time, values, measurement_values: data.append(cur_time)
+
+		sweep.run()
+
+		# Nothing was written.
+		eq_(res_a_buf, [])
+		eq_(res_b_buf, [])
+
+		eq_(sweep.num_simulated, 10)
+		assert_almost_equal(sweep.elapsed_time, 13.2)
+		eq_(sorted(sweep.phase_times), ['dwell', 'read', 'transition', 'write'])
+		# The first smooth set is held by the slow writes of B.
+		assert_almost_equal(sweep.phase_times['transition'], 1.5 + 0.3)
+		assert_almost_equal(sweep.phase_times['write'], 2 * 0.3 + 8 * 0.1)
+		assert_almost_equal(sweep.phase_times['dwell'], 2 * 2 + 8 * 0.5)
+		assert_almost_equal(sweep.phase_times['read'], 10 * 0.2)
+
+		# The times are virtual too.
+		assert_almost_equal(data[1] - data[0], 0.1 + 0.5 + 0.2)
+
+	def testSharedDevice(self):
+		"""
+		Resources of the same device are accessed one at a time.
+		"""
+
+		class Device(object):
+			lock = RLock()
+			a = b = 0
+
+		dev = Device()
+		res_a, res_b, res_c = Resource(dev, setter='a'), Resource(dev, setter='b'), Resource(setter=lambda x: None)
+
+		var_a = OutputVariable(name='A', order=1, enabled=True)
+		var_b = OutputVariable(name='B', order=1, enabled=True)
+		var_c = OutputVariable(name='C', order=1, enabled=True)
+
+		vars, num_items = sort_variables([var_a, var_b, var_c])
+
+		latencies = simulation.LatencyModel(default_write=1.0)
+		sweep = simulation.SimulatedSweep([(('A', res_a), ('B', res_b), ('C', res_c))], vars, num_items, [], [],
+				latencies=latencies)
+		sweep.run()
+
+		eq_(sweep.phase_times['write'], 2.0)
+
+
+if __name__ == '__main__':
+	main()
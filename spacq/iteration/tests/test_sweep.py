@@ -1,6 +1,8 @@
 from functools import partial
 from nose.tools import eq_
 from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
 from threading import Thread
 from time import sleep, time
 from unittest import main, TestCase
@@ -193,6 +195,135 @@ class SweepControllerTest(TestCase):
 		eq_(actual_reads, list(flatten(((0, x), (1, -x)) for x in xrange(1, 9))))
 		eq_(closed, [1])
 
+	def testSnake(self):
+		"""
+		Snake groups reverse direction instead of ramping back to the start.
+		"""
+
+		res_bufs = [[], []]
+
+		def setter(i, value):
+			res_bufs[i].append(value)
+
+		res0 = Resource(setter=partial(setter, 0))
+		res1 = Resource(setter=partial(setter, 1))
+
+		var0 = OutputVariable(name='Var 0', order=2, enabled=True)
+		var0.config = LinSpaceConfig(1.0, 3.0, 3)
+
+		var1 = OutputVariable(name='Var 1', order=1, enabled=True)
+		var1.config = LinSpaceConfig(10.0, 30.0, 3)
+		var1.smooth_steps = 3
+		var1.smooth_transition = True
+		var1.snake = True
+
+		vars, num_items = sort_variables([var0, var1])
+		ctrl = sweep.SweepController([(('Res 0', res0),), (('Res 1', res1),)], vars, num_items, [], [])
+
+		actual_values = []
+		actual_indices = []
+		actual_writes = []
+
+		def data_callback(cur_time, values, measurement_values):
+			actual_values.append(values)
+			actual_indices.append(tuple(ctrl.current_indices))
+		ctrl.data_callback = data_callback
+
+		def write_callback(pos, i, value):
+			actual_writes.append((pos, value))
+		ctrl.write_callback = write_callback
+
+		ctrl.run()
+
+		eq_(actual_values, [(1.0, 10.0), (1.0, 20.0), (1.0, 30.0), (2.0, 30.0), (2.0, 20.0), (2.0, 10.0),
+				(3.0, 10.0), (3.0, 20.0), (3.0, 30.0)])
+		eq_(actual_indices, [(0, 0), (0, 1), (0, 2), (1, 2), (1, 1), (1, 0), (2, 0), (2, 1), (2, 2)])
+
+		# The inner variable is neither ramped nor rewritten when the outer one steps.
+		eq_(res_bufs, [[1.0, 2.0, 3.0], [10.0, 20.0, 30.0, 20.0, 10.0, 20.0, 30.0]])
+		eq_(actual_writes, [(0, 1.0), (1, 10.0), (1, 20.0), (1, 30.0), (0, 2.0), (1, 20.0), (1, 10.0),
+				(0, 3.0), (1, 20.0), (1, 30.0)])
+
+	def testResume(self):
+		"""
+		Continue from a checkpoint as if nothing had happened.
+		"""
+
+		def make_controller(res_buf):
+			res0 = Resource(setter=lambda x: None)
+			res1 = Resource(setter=res_buf.append)
+
+			var0 = OutputVariable(name='Var 0', order=2, enabled=True, const=0.0)
+			var0.config = LinSpaceConfig(1.0, 3.0, 3)
+
+			var1 = OutputVariable(name='Var 1', order=1, enabled=True, const=0.0)
+			var1.config = LinSpaceConfig(10.0, 30.0, 3)
+			var1.smooth_steps = 2
+			var1.smooth_from = True
+			var1.snake = True
+
+			vars, num_items = sort_variables([var0, var1])
+
+			return sweep.SweepController([(('Res 0', res0),), (('Res 1', res1),)], vars, num_items, [], [])
+
+		# Crash after the fourth item.
+		checkpoints = []
+		ctrl = make_controller([])
+
+		def data_callback(cur_time, values, measurement_values):
+			checkpoints.append(ctrl.checkpoint())
+
+			if len(checkpoints) == 4:
+				ctrl.abort(fatal=True)
+		ctrl.data_callback = data_callback
+
+		ctrl.run()
+
+		eq_(len(checkpoints), 4)
+
+		# Through the disk.
+		tmp_dir = mkdtemp()
+		try:
+			file_path = path.join(tmp_dir, 'data.csv' + sweep.Checkpoint.extension)
+			checkpoints[-1].save(file_path)
+			checkpoint = sweep.Checkpoint.load(file_path)
+		finally:
+			rmtree(tmp_dir)
+
+		eq_(checkpoint.item, 3)
+		eq_(checkpoint.steps_taken, [1, 0])
+		eq_(checkpoint.reversed, [False, True])
+
+		# Resume.
+		res_buf = []
+		ctrl = make_controller(res_buf)
+		ctrl.resume(checkpoint)
+
+		actual_values = []
+
+		def data_callback(cur_time, values, measurement_values):
+			actual_values.append((cur_time, values))
+		ctrl.data_callback = data_callback
+
+		ctrl.run()
+
+		eq_([values for _, values in actual_values], [(2.0, 20.0), (2.0, 10.0), (3.0, 10.0), (3.0, 20.0),
+				(3.0, 30.0)])
+		# Smoothly set from const first.
+		eq_(res_buf, [0.0, 20.0, 20.0, 10.0, 20.0, 30.0])
+		assert actual_values[0][0] >= checkpoint.elapsed_time
+
+		# Not for a different sweep.
+		ctrl = make_controller([])
+		ctrl.variables[1][0].name = 'Other'
+
+		try:
+			ctrl.resume(checkpoint)
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
 	def testContinuous(self):
 		"""
 		Keep going, and then eventually stop.
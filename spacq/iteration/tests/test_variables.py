@@ -1,7 +1,9 @@
 from nose.tools import assert_raises, eq_
+from numpy import array, linspace
+from numpy.testing import assert_array_almost_equal, assert_array_equal
 from unittest import main, TestCase
 
-from spacq.interface.units import IncompatibleDimensions, Quantity
+from spacq.interface.units import IncompatibleDimensions, Quantity, QuantityArray
 
 from .. import variables
 
@@ -107,17 +109,17 @@ class OutputVariableTest(TestCase):
 		var.config = variables.LinSpaceConfig(-200.0, 200.0, 401)
 		eq_(str(var), '[-200, -199, -198, -197, ..., 200]')
 
-		# Far too long.
-		var.config = variables.LinSpaceConfig(0.0, 100000.0, 100001)
-		eq_(str(var), '[0, 1, 2, 3, ...]')
+		# Very long, but only a few values are computed.
+		var.config = variables.LinSpaceConfig(0.0, 1e9, 1000000001)
+		eq_(str(var), '[0, 1, 2, 3, ..., 1e+09]')
 
 		# Smooth from constant.
 		var.smooth_from = True
-		eq_(str(var), '(0, 1, 2, 3, ...]')
+		eq_(str(var), '(0, 1, 2, 3, ..., 1e+09]')
 
 		# And to.
 		var.smooth_to = True
-		eq_(str(var), '(0, 1, 2, 3, ...)')
+		eq_(str(var), '(0, 1, 2, 3, ..., 1e+09)')
 
 	def testUnits(self):
 		"""
@@ -132,6 +134,15 @@ class OutputVariableTest(TestCase):
 		eq_(list(var), [Quantity(x, 'g.m.s-1') for x in [0, -2.5, -5]])
 		eq_(str(var), '[0, -2.5, -5] g.m.s-1')
 
+		# Many at once.
+		values = var.with_type(array([0, -2.5, -5]))
+		assert isinstance(values, QuantityArray)
+		eq_(list(values), list(var))
+
+		var.type = 'integer'
+		assert_array_equal(var.with_type(array([1.0, 2.0])), [1, 2])
+		var.type = 'quantity'
+
 		# Bad combination.
 		var.units = None
 		assert_raises(ValueError, list, var)
@@ -160,6 +171,59 @@ class LinSpaceConfigTest(TestCase):
 		it2 = iter(var)
 		eq_(list(it2), [10.0])
 
+	def testIndexing(self):
+		"""
+		Values are computed directly from their index.
+		"""
+
+		config = variables.LinSpaceConfig(0.0, 1.0, 10 ** 12 + 1)
+
+		eq_(len(config), 10 ** 12 + 1)
+		eq_(config[0], 0.0)
+		eq_(config[5 * 10 ** 11], 0.5)
+		eq_(config[-1], 1.0)
+		eq_(list(variables.LinSpaceConfig(2.0, 5.0, 1)), [2.0])
+
+		try:
+			config[10 ** 12 + 1]
+		except IndexError:
+			pass
+		else:
+			assert False, 'Expected IndexError.'
+
+		# Matches NumPy.
+		config = variables.LinSpaceConfig(-1.3, 7.1, 37)
+		eq_(list(config), list(linspace(-1.3, 7.1, 37)))
+
+
+class LogSpaceConfigTest(TestCase):
+	def testValues(self):
+		"""
+		Geometric spacing in either direction.
+		"""
+
+		config = variables.LogSpaceConfig(1e-3, 1e3, 7)
+
+		eq_(len(config), 7)
+		assert_array_almost_equal(list(config), [1e-3, 1e-2, 1e-1, 1, 1e1, 1e2, 1e3])
+		eq_(config[-1], 1e3)
+
+		config = variables.LogSpaceConfig(-100.0, -1.0, 3)
+		assert_array_almost_equal(list(config), [-100, -10, -1])
+
+	def testInvalid(self):
+		"""
+		Zero and sign changes cannot be spaced logarithmically.
+		"""
+
+		for initial, final in [(0, 10), (-1, 10)]:
+			try:
+				variables.LogSpaceConfig(initial, final, 3)[1]
+			except ValueError:
+				pass
+			else:
+				assert False, 'Expected ValueError.'
+
 
 class ArbitraryConfigTest(TestCase):
 	def testIterator(self):
@@ -177,6 +241,54 @@ class ArbitraryConfigTest(TestCase):
 		it = iter(var)
 		eq_(list(it), values)
 
+		eq_(var[2], 6.6)
+		eq_(var[-3], 3)
+
+
+class PiecewiseConfigTest(TestCase):
+	def testSegments(self):
+		"""
+		Segments are joined end to end.
+		"""
+
+		config = variables.PiecewiseConfig([variables.LinSpaceConfig(0.0, 1.0, 3),
+				variables.ArbitraryConfig([5, 6]), variables.LinSpaceConfig(-1.0, -1.0, 1)])
+
+		eq_(len(config), 6)
+		eq_(list(config), [0.0, 0.5, 1.0, 5, 6, -1.0])
+		eq_(config[3], 5)
+		eq_(config[-1], -1.0)
+
+	def testThrough(self):
+		"""
+		Shared endpoints appear once.
+		"""
+
+		config = variables.PiecewiseConfig.through([0.0, 2.0, 1.0], 3)
+
+		eq_(len(config), 5)
+		eq_(list(config), [0.0, 1.0, 2.0, 1.5, 1.0])
+		eq_([config[i] for i in xrange(5)], list(config))
+
+
+class SnakeConfigTest(TestCase):
+	def testPasses(self):
+		"""
+		Back and forth without repeating the turning points.
+		"""
+
+		inner = variables.LinSpaceConfig(1.0, 3.0, 3)
+
+		eq_(list(variables.SnakeConfig(inner, 1)), [1.0, 2.0, 3.0])
+		eq_(list(variables.SnakeConfig(inner)), [1.0, 2.0, 3.0, 2.0, 1.0])
+
+		config = variables.SnakeConfig(inner, 3)
+		eq_(len(config), 7)
+		eq_(list(config), [1.0, 2.0, 3.0, 2.0, 1.0, 2.0, 3.0])
+		eq_(config[-1], 3.0)
+
+		eq_(list(variables.SnakeConfig(variables.ArbitraryConfig([7]), 4)), [7])
+
 
 if __name__ == '__main__':
 	main()
@@ -1,8 +1,9 @@
-from itertools import groupby, islice
+from bisect import bisect_right
+from itertools import groupby
 import numpy
 import operator
 
-from spacq.interface.units import Quantity
+from spacq.interface.units import Quantity, QuantityArray
 
 
 def sort_variables(variables):
@@ -72,8 +73,9 @@ class OutputVariable(Variable):
 	# Maximum number of initial values to display in string form.
 	display_values = 4
 
-	# Maximum number of values to search through for the end.
-	search_values = 1000
+	# Whether to alternate direction instead of starting over when an outer order steps.
+	# Defined here for variables pickled before it existed.
+	snake = False
 
 	def __init__(self, order, config=None, wait='0 s', const=0.0, use_const=False, *args, **kwargs):
 		Variable.__init__(self, *args, **kwargs)
@@ -96,6 +98,8 @@ class OutputVariable(Variable):
 		self.smooth_to = False
 		self.smooth_transition = False
 
+		self.snake = False
+
 		self.type = 'float'
 		self.units = None
 
@@ -113,17 +117,31 @@ class OutputVariable(Variable):
 	def with_type(self, value):
 		"""
 		Set to the correct type, and wrap with the correct units.
+
+		An array of values results in an array of the correct type, or a QuantityArray.
 		"""
 
+		is_array = isinstance(value, numpy.ndarray)
+
 		if self.type == 'integer':
-			return int(value)
+			return value.astype(int) if is_array else int(value)
 		elif self.type == 'float':
 			return value
 		elif self.type == 'quantity' and self.units is not None:
-			return Quantity(value, self.units)
+			return QuantityArray(value, self.units) if is_array else Quantity(value, self.units)
 		else:
 			raise ValueError('Invalid variable setup; type: {0}, units: {1}'.format(self.type, self.units))
 
+	def raw_value(self, i):
+		"""
+		The i-th value, without the type applied.
+		"""
+
+		if self.use_const:
+			return [self.const][i]
+		else:
+			return self.config[i]
+
 	@property
 	def raw_iter(self):
 		if self.use_const:
@@ -134,6 +152,9 @@ class OutputVariable(Variable):
 	def __iter__(self):
 		return (self.with_type(x) for x in self.raw_iter)
 
+	def __getitem__(self, i):
+		return self.with_type(self.raw_value(i))
+
 	def __len__(self):
 		if self.use_const:
 			return 1
@@ -141,21 +162,23 @@ class OutputVariable(Variable):
 			return len(self.config)
 
 	def __str__(self):
-		found_values = islice(self.raw_iter, 0, self.search_values + 1)
+		num_values = len(self)
+
+		shown_indices = range(min(num_values, self.display_values))
+		if num_values > self.display_values:
+			shown_indices.append(num_values - 1)
 
+		found_values = [self.raw_value(i) for i in shown_indices]
 		if self.type == 'integer':
 			found_values = [int(x) for x in found_values]
-		else:
-			found_values = list(found_values)
 
-		shown_values = ', '.join('{0:g}'.format(x) for x in found_values[:self.display_values])
+		shown_values = ['{0:g}'.format(x) for x in found_values]
 
-		if len(found_values) > self.display_values:
-			if len(found_values) > self.display_values + 1:
-				shown_values += ', ...'
+		if num_values > self.display_values + 1:
+			# Elide all but the last value after the initial ones.
+			shown_values.insert(-1, '...')
 
-			if len(found_values) <= self.search_values:
-				shown_values += ', {0:g}'.format(found_values[-1])
+		shown_values = ', '.join(shown_values)
 
 		smooth_from = '(' if not self.use_const and self.smooth_from else '['
 		smooth_to = ')' if not self.use_const and self.smooth_to else ']'
@@ -163,7 +186,31 @@ class OutputVariable(Variable):
 		return '{0}{1}{2}{3}'.format(smooth_from, shown_values, smooth_to, units)
 
 
-class LinSpaceConfig(object):
+class ValueConfig(object):
+	"""
+	A base for variable configurations.
+
+	Values are computed from their index, so that they never need to be stored together. Subclasses define:
+		__len__(): the number of values
+		value(i): the value for a non-negative index which is known to be in range
+	"""
+
+	def __getitem__(self, i):
+		length = len(self)
+
+		if i < 0:
+			i += length
+
+		if not 0 <= i < length:
+			raise IndexError('Index out of range: {0}'.format(i))
+
+		return self.value(i)
+
+	def __iter__(self):
+		return (self.value(i) for i in xrange(len(self)))
+
+
+class LinSpaceConfig(ValueConfig):
 	"""
 	Linear space variable configuration.
 	"""
@@ -184,14 +231,42 @@ class LinSpaceConfig(object):
 
 		self._steps = value
 
-	def __iter__(self):
-		return iter(numpy.linspace(self.initial, self.final, self.steps))
+	def value(self, i):
+		if i == self.steps - 1 and i > 0:
+			return self.final
+
+		if i == 0:
+			return self.initial
+
+		return self.initial + i * ((self.final - self.initial) / float(self.steps - 1))
 
 	def __len__(self):
 		return self.steps
 
 
-class ArbitraryConfig(object):
+class LogSpaceConfig(LinSpaceConfig):
+	"""
+	Logarithmic (geometric) space variable configuration.
+	"""
+
+	def __init__(self, initial=1.0, final=1.0, steps=1):
+		LinSpaceConfig.__init__(self, initial, final, steps)
+
+	def value(self, i):
+		if self.initial == 0 or self.final == 0 or (self.initial < 0) != (self.final < 0):
+			raise ValueError('Bounds must be non-zero and of the same sign, not "{0}" and "{1}".'.format(
+					self.initial, self.final))
+
+		if i == self.steps - 1 and i > 0:
+			return self.final
+
+		if i == 0:
+			return self.initial
+
+		return self.initial * (float(self.final) / self.initial) ** (i / float(self.steps - 1))
+
+
+class ArbitraryConfig(ValueConfig):
 	"""
 	Variable configuration for arbitrary values.
 	"""
@@ -199,8 +274,93 @@ class ArbitraryConfig(object):
 	def __init__(self, values):
 		self.values = values
 
-	def __iter__(self):
-		return iter(self.values)
+	def value(self, i):
+		return self.values[i]
 
 	def __len__(self):
 		return len(self.values)
+
+
+class PiecewiseConfig(ValueConfig):
+	"""
+	Variable configuration made of consecutive segments, each of which is a configuration.
+
+	If skip_joins is True, the first value of every segment after the first is skipped, so that shared endpoints are not repeated.
+	"""
+
+	def __init__(self, segments, skip_joins=False):
+		if not segments:
+			raise ValueError('At least one segment required.')
+
+		self.segments = tuple(segments)
+		self.skip_joins = skip_joins
+
+		# Index of the first value of each segment.
+		self.offsets = []
+		length = 0
+		for i, segment in enumerate(self.segments):
+			self.offsets.append(length)
+			length += len(segment) - (1 if skip_joins and i > 0 else 0)
+		self.length = length
+
+	@classmethod
+	def through(cls, points, steps):
+		"""
+		Linear segments through all the points, with the given number of steps in each.
+		"""
+
+		if len(points) < 2:
+			raise ValueError('At least 2 points required, not {0}.'.format(len(points)))
+
+		return cls([LinSpaceConfig(a, b, steps) for a, b in zip(points[:-1], points[1:])], skip_joins=True)
+
+	def value(self, i):
+		pos = bisect_right(self.offsets, i) - 1
+		offset = i - self.offsets[pos]
+
+		if self.skip_joins and pos > 0:
+			offset += 1
+
+		return self.segments[pos][offset]
+
+	def __len__(self):
+		return self.length
+
+
+class SnakeConfig(ValueConfig):
+	"""
+	Variable configuration which goes back and forth through another configuration.
+
+	Each pass reverses the direction of the previous one, without repeating the turning point.
+	"""
+
+	def __init__(self, config, passes=2):
+		if passes <= 0:
+			raise ValueError('Number of passes must be positive, not "{0}".'.format(passes))
+
+		self.config = config
+		self.passes = passes
+
+	def value(self, i):
+		inner_length = len(self.config)
+
+		if inner_length == 1:
+			return self.config[0]
+
+		pass_num, offset = divmod(i, inner_length - 1)
+		if pass_num == self.passes:
+			# The very last value.
+			pass_num, offset = self.passes - 1, inner_length - 1
+
+		if pass_num % 2 == 1:
+			offset = inner_length - 1 - offset
+
+		return self.config[offset]
+
+	def __len__(self):
+		inner_length = len(self.config)
+
+		if inner_length == 1:
+			return 1
+
+		return 1 + self.passes * (inner_length - 1)
@@ -1,7 +1,21 @@
+import logging
+log = logging.getLogger(__name__)
+
+from collections import OrderedDict
 from functools import wraps
+from glob import glob
 from itertools import chain
-from numpy import linspace, meshgrid, sort, unique
+from hashlib import sha1
+from math import ceil, floor
+import operator
+from numpy import (allclose, arange, argmax, argmin, asarray, column_stack, concatenate, diff, empty, fmax, fmin, isnan, linspace,
+		load, maximum, meshgrid, minimum, nan, savez, searchsorted, unique, where)
+import os
+from os import path
 from scipy.interpolate import griddata
+from tempfile import mkstemp
+from threading import RLock
+from zipfile import BadZipfile
 
 """
 Generic tools.
@@ -24,10 +38,20 @@ def sift(items, cls):
 	return [item for item in items if isinstance(item, cls)]
 
 
-def triples_to_mesh(x, y, z):
+# Ways of turning triples into a mesh.
+mesh_methods = ['direct', 'linear', 'cubic', 'nearest']
+
+
+def triples_to_mesh(x, y, z, method=None):
 	"""
 	Convert 3 equal-sized lists of co-ordinates into an interpolated 2D mesh of z-values.
 
+	The method is one of:
+		direct: the points must lie on a regular grid (as produced by a sweep), and are placed directly into the mesh;
+			any missing cells are NaN
+		nearest, linear, cubic: the mesh is interpolated with the given method
+		None: direct if the points lie on a regular grid, and cubic otherwise
+
 	Returns a tuple of:
 		the mesh
 		the x bounds
@@ -35,17 +59,63 @@ def triples_to_mesh(x, y, z):
 		the z bounds
 	"""
 
-	x_values, y_values = sort(unique(x)), sort(unique(y))
+	if method is not None and method not in mesh_methods:
+		raise ValueError('Unknown method: {0}'.format(method))
+
+	x, y, z = asarray(x), asarray(y), asarray(z)
+
+	x_values, y_values = unique(x), unique(y)
 
 	x_space = linspace(x_values[0], x_values[-1], len(x_values))
 	y_space = linspace(y_values[0], y_values[-1], len(y_values))
 
-	target_x, target_y = meshgrid(x_space, y_space)
+	if method in [None, 'direct']:
+		target_z = grid_to_mesh(x, y, z, x_values, y_values, x_space, y_space)
+
+		if target_z is None:
+			if method == 'direct':
+				raise ValueError('Points do not lie on an evenly-spaced grid; choose an interpolation method')
+
+			method = 'cubic'
+	else:
+		target_z = None
+
+	if target_z is None:
+		target_x, target_y = meshgrid(x_space, y_space)
 
-	target_z = griddata((x, y), z, (target_x, target_y), method='cubic')
+		target_z = griddata((x, y), z, (target_x, target_y), method=method)
 
 	return (target_z, (x_values[0], x_values[-1]), (y_values[0], y_values[-1]),
-			(min(z), max(z)))
+			(z.min(), z.max()))
+
+def grid_to_mesh(x, y, z, x_values, y_values, x_space, y_space):
+	"""
+	Place the z-values into a mesh without interpolation, if every point falls on its own cell of the evenly-spaced
+	grid given by x_space and y_space.
+
+	Returns None if the points are not on such a grid.
+	"""
+
+	if len(x_values) * len(y_values) < len(z):
+		return None
+
+	# The unique values must already be evenly spaced, to within a small fraction of a step.
+	for values, space in [(x_values, x_space), (y_values, y_space)]:
+		if len(space) > 1 and not allclose(values, space, rtol=0, atol=1e-3 * (space[1] - space[0])):
+			return None
+
+	x_idxs, y_idxs = searchsorted(x_values, x), searchsorted(y_values, y)
+	cells = y_idxs * len(x_values) + x_idxs
+
+	# Repeated points would need to be combined somehow.
+	if len(unique(cells)) < len(cells):
+		return None
+
+	result = empty((len(y_values), len(x_values)))
+	result.fill(nan)
+	result.flat[cells] = z
+
+	return result
 
 
 class Enum(set):
@@ -133,3 +203,381 @@ class Without(object):
 
 	def __exit__(self, *args, **kwargs):
 		return False
+
+
+class LRUCache(object):
+	"""
+	A bounded mapping which forgets the least recently used items first.
+	"""
+
+	def __init__(self, max_size):
+		if max_size <= 0:
+			raise ValueError('Cache size must be positive, not {0}'.format(max_size))
+
+		self.max_size = max_size
+
+		self.lock = RLock()
+		self.items = OrderedDict()
+
+	@Synchronized()
+	def __getitem__(self, k):
+		# Move the item to the most recent position.
+		v = self.items.pop(k)
+		self.items[k] = v
+
+		return v
+
+	@Synchronized()
+	def __setitem__(self, k, v):
+		self.items.pop(k, None)
+		self.items[k] = v
+
+		while len(self.items) > self.max_size:
+			self.items.popitem(last=False)
+
+	@Synchronized()
+	def __delitem__(self, k):
+		del self.items[k]
+
+	def __contains__(self, k):
+		return k in self.items
+
+	def __len__(self):
+		return len(self.items)
+
+	@Synchronized()
+	def clear(self):
+		self.items.clear()
+
+
+class Coalescer(object):
+	"""
+	Updates collected from any thread, to be handled together later.
+
+	Fields keep only their latest value, while series keep every value since the last flush.
+	"""
+
+	def __init__(self):
+		self.lock = RLock()
+
+		self.fields = OrderedDict()
+		self.series = OrderedDict()
+
+	@Synchronized()
+	def set(self, k, v):
+		self.fields[k] = v
+
+	@Synchronized()
+	def append(self, k, v):
+		self.series.setdefault(k, []).append(v)
+
+	@Synchronized()
+	def flush(self):
+		"""
+		Take everything collected so far.
+
+		The result is a tuple of the fields and the series, as ordered dictionaries.
+		"""
+
+		result = (self.fields, self.series)
+
+		self.fields = OrderedDict()
+		self.series = OrderedDict()
+
+		return result
+
+
+class MinMaxPyramid(object):
+	"""
+	A curve at several resolutions, so that only about as many points as can be seen need to be drawn.
+
+	Each level splits the curve into blocks factor times larger than those of the previous level, and keeps the points
+	with the smallest and largest values of each block, so that no peak is lost.
+	"""
+
+	factor = 4
+
+	def __init__(self, x, y):
+		self.x, self.y = asarray(x, dtype=float), asarray(y, dtype=float)
+
+		if len(self.x) != len(self.y):
+			raise ValueError('Mismatched lengths: {0} and {1}'.format(len(self.x), len(self.y)))
+
+		# Ranges can only be found if the x values are in order.
+		self.ordered = (diff(self.x) >= 0).all()
+
+		# Each level is made of the block size, and the indices of the minimum and maximum of each block.
+		self.levels = []
+
+		block_size = 1
+		mins = maxes = arange(len(self.y))
+		while len(mins) > 1:
+			block_size *= self.factor
+			mins, maxes = self.reduce(mins, argmin), self.reduce(maxes, argmax)
+
+			self.levels.append((block_size, mins, maxes))
+
+	def reduce(self, idxs, arg_f):
+		"""
+		Combine each group of factor blocks into a single block.
+		"""
+
+		num_blocks = -(-len(idxs) // self.factor)
+
+		# Pad the last group with its last block.
+		blocks = empty(num_blocks * self.factor, dtype=int)
+		blocks[:len(idxs)] = idxs
+		blocks[len(idxs):] = idxs[-1]
+		blocks = blocks.reshape(num_blocks, self.factor)
+
+		return blocks[arange(num_blocks), arg_f(self.y[blocks], axis=1)]
+
+	def __len__(self):
+		return len(self.x)
+
+	def get(self, low=None, high=None, num_points=1000):
+		"""
+		The points with x values between low and high (by default, all of them), reduced to at most about num_points.
+
+		One point on either side of the range is included, so that the curve reaches the edges.
+		"""
+
+		start, stop = 0, len(self.x)
+
+		if self.ordered:
+			if low is not None:
+				start = max(searchsorted(self.x, low, 'left') - 1, 0)
+			if high is not None:
+				stop = min(searchsorted(self.x, high, 'right') + 1, len(self.x))
+
+		if stop - start <= num_points:
+			return (self.x[start:stop], self.y[start:stop])
+
+		for block_size, mins, maxes in self.levels:
+			if 2 * (stop - start) // block_size <= num_points:
+				break
+
+		first, last = start // block_size, (stop - 1) // block_size + 1
+		mins, maxes = mins[first:last], maxes[first:last]
+
+		# Keep the points of each block in order.
+		idxs = column_stack((minimum(mins, maxes), maximum(mins, maxes))).ravel()
+
+		return (self.x[idxs], self.y[idxs])
+
+
+class MeshPyramid(object):
+	"""
+	A mesh at several resolutions, so that only about as many cells as can be seen need to be drawn.
+
+	Each level halves the number of cells of the previous level along both axes, and each of its cells holds the mean,
+	minimum, and maximum of the (non-NaN) cells of the full mesh which it covers.
+	"""
+
+	kinds = ['mean', 'min', 'max']
+
+	# Where pyramids are kept within the cache directory of some columns.
+	cache_subdir = 'meshes'
+	# The number of most recently used pyramids kept there.
+	max_cached = 8
+
+	def __init__(self, mesh, x_bounds, y_bounds, levels=None):
+		"""
+		mesh: A 2D array of values, with rows along y, evenly covering x_bounds and y_bounds.
+		levels: The levels (as produced by a previous instance), if they are already known.
+		"""
+
+		self.x_bounds, self.y_bounds = x_bounds, y_bounds
+
+		mesh = asarray(mesh, dtype=float)
+		self.shape = mesh.shape
+
+		if levels is None:
+			levels = [{'mean': mesh, 'min': mesh, 'max': mesh}]
+
+			sums, counts = where(isnan(mesh), 0, mesh), (~isnan(mesh)).astype(int)
+			while max(levels[-1]['mean'].shape) > 1:
+				level = dict((kind, self.reduce(levels[-1][kind], f, nan)) for kind, f in
+						[('min', fmin), ('max', fmax)])
+				sums, counts = self.reduce(sums, operator.add, 0), self.reduce(counts, operator.add, 0)
+
+				# Cells without any values are NaN.
+				level['mean'] = sums / where(counts > 0, counts, nan)
+
+				levels.append(level)
+
+		self.levels = levels
+
+	@staticmethod
+	def reduce(values, f, fill):
+		"""
+		Combine each 2x2 block of cells with f, padding the edges with fill as necessary.
+		"""
+
+		for axis in [0, 1]:
+			if values.shape[axis] % 2:
+				pad_shape = list(values.shape)
+				pad_shape[axis] = 1
+				pad = empty(pad_shape, dtype=values.dtype)
+				pad.fill(fill)
+
+				values = concatenate([values, pad], axis=axis)
+
+			values = f(values.take(range(0, values.shape[axis], 2), axis=axis),
+					values.take(range(1, values.shape[axis], 2), axis=axis))
+
+		return values
+
+	@classmethod
+	def from_triples(cls, x, y, z, cache_dir=None, method=None):
+		"""
+		Build a pyramid from triples (as for triples_to_mesh, with the given method), reusing a previous one for the
+		same values and method if possible.
+
+		cache_dir: The cache directory of the columns which the triples come from (see
+			spacq.interface.columns.Columns.cache_path). Pyramids are kept in its cache_subdir, and only the max_cached
+			most recently used ones are kept there.
+		"""
+
+		x, y, z = asarray(x, dtype=float), asarray(y, dtype=float), asarray(z, dtype=float)
+
+		if cache_dir is not None:
+			key = sha1(str(method))
+			key.update('|')
+			for values in [x, y, z]:
+				key.update(values.tostring())
+				# Separate the arrays.
+				key.update('|')
+
+			mesh_dir = path.join(cache_dir, cls.cache_subdir)
+			cache_path = path.join(mesh_dir, 'mesh-{0}.npz'.format(key.hexdigest()))
+
+			try:
+				result = cls.load(cache_path)
+			except (IOError, ValueError, KeyError, BadZipfile) as e:
+				# A missing or damaged file is simply rebuilt.
+				log.debug('Not using cached mesh "{0}": {1!r}'.format(cache_path, e))
+			else:
+				# Mark as recently used.
+				try:
+					os.utime(cache_path, None)
+				except EnvironmentError:
+					pass
+
+				return result
+
+		mesh, x_bounds, y_bounds, _ = triples_to_mesh(x, y, z, method)
+		result = cls(mesh, x_bounds, y_bounds)
+
+		if cache_dir is not None:
+			try:
+				if not path.isdir(mesh_dir):
+					os.mkdir(mesh_dir)
+
+				result.save(cache_path)
+				cls.prune(mesh_dir)
+			except EnvironmentError as e:
+				log.warning('Could not cache mesh in "{0}": {1}'.format(mesh_dir, e))
+
+		return result
+
+	@classmethod
+	def prune(cls, mesh_dir):
+		"""
+		Remove all but the max_cached most recently used pyramids from mesh_dir.
+		"""
+
+		file_paths = sorted(glob(path.join(mesh_dir, 'mesh-*.npz')), key=path.getmtime, reverse=True)
+
+		for file_path in file_paths[cls.max_cached:]:
+			os.remove(file_path)
+
+	def save(self, file_path):
+		"""
+		Store the pyramid, so that the file at file_path is only ever replaced by a complete one.
+		"""
+
+		arrays = {}
+		for i, level in enumerate(self.levels):
+			for kind in self.kinds:
+				arrays['{0}_{1}'.format(kind, i)] = level[kind]
+
+		fd, tmp_path = mkstemp(suffix='.tmp', dir=path.dirname(file_path) or '.')
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				savez(f, bounds=list(self.x_bounds) + list(self.y_bounds), num_levels=len(self.levels), **arrays)
+
+			try:
+				os.rename(tmp_path, file_path)
+			except OSError:
+				# Windows does not replace existing files.
+				os.remove(file_path)
+				os.rename(tmp_path, file_path)
+		except:
+			if path.exists(tmp_path):
+				os.remove(tmp_path)
+			raise
+
+	@classmethod
+	def load(cls, file_path):
+		with open(file_path, 'rb') as f:
+			data = load(f)
+
+			bounds = data['bounds']
+			levels = [dict((kind, data['{0}_{1}'.format(kind, i)]) for kind in cls.kinds) for
+					i in xrange(int(data['num_levels']))]
+
+		return cls(levels[0]['mean'], tuple(bounds[:2]), tuple(bounds[2:]), levels)
+
+	@property
+	def z_bounds(self):
+		"""
+		The smallest and largest values.
+		"""
+
+		return (self.levels[-1]['min'][0,0], self.levels[-1]['max'][0,0])
+
+	def get(self, x_range=None, y_range=None, shape=(500, 500), kind='mean'):
+		"""
+		The cells covering the given ranges (by default, everything), at the finest level which needs at most about
+		shape (rows, columns) cells.
+
+		Returns a tuple of:
+			the values
+			the x bounds of the cells
+			the y bounds of the cells
+		"""
+
+		if x_range is None:
+			x_range = self.x_bounds
+		if y_range is None:
+			y_range = self.y_bounds
+
+		# The size of a cell of the full mesh.
+		rows, cols = self.shape
+		cell_width = float(self.x_bounds[1] - self.x_bounds[0]) / cols or 1.0
+		cell_height = float(self.y_bounds[1] - self.y_bounds[0]) / rows or 1.0
+
+		visible_cols = (x_range[1] - x_range[0]) / cell_width
+		visible_rows = (y_range[1] - y_range[0]) / cell_height
+
+		for i, level in enumerate(self.levels):
+			scale = 2 ** i
+
+			if visible_rows / scale <= shape[0] and visible_cols / scale <= shape[1]:
+				break
+
+		values = level[kind]
+
+		def cells(value_range, low, size, num):
+			first = int(floor((value_range[0] - low) / size))
+			last = int(ceil((value_range[1] - low) / size))
+
+			return (min(max(first, 0), num - 1), min(max(last, first + 1, 1), num))
+
+		x_first, x_last = cells(x_range, self.x_bounds[0], cell_width * scale, values.shape[1])
+		y_first, y_last = cells(y_range, self.y_bounds[0], cell_height * scale, values.shape[0])
+
+		return (values[y_first:y_last,x_first:x_last],
+				(self.x_bounds[0] + x_first * cell_width * scale, self.x_bounds[0] + x_last * cell_width * scale),
+				(self.y_bounds[0] + y_first * cell_height * scale, self.y_bounds[0] + y_last * cell_height * scale))
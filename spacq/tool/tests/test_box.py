@@ -1,7 +1,10 @@
 from nose.tools import eq_
-from numpy import arange, linspace, repeat
+from numpy import arange, isnan, linspace, nan, repeat, sin, tile
 from numpy.testing import assert_array_equal, assert_array_almost_equal
+import os
 from pubsub import pub
+from shutil import rmtree
+from tempfile import mkdtemp
 from threading import RLock, Thread
 import time
 from unittest import main, TestCase
@@ -101,6 +104,67 @@ class TriplesToMeshTest(TestCase):
 		eq_(y_bounds, (0, 1))
 		eq_(z_bounds, (1, 4))
 
+	def testPartial(self):
+		"""
+		An aborted sweep, in a snake order.
+		"""
+
+		x = [0.1, 0.2, 0.3, 0.3, 0.2]
+		y = [1, 1, 1, 2, 2]
+		z = [1, 2, 3, 4, 5]
+
+		result, x_bounds, y_bounds, z_bounds = box.triples_to_mesh(x, y, z)
+
+		assert_array_equal(result[0], [1, 2, 3])
+		assert isnan(result[1,0])
+		assert_array_equal(result[1,1:], [5, 4])
+		eq_(x_bounds, (0.1, 0.3))
+		eq_(z_bounds, (1, 5))
+
+	def testMethod(self):
+		"""
+		Repeated points are interpolated with the given method.
+		"""
+
+		x = [0, 1, 0, 1, 0]
+		y = [0, 0, 1, 1, 0]
+		z = [1, 2, 3, 4, 1]
+
+		result, _, _, _ = box.triples_to_mesh(x, y, z, method='nearest')
+
+		assert_array_equal(result, [[1, 2], [3, 4]])
+
+	def testDirect(self):
+		"""
+		Only points on a grid can be placed directly.
+		"""
+
+		x = [0.1, 0.2, 0.3, 0.3, 0.2]
+		y = [1, 1, 1, 2, 2]
+		z = [1, 2, 3, 4, 5]
+
+		result, _, _, _ = box.triples_to_mesh(x, y, z, method='direct')
+		assert_array_equal(result[0], [1, 2, 3])
+		assert isnan(result[1,0])
+
+		# Interpolation fills in the missing cell.
+		result, _, _, _ = box.triples_to_mesh(x, y, z, method='nearest')
+		assert not isnan(result).any()
+
+		try:
+			box.triples_to_mesh([0, 0, 0.25, 1, 1], [0, 1, 0, 0, 1], [1, 2, 1.5, 3, 4], method='direct')
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+		try:
+			box.triples_to_mesh(x, y, z, method='quintic')
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
 	def testBigDataSet(self):
 		"""
 		One hundred thousand evenly-spaced data points.
@@ -320,5 +384,276 @@ class WithoutTest(TestCase):
 			assert False, 'Expected IndexError.'
 
 
+class LRUCacheTest(TestCase):
+	def testEviction(self):
+		"""
+		Only the most recently used items are kept.
+		"""
+
+		cache = box.LRUCache(2)
+
+		cache['a'] = 1
+		cache['b'] = 2
+		eq_(cache['a'], 1)
+
+		# "b" is now the oldest.
+		cache['c'] = 3
+
+		eq_(len(cache), 2)
+		assert 'a' in cache
+		assert 'b' not in cache
+		eq_(cache['c'], 3)
+
+		try:
+			cache['b']
+		except KeyError:
+			pass
+		else:
+			assert False, 'Expected KeyError.'
+
+		cache.clear()
+		eq_(len(cache), 0)
+
+	def testInvalid(self):
+		"""
+		Nothing could ever be stored.
+		"""
+
+		try:
+			box.LRUCache(0)
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+
+class CoalescerTest(TestCase):
+	def testFlush(self):
+		"""
+		Only the latest field values are kept, but all series values.
+		"""
+
+		c = box.Coalescer()
+
+		c.set('a', 1)
+		c.set('b', 2)
+		c.set('a', 3)
+		c.append('x', 1)
+		c.append('y', 2)
+		c.append('x', 3)
+
+		fields, series = c.flush()
+		eq_(fields.items(), [('a', 3), ('b', 2)])
+		eq_(series.items(), [('x', [1, 3]), ('y', [2])])
+
+		# Nothing new.
+		eq_(c.flush(), ({}, {}))
+
+		c.append('x', 5)
+		eq_(c.flush(), ({}, {'x': [5]}))
+
+
+
+class MinMaxPyramidTest(TestCase):
+	def testSmall(self):
+		"""
+		Few points are left alone.
+		"""
+
+		pyramid = box.MinMaxPyramid([1, 2, 3], [4, 5, 6])
+
+		x, y = pyramid.get()
+		assert_array_equal(x, [1, 2, 3])
+		assert_array_equal(y, [4, 5, 6])
+
+		x, y = pyramid.get(2.5, 2.7)
+		assert_array_equal(x, [2, 3])
+
+		try:
+			box.MinMaxPyramid([1, 2], [3])
+		except ValueError:
+			pass
+		else:
+			assert False, 'Expected ValueError.'
+
+	def testDecimate(self):
+		"""
+		Peaks survive decimation.
+		"""
+
+		x = linspace(0, 1, 100001)
+		y = sin(20 * x)
+		y[12345] = 10
+		y[54321] = -10
+
+		pyramid = box.MinMaxPyramid(x, y)
+
+		x_lod, y_lod = pyramid.get(num_points=1000)
+		assert len(x_lod) <= 1000
+		eq_(x_lod[0], 0)
+		eq_(x_lod[-1], 1)
+		assert (x_lod[1:] >= x_lod[:-1]).all()
+		eq_(max(y_lod), 10)
+		eq_(min(y_lod), -10)
+
+		# Zoom in.
+		x_lod, y_lod = pyramid.get(0.1, 0.2, 1000)
+		assert 250 < len(x_lod) <= 1000
+		assert x_lod[0] <= 0.1 and x_lod[-1] >= 0.2
+		assert x_lod[1] > 0.09 and x_lod[-2] < 0.21
+		eq_(max(y_lod), 10)
+
+		x_lod, y_lod = pyramid.get(0.1, 0.1001, 1000)
+		eq_(len(x_lod), 12)
+
+	def testUnordered(self):
+		"""
+		The range is ignored if x is not in order.
+		"""
+
+		x = arange(10000)[::-1]
+
+		x_lod, y_lod = box.MinMaxPyramid(x, x).get(10, 20, 100)
+		assert len(x_lod) <= 100
+		eq_(x_lod[0], 9999)
+		eq_(x_lod[-1], 0)
+
+
+
+class MeshPyramidTest(TestCase):
+	def testLevels(self):
+		"""
+		Each level summarizes the full mesh, ignoring missing cells.
+		"""
+
+		mesh = arange(15.0).reshape(3, 5)
+		mesh[1,1] = nan
+
+		pyramid = box.MeshPyramid(mesh, (0, 5), (0, 3))
+
+		eq_([x['mean'].shape for x in pyramid.levels], [(3, 5), (2, 3), (1, 2), (1, 1)])
+		assert_array_equal(pyramid.levels[1]['min'], [[0, 2, 4], [10, 12, 14]])
+		assert_array_equal(pyramid.levels[1]['max'], [[5, 8, 9], [11, 13, 14]])
+		assert_array_almost_equal(pyramid.levels[2]['mean'], [[72.0 / 11, 9]])
+		eq_(pyramid.z_bounds, (0, 14))
+
+	def testGet(self):
+		"""
+		Get the visible cells at a suitable resolution.
+		"""
+
+		pyramid = box.MeshPyramid(arange(64.0).reshape(8, 8), (0, 8), (10, 18))
+
+		values, x_bounds, y_bounds = pyramid.get()
+		eq_(values.shape, (8, 8))
+
+		values, x_bounds, y_bounds = pyramid.get(shape=(2, 4))
+		assert_array_equal(values, [[13.5, 17.5], [45.5, 49.5]])
+		eq_(x_bounds, (0, 8))
+		eq_(y_bounds, (10, 18))
+
+		# Zoomed in, the full resolution is enough.
+		values, x_bounds, y_bounds = pyramid.get((2.5, 4), (11, 12), shape=(2, 4))
+		assert_array_equal(values, [[10, 11]])
+		eq_(x_bounds, (2, 4))
+		eq_(y_bounds, (11, 12))
+
+		# Zoomed out less, a lower resolution is needed.
+		values, x_bounds, y_bounds = pyramid.get((0, 8), (10, 12), shape=(2, 4), kind='max')
+		assert_array_equal(values, [[9, 11, 13, 15]])
+
+	def testCache(self):
+		"""
+		Reuse pyramids for the same triples.
+		"""
+
+		x = tile(linspace(0, 1, 10), 10)
+		y = repeat(linspace(0, 1, 10), 10)
+		z = arange(100.0)
+
+		tmp_dir = mkdtemp()
+		mesh_dir = os.path.join(tmp_dir, box.MeshPyramid.cache_subdir)
+		try:
+			pyramid = box.MeshPyramid.from_triples(x, y, z, tmp_dir)
+			eq_(len(os.listdir(mesh_dir)), 1)
+
+			cached = box.MeshPyramid.from_triples(x, y, z, tmp_dir)
+			eq_(len(os.listdir(mesh_dir)), 1)
+
+			eq_(len(cached.levels), len(pyramid.levels))
+			for level, cached_level in zip(pyramid.levels, cached.levels):
+				for kind in box.MeshPyramid.kinds:
+					assert_array_equal(level[kind], cached_level[kind])
+			eq_(cached.x_bounds, (0, 1))
+
+			box.MeshPyramid.from_triples(x, y, -z, tmp_dir)
+			eq_(len(os.listdir(mesh_dir)), 2)
+
+			# The same values with another method.
+			box.MeshPyramid.from_triples(x, y, z, tmp_dir, method='linear')
+			eq_(len(os.listdir(mesh_dir)), 3)
+		finally:
+			rmtree(tmp_dir)
+
+	def testDamagedCache(self):
+		"""
+		A damaged cached pyramid is rebuilt.
+		"""
+
+		x = tile(linspace(0, 1, 10), 10)
+		y = repeat(linspace(0, 1, 10), 10)
+		z = arange(100.0)
+
+		tmp_dir = mkdtemp()
+		mesh_dir = os.path.join(tmp_dir, box.MeshPyramid.cache_subdir)
+		try:
+			box.MeshPyramid.from_triples(x, y, z, tmp_dir)
+			file_path = os.path.join(mesh_dir, os.listdir(mesh_dir)[0])
+
+			with open(file_path, 'r+b') as f:
+				f.truncate(os.path.getsize(file_path) // 2)
+
+			pyramid = box.MeshPyramid.from_triples(x, y, z, tmp_dir)
+			eq_(pyramid.z_bounds, (0, 99))
+
+			# The file is whole again, and no temporary file is left behind.
+			eq_(os.listdir(mesh_dir), [os.path.basename(file_path)])
+			eq_(box.MeshPyramid.load(file_path).z_bounds, (0, 99))
+		finally:
+			rmtree(tmp_dir)
+
+	def testPrune(self):
+		"""
+		Only the most recently used pyramids are kept.
+		"""
+
+		x = tile(linspace(0, 1, 10), 10)
+		y = repeat(linspace(0, 1, 10), 10)
+
+		tmp_dir = mkdtemp()
+		mesh_dir = os.path.join(tmp_dir, box.MeshPyramid.cache_subdir)
+		try:
+			open(os.path.join(tmp_dir, 'mesh-other.npz'), 'w').close()
+
+			for i in xrange(box.MeshPyramid.max_cached + 3):
+				box.MeshPyramid.from_triples(x, y, arange(100.0) + i, tmp_dir)
+
+				# Ensure distinct modification times.
+				for name in os.listdir(mesh_dir):
+					file_path = os.path.join(mesh_dir, name)
+					os.utime(file_path, (os.path.getmtime(file_path) - 1,) * 2)
+
+			eq_(len(os.listdir(mesh_dir)), box.MeshPyramid.max_cached)
+
+			# The latest one is still cached.
+			box.MeshPyramid.from_triples(x, y, arange(100.0) + box.MeshPyramid.max_cached + 2, tmp_dir)
+			eq_(len(os.listdir(mesh_dir)), box.MeshPyramid.max_cached)
+
+			# Nothing outside the pyramids of these columns is touched.
+			eq_(sorted(os.listdir(tmp_dir)), sorted([box.MeshPyramid.cache_subdir, 'mesh-other.npz']))
+		finally:
+			rmtree(tmp_dir)
+
+
 if __name__ == '__main__':
 	main()